@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from api_path import *
 from api_external.lib import *
@@ -114,4 +115,19 @@ def test_delete(test_cls):
             path_info_detail,
             Method.DELETE,
             ResponseCode.NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+
+async def test_get_list_concurrently(async_transport):
+    test_classes = [Location, Flavor, Drink, User, Machine, Corporation, Menu]
+    list_resps = await asyncio.gather(*(test_cls.aread_list() for test_cls in test_classes))
+    for test_cls, list_resp in zip(test_classes, list_resps):
+        list_path = test_cls.LIST_API_PATH
+        if test_cls is Corporation:
+            list_path = test_cls.OLD_LIST_API_PATH
+        json_schema_lib = JSONSchemaLibrary(
+            list_path,
+            Method.GET,
+            ResponseCode.OK
+        )
+        assert json_schema_lib.verify_resp_schema(list_resp.json())
@@ -1,8 +1,103 @@
+import asyncio
+import copy
+import functools
+import json
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import constant
 from api_path import *
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Union, List
-from api_external.lib.CommonUtils import APIUtils
+from typing import Dict, Any, Iterator, Optional, Set, Union, List
+from api_external.lib.CommonUtils import APIUtils, AsyncAPIUtils
 from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
+from api_external.lib.ResourceJournal import ResourceJournal
+
+
+class PagedListResponse:
+    """Response-like view of a list read page by page, as if it had been returned at once.
+    
+    `json()` is the first page's body with the item list replaced by the items of every
+    page; the individual page responses are kept in `responses`.
+    """
+    
+    def __init__(self, responses, bodies, items_key):
+        self.responses = responses
+        self.status_code = responses[0].status_code
+        self.headers = responses[0].headers
+        items = [item for body in bodies for item in APIEndpointBase.list_items(body, items_key)]
+        self._body = {**bodies[0], 'data': {**bodies[0]['data'], items_key: items}}
+    
+    def json(self):
+        return self._body
+    
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+
+class ListPagePlan:
+    """Decides which pages of a paginated list to request, for both the sync and asyncio readers.
+    
+    Page 1 is read alone and handed to the plan. Its `total`, unless `count_free` is set or
+    the endpoint does not report one, tells how many more pages to prefetch; otherwise up to
+    `concurrency` pages are requested ahead. Either way the list ends at the first short
+    page, so rows added while paging are still picked up.
+    """
+    
+    def __init__(self, first_body, items_key, page_size, concurrency, count_free=False):
+        self.items_key = items_key
+        self.page_size = page_size
+        self.concurrency = concurrency
+        total = first_body['data'].get('total') if isinstance(first_body['data'], dict) else None
+        self.last_page = None if count_free or not isinstance(total, int) else math.ceil(total / page_size)
+        self.next_page = 2
+        self.finished = self._is_short(first_body)
+    
+    def _is_short(self, body) -> bool:
+        return len(APIEndpointBase.list_items(body, self.items_key)) < self.page_size
+    
+    def pages_to_request(self, in_flight) -> List[int]:
+        """Page numbers to request now, given how many requests are still in flight"""
+        pages = []
+        # Past the expected last page, keep one request in flight until a short page shows up
+        while in_flight + len(pages) < self.concurrency and (
+                self.last_page is None or self.next_page <= self.last_page or not in_flight + len(pages)):
+            pages.append(self.next_page)
+            self.next_page += 1
+        return pages
+    
+    def received(self, body) -> bool:
+        """Record the next page body, in page order; returns True once the list has ended"""
+        self.finished = self._is_short(body)
+        return self.finished
+
+
+@dataclass
+class BatchResult:
+    """Outcome of create_many/delete_many.
+    
+    Attributes:
+        succeeded: Objects whose request went through, in submission order
+        failed: (object, exception) for every object whose request failed
+        elapsed: Wall-clock seconds the batch took
+    """
+    succeeded: List[Any] = field(default_factory=list)
+    failed: List[tuple] = field(default_factory=list)
+    elapsed: float = 0.0
+    
+    @property
+    def throughput(self) -> float:
+        """Items processed per second, failures included"""
+        count = len(self.succeeded) + len(self.failed)
+        return count / self.elapsed if self.elapsed else 0.0
+    
+    def summary(self, action) -> str:
+        return (f'{action}: {len(self.succeeded)} succeeded, {len(self.failed)} failed '
+                f'in {self.elapsed:.2f}s ({self.throughput:.1f} items/s)')
 
 
 class APIEndpointBase(ABC):
@@ -13,12 +108,48 @@ class APIEndpointBase(ABC):
     # Class-level endpoint configurations
     LIST_API_PATH: Optional[ApiPath] = None
     DETAIL_API_PATH: Optional[ApiPath] = None
+    # Key of the item list inside `data` of a list response; None when `data` is the list itself
+    LIST_ITEMS_KEY: Optional[str] = None
+    # Whether the list endpoint takes `page`/`amount`; unpaginated lists are read in one request
+    LIST_PAGINATED: bool = False
+    # Field of a list item holding its resource id, requested alone when picking random resources
+    RESOURCE_ID_FIELD: Optional[str] = None
+    # Instance attribute holding the resource id, so an object can be rebuilt from a stored id
+    RESOURCE_ID_ATTR: Optional[str] = None
+    # Cached list totals per endpoint class: {cls: (total, monotonic time fetched)}
+    _list_totals: Dict[type, tuple] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Deleted resources are crossed off the journal the creates are written to, and
+        # are never reset and handed out again, even when the delete failed half-way
+        if 'delete' in cls.__dict__:
+            cls.delete = cls._marking_unresettable(ResourceJournal.recording_deletes(cls.__dict__['delete']))
+    
+    @staticmethod
+    def _marking_unresettable(mutator):
+        """Wrap a method that changes the resource outside `update` so `reset` refuses it"""
+        @functools.wraps(mutator)
+        def wrapper(obj, *args, **kwargs):
+            obj._mark_unresettable()
+            return mutator(obj, *args, **kwargs)
+        return wrapper
     
     def __init__(self):
         """Initialize API endpoint with empty data containers"""
         self.create_payload: Dict[str, Any] = {}
         self.update_payload: Dict[str, Any] = {}
         self.info_data: Dict[str, Any] = {}
+        # info_data as of create, and whether the resource has changed since (see reset)
+        self._created_info: Optional[Dict[str, Any]] = None
+        self._modified: bool = False
+        self._resettable: bool = True
+        # Whether a ResourcePool hands this resource out again, see mark_pooled
+        self._pooled: bool = False
+        # Every update_payload key sent since create, so reset puts all of them back
+        self._updated_fields: Set[str] = set()
+        # Whether the create has been written to the resource journal
+        self._journaled: bool = False
     
     @abstractmethod
     def _prepare_create_payload(self) -> bool:
@@ -42,9 +173,26 @@ class APIEndpointBase(ABC):
         resp = self._execute_create_request()
         if not resp:
             return None
+        self._finish_create(resp)
+        return resp
+    
+    def _finish_create(self, resp) -> None:
+        """Take in a successful create response: resource id, journal, info_data and the create-time snapshot"""
         self._set_resource_id(resp)
+        self._journal_create()
         self.info_data.update(self.create_payload)
-        return resp
+        self._after_create(resp)
+        self._created_info = copy.deepcopy(self.info_data)
+    
+    def _journal_create(self) -> None:
+        """Write the create to the resource journal, once; call it as soon as the resource exists"""
+        if not self._journaled:
+            ResourceJournal.record('create', self)
+            self._journaled = True
+    
+    def _after_create(self, resp) -> None:
+        """Hook to adjust info_data once a create request succeeded"""
+        pass
     
     def _execute_create_request(self) -> Any:
         """
@@ -83,35 +231,177 @@ class APIEndpointBase(ABC):
         """
         if not self._prepare_update_payload():
             return None
+        missing = self._fields_missing_from_snapshot()
+        if missing:
+            self._complete_snapshot(missing, self.read_detail(self.resource_id).json().get('data') or {})
+        self._mark_updated()
         resp = self._execute_update_request()
         if not resp:
             return None
         self.info_data.update(self.update_payload)
+        self._after_update(resp)
         return resp
     
+    def _mark_updated(self) -> None:
+        self._modified = True
+        self._updated_fields.update(self.update_payload)
+    
+    def _fields_missing_from_snapshot(self) -> List[str]:
+        """update_payload keys the create-time snapshot of a pooled resource lacks, i.e. fields create did not set"""
+        if not self._pooled or self._created_info is None or not self._resettable:
+            return []
+        return [key for key in self.update_payload if key not in self._created_info]
+    
+    def _complete_snapshot(self, missing, detail) -> None:
+        """
+        Add the current backend values of `missing` fields to the create-time snapshot before
+        an update overwrites them; without one of them the resource can no longer be reset
+        """
+        for key in missing:
+            if key in detail:
+                self._created_info[key] = copy.deepcopy(detail[key])
+            else:
+                self._mark_unresettable()
+    
+    def _after_update(self, resp) -> None:
+        """Hook to adjust info_data once an update request succeeded"""
+        pass
+    
+    def _mark_unresettable(self) -> None:
+        """Record a change the update path cannot undo, e.g. a machine installed at a location or a delete"""
+        self._resettable = False
+    
+    def mark_pooled(self) -> None:
+        """Let `reset` hand the resource out again; `update` then keeps its create-time snapshot complete"""
+        self._pooled = True
+    
+    def reset(self) -> bool:
+        """
+        Bring a pooled resource back to the state it was created in, through the update path.
+        Every field an update payload touches is set back to its value in the create-time
+        snapshot, which `update` completes by re-reading fields create did not set.
+        Unmodified resources cost no request.
+        Returns: False if the resource cannot be reset and should be deleted instead
+        """
+        if not self._pooled or self._created_info is None or not self._resettable:
+            return False
+        if not self._modified:
+            return True
+        if not self._prepare_update_payload():
+            return False
+        fields = list(self.update_payload) + sorted(self._updated_fields - set(self.update_payload))
+        if any(key not in self._created_info for key in fields):
+            return False
+        self.update_payload = {key: copy.deepcopy(self._created_info[key]) for key in fields}
+        try:
+            resp = self._execute_update_request()
+        except AssertionError as error:
+            print(f'{type(self).__name__} reset failed: {error}')
+            return False
+        if not resp:
+            return False
+        self.info_data = copy.deepcopy(self._created_info)
+        self._modified = False
+        self._updated_fields.clear()
+        return True
+    
     @abstractmethod
     def delete(self) -> Any:
         """Delete a resource through the API"""
         pass
     
+    @staticmethod
+    def _run_batch(action, objs, call, concurrency=None) -> BatchResult:
+        """Call `call(obj)` for every object on a bounded thread pool, collecting failures"""
+        result = BatchResult()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency or constant.BULK_CONCURRENCY)) as executor:
+            futures = [(obj, executor.submit(call, obj)) for obj in objs]
+            for obj, future in futures:
+                try:
+                    value = future.result()
+                    if not value:
+                        raise RuntimeError(f'{action} returned {value!r}')
+                    result.succeeded.append(obj)
+                except Exception as error:
+                    result.failed.append((obj, error))
+        result.elapsed = time.perf_counter() - start
+        print(result.summary(action))
+        for obj, error in result.failed[:5]:
+            print(f'  {action} failed: {error}')
+        return result
+    
+    @classmethod
+    def create_many(cls, n, concurrency=None) -> BatchResult:
+        """
+        Create `n` resources, each through its own `create()`, at most `concurrency` at a time.
+        A failed create is recorded in the result and does not stop the others.
+        Args:
+            n: Number of resources to create
+            concurrency: Requests in flight at once (defaults to BULK_CONCURRENCY)
+        Returns: BatchResult whose `succeeded` holds the created objects
+        """
+        return cls._run_batch(f'{cls.__name__} create', [cls() for _ in range(n)],
+                              lambda obj: obj.create(), concurrency)
+    
+    @classmethod
+    def _execute_delete_many_request(cls, objs) -> Any:
+        """
+        Delete `objs` with a single batch request, for endpoints that have one.
+        Returns: API response, or None when there is no batch endpoint and objects are deleted one by one
+        """
+        return None
+    
+    @classmethod
+    def delete_many(cls, objs, concurrency=None) -> BatchResult:
+        """
+        Delete resources created by this class, through the batch endpoint when there is one,
+        otherwise through each object's `delete()` at most `concurrency` at a time.
+        Args:
+            objs: Objects to delete, e.g. `create_many(...).succeeded`
+            concurrency: Requests in flight at once (defaults to BULK_CONCURRENCY)
+        Returns: BatchResult whose `succeeded` holds the deleted objects
+        """
+        objs = list(objs)
+        if not objs:
+            return BatchResult()
+        start = time.perf_counter()
+        resp = cls._execute_delete_many_request(objs)
+        if resp is not None:
+            result = BatchResult(succeeded=objs, elapsed=time.perf_counter() - start)
+            print(result.summary(f'{cls.__name__} batch delete'))
+            return result
+        return cls._run_batch(f'{cls.__name__} delete', objs, lambda obj: obj.delete(), concurrency)
+    
     @classmethod
     def _prepare_get_detail_parameters(cls) -> dict | list:
         field_list = JSONSchemaLibrary(cls.DETAIL_API_PATH).get_request_fields_schema()
         params = [('fields[]', f) for f in field_list]
         return params
     
+    @staticmethod
+    def _project_parameters(params, api_path, projection) -> list:
+        """Replace the `fields[]` of `params` with a projection checked against the operation's fields enum"""
+        if not projection:
+            return params
+        field_list = JSONSchemaLibrary(api_path).get_projection_fields(projection)
+        return [param for param in params if param[0] != 'fields[]'] + [('fields[]', f) for f in field_list]
+    
     @classmethod
     @abstractmethod
     def generate_detail_path_info(cls, resource_id):
         pass
     
     @classmethod
-    def read_detail(cls, resource_id) -> Any:
+    def read_detail(cls, resource_id, projection=None) -> Any:
         """
         Read/retrieve a resource from the API.
+        Args:
+            projection: Dotted field paths to request instead of every field, e.g. {'sku'};
+                        validate the response with JSONSchemaLibrary(..., projection=projection)
         Returns: API response data
         """
-        params = cls._prepare_get_detail_parameters()
+        params = cls._project_parameters(cls._prepare_get_detail_parameters(), cls.DETAIL_API_PATH, projection)
         api_path_info = cls.generate_detail_path_info(resource_id)
         resp = APIUtils.call_api_and_assert_status_code(
             api_path_info,
@@ -138,30 +428,328 @@ class APIEndpointBase(ABC):
     @classmethod
     @abstractmethod
     def _prepare_get_list_parameters(cls) -> dict | list:
+        """Query parameters of a list request, without `page` and `amount`"""
         pass
     
     @classmethod
-    def read_list(cls) -> Any:
-        """
-        Read/retrieve a resource from the API.
-        Returns: API response data
-        """
-        params = cls._prepare_get_list_parameters()
+    def _list_path_info(cls) -> ApiPathInfo:
+        return ApiPathInfo(cls.LIST_API_PATH)
+    
+    @staticmethod
+    def list_items(body, items_key) -> list:
+        """Return the items of one list response body"""
+        data = body['data']
+        return data if items_key is None else data[items_key]
+    
+    @classmethod
+    def _fetch_list_page(cls, params, page=None, page_size=None):
+        if page is not None:
+            params = list(params) + [('page', page), ('amount', page_size)]
         resp = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(cls.LIST_API_PATH),
+            cls._list_path_info(),
             Method.GET,
             ResponseCode.OK,
             None,
             params=params
         )
-        return resp
+        return resp, resp.json()
+    
+    @classmethod
+    def _iter_list_pages(cls, page_size=None, concurrency=None, count_free=False, params=None) -> Iterator:
+        """
+        Yield (response, body) for every page of the list, in page order.
+        Pages are requested as a ListPagePlan decides, on a thread pool.
+        """
+        page_size = page_size or constant.LIST_PAGE_SIZE
+        concurrency = concurrency or constant.LIST_CONCURRENCY
+        if params is None:
+            params = cls._prepare_get_list_parameters()
+        if not cls.LIST_PAGINATED:
+            yield cls._fetch_list_page(params)
+            return
+        
+        first = cls._fetch_list_page(params, 1, page_size)
+        yield first
+        plan = ListPagePlan(first[1], cls.LIST_ITEMS_KEY, page_size, concurrency, count_free)
+        if plan.finished:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        window = deque()
+        try:
+            while not plan.finished:
+                for page_number in plan.pages_to_request(len(window)):
+                    window.append(executor.submit(cls._fetch_list_page, params, page_number, page_size))
+                page = window.popleft().result()
+                yield page
+                plan.received(page[1])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @classmethod
+    def iter_list(cls, page_size=None, concurrency=None, count_free=False, params=None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every item of the list, fetching pages in parallel.
+        Args:
+            page_size: Items per request (defaults to LIST_PAGE_SIZE)
+            concurrency: Pages requested ahead of the consumer (defaults to LIST_CONCURRENCY)
+            count_free: Ignore `total` and page until a short page, for endpoints without a reliable count
+            params: Query parameters to use instead of _prepare_get_list_parameters()
+        Returns: Generator of list items, in list order
+        """
+        for _, body in cls._iter_list_pages(page_size, concurrency, count_free, params):
+            yield from cls.list_items(body, cls.LIST_ITEMS_KEY)
+    
+    @classmethod
+    def _id_only_list_parameters(cls) -> list:
+        """List parameters projected to RESOURCE_ID_FIELD, when the endpoint accepts it in `fields[]`"""
+        params = cls._prepare_get_list_parameters()
+        try:
+            return cls._project_parameters(params, cls._list_path_info().api_path, {cls.RESOURCE_ID_FIELD})
+        except ValueError:
+            return params
+    
+    @classmethod
+    def list_total(cls, refresh=False) -> Optional[int]:
+        """Return the item count of a paginated list, requested at most once per LIST_TOTAL_TTL"""
+        cached = cls._list_totals.get(cls)
+        if refresh or cached is None or time.monotonic() - cached[1] > constant.LIST_TOTAL_TTL:
+            _, body = cls._fetch_list_page(cls._id_only_list_parameters(), 1, 1)
+            total = body['data'].get('total')
+            cached = cls._list_totals[cls] = (total if isinstance(total, int) else None, time.monotonic())
+        return cached[0]
+    
+    @staticmethod
+    def reservoir_sample(items, rng=random):
+        """Return one element of an iterable chosen uniformly at random in a single pass, or None"""
+        chosen = None
+        for count, item in enumerate(items, 1):
+            if rng.randrange(count) == 0:
+                chosen = item
+        return chosen
+    
+    @classmethod
+    def random_item(cls) -> Optional[Dict[str, Any]]:
+        """
+        Return a list item chosen uniformly at random, projected to RESOURCE_ID_FIELD where possible.
+        
+        Paginated lists that report a total cost a single `amount=1` request at a random page,
+        plus the cached count; when that page comes back empty the list shrank, so the count is
+        refreshed once. Other lists are reservoir sampled while streaming through iter_list.
+        Returns: The item, or None if the list is empty
+        """
+        params = cls._id_only_list_parameters()
+        if cls.LIST_PAGINATED and cls.list_total() is not None:
+            for refresh in (False, True):
+                total = cls.list_total(refresh)
+                if not total:
+                    continue
+                _, body = cls._fetch_list_page(params, random.randrange(total) + 1, 1)
+                items = cls.list_items(body, cls.LIST_ITEMS_KEY)
+                if items:
+                    return items[0]
+            return None
+        return cls.reservoir_sample(cls.iter_list(params=params))
+    
+    @classmethod
+    def read_list(cls, stream=False, page_size=None, concurrency=None, projection=None) -> Any:
+        """
+        Read/retrieve a resource from the API.
+        Args:
+            stream: Leave the body unread so it can be checked with JSONSchemaLibrary.verify_resp_stream;
+                    paginated lists are then requested whole in a single response
+            page_size: Items per page, see iter_list
+            concurrency: Pages fetched in parallel, see iter_list
+            projection: Dotted field paths to request instead of every field, e.g. {'serial_num'};
+                        validate the response with JSONSchemaLibrary(..., projection=projection)
+        Returns: API response data; a PagedListResponse for paginated lists
+        """
+        params = cls._project_parameters(cls._prepare_get_list_parameters(), cls._list_path_info().api_path,
+                                         projection)
+        if stream:
+            if cls.LIST_PAGINATED:
+                params = list(params) + [('amount', cls._get_item_amount())]
+            return APIUtils.call_api_and_assert_status_code(
+                cls._list_path_info(),
+                Method.GET,
+                ResponseCode.OK,
+                None,
+                params=params,
+                stream=stream
+            )
+        pages = list(cls._iter_list_pages(page_size, concurrency, params=params))
+        if not cls.LIST_PAGINATED:
+            return pages[0][0]
+        return PagedListResponse([resp for resp, _ in pages], [body for _, body in pages], cls.LIST_ITEMS_KEY)
     
     @property
     @abstractmethod
     def resource_id(self):
         pass
     
+    @classmethod
+    def from_resource_id(cls, resource_id) -> 'APIEndpointBase':
+        """Object standing for an existing resource, enough to `delete` it"""
+        obj = cls()
+        setattr(obj, cls.RESOURCE_ID_ATTR, resource_id)
+        return obj
+    
     @classmethod
     @abstractmethod
     def get_random_resource_id(cls) -> str:
-        pass
\ No newline at end of file
+        pass
+    
+    # ------------------------------------------------------------------------
+    # asyncio variants
+    #
+    # The payload and parameter hooks are shared with the synchronous template.
+    # They may call the API themselves (e.g. Drink looks up flavors), so they run
+    # in a worker thread; the create, update and delete requests themselves go
+    # through AsyncAPIUtils.
+    # ------------------------------------------------------------------------
+    async def acreate(self) -> Any:
+        """
+        Create a new resource through the asyncio client.
+        Returns: API response
+        """
+        if not await asyncio.to_thread(self._prepare_create_payload):
+            return None
+        resp = await self._aexecute_create_request()
+        if not resp:
+            return None
+        self._finish_create(resp)
+        return resp
+    
+    async def _aexecute_create_request(self) -> Any:
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(self.__class__.LIST_API_PATH),
+            Method.POST,
+            ResponseCode.OK,
+            None,
+            data=self.create_payload
+        )
+        return resp
+    
+    async def aupdate(self) -> Any:
+        """
+        Update an existing resource without blocking the event loop.
+        Returns: API response
+        """
+        if not await asyncio.to_thread(self._prepare_update_payload):
+            return None
+        missing = self._fields_missing_from_snapshot()
+        if missing:
+            detail = (await self.aread_detail(self.resource_id)).json().get('data') or {}
+            self._complete_snapshot(missing, detail)
+        self._mark_updated()
+        resp = await self._aexecute_update_request()
+        if not resp:
+            return None
+        self.info_data.update(self.update_payload)
+        self._after_update(resp)
+        return resp
+    
+    @abstractmethod
+    async def _aexecute_update_request(self) -> Any:
+        """
+        Execute the update API request through the asyncio client, like _execute_update_request.
+        Returns: API response data
+        """
+        pass
+    
+    async def adelete(self) -> Any:
+        """
+        Delete a resource through the asyncio client.
+        Returns: API response data
+        """
+        self._mark_unresettable()
+        resp = await self._aexecute_delete_request()
+        if resp:
+            ResourceJournal.record('delete', self)
+        return resp
+    
+    @abstractmethod
+    async def _aexecute_delete_request(self) -> Any:
+        """
+        Execute the delete API request(s) through the asyncio client, like delete.
+        Returns: API response data
+        """
+        pass
+    
+    @classmethod
+    async def aread_detail(cls, resource_id, projection=None) -> Any:
+        """
+        Read/retrieve a resource through the asyncio client.
+        Args:
+            projection: Dotted field paths to request instead of every field, see read_detail
+        Returns: API response
+        """
+        params = await asyncio.to_thread(
+            lambda: cls._project_parameters(cls._prepare_get_detail_parameters(), cls.DETAIL_API_PATH, projection))
+        api_path_info = cls.generate_detail_path_info(resource_id)
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            api_path_info,
+            Method.GET,
+            ResponseCode.OK,
+            None,
+            params=params
+        )
+        return resp
+    
+    @classmethod
+    async def _afetch_list_page(cls, params, page=None, page_size=None):
+        if page is not None:
+            params = list(params) + [('page', page), ('amount', page_size)]
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            cls._list_path_info(),
+            Method.GET,
+            ResponseCode.OK,
+            None,
+            params=params
+        )
+        return resp, resp.json()
+    
+    @classmethod
+    async def _aiter_list_pages(cls, page_size=None, concurrency=None, count_free=False, params=None):
+        """asyncio counterpart of _iter_list_pages, planned by the same ListPagePlan"""
+        page_size = page_size or constant.LIST_PAGE_SIZE
+        concurrency = concurrency or constant.LIST_CONCURRENCY
+        if params is None:
+            params = await asyncio.to_thread(cls._prepare_get_list_parameters)
+        if not cls.LIST_PAGINATED:
+            yield await cls._afetch_list_page(params)
+            return
+        
+        first = await cls._afetch_list_page(params, 1, page_size)
+        yield first
+        plan = ListPagePlan(first[1], cls.LIST_ITEMS_KEY, page_size, concurrency, count_free)
+        window = deque()
+        try:
+            while not plan.finished:
+                for page_number in plan.pages_to_request(len(window)):
+                    window.append(asyncio.ensure_future(cls._afetch_list_page(params, page_number, page_size)))
+                page = await window.popleft()
+                yield page
+                plan.received(page[1])
+        finally:
+            for task in window:
+                task.cancel()
+    
+    @classmethod
+    async def aread_list(cls, page_size=None, concurrency=None, count_free=False, projection=None) -> Any:
+        """
+        Read/retrieve the resource list through the asyncio client, paging like read_list.
+        Args:
+            page_size: Items per page, see iter_list
+            concurrency: Pages requested ahead, see iter_list
+            count_free: Ignore `total` and page until a short page, see iter_list
+            projection: Dotted field paths to request instead of every field, see read_list
+        Returns: API response; a PagedListResponse for paginated lists
+        """
+        params = await asyncio.to_thread(
+            lambda: cls._project_parameters(cls._prepare_get_list_parameters(), cls._list_path_info().api_path,
+                                            projection))
+        pages = [page async for page in cls._aiter_list_pages(page_size, concurrency, count_free, params)]
+        if not cls.LIST_PAGINATED:
+            return pages[0][0]
+        return PagedListResponse([resp for resp, _ in pages], [body for _, body in pages], cls.LIST_ITEMS_KEY)
\ No newline at end of file
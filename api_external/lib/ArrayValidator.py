@@ -0,0 +1,201 @@
+import atexit
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from jsonschema.exceptions import ValidationError
+
+import constant
+from api_external.lib.FastValidator import FastValidator
+
+
+@dataclass
+class ValidationReport:
+    """Describes how much of a response a validation run actually covered.
+
+    Attributes:
+        mode: 'full', 'sample' or 'parallel'
+        items_total: Number of items in the validated array, None when there is no item array
+        items_validated: Number of those items checked against the item schema
+        error_count: Number of validation errors found
+    """
+    mode: str
+    items_total: Optional[int] = None
+    items_validated: Optional[int] = None
+    error_count: int = 0
+
+    @property
+    def coverage(self) -> float:
+        if not self.items_total:
+            return 1.0
+        return self.items_validated / self.items_total
+
+
+# Validation modes of JSONSchemaLibrary.verify_resp_schema
+VALIDATION_MODES = ('full', 'sample', 'parallel')
+
+# Per-process cache of compiled item validators, used inside pool workers and keyed by
+# schema digest, so a swagger.json swapped in mid-session is never validated with stale code
+_worker_validators: Dict[str, Any] = {}
+
+
+def _validate_chunk(schema_digest, item_schema, start, items):
+    validator = _worker_validators.get(schema_digest)
+    if validator is None:
+        validator = _worker_validators[schema_digest] = FastValidator.for_schema(item_schema)
+    # ValidationError objects reference the schema and validator, so send back plain data
+    return [
+        (start + offset, list(error.path), list(error.schema_path), error.message)
+        for offset, item in enumerate(items)
+        for error in validator.iter_errors(item)
+    ]
+
+
+class ArrayValidator:
+    """Validates a response by splitting its schema into the list items and the envelope around them.
+
+    The item array defaults to the first array of objects reachable through `properties`,
+    e.g. `data.locations`. Item errors get their paths prefixed with the array location,
+    so `path`, `absolute_path` and `schema_path` read exactly as if the whole document had
+    been validated at once. Constraints on the array itself (minItems, uniqueItems, ...)
+    are checked against an empty envelope array and are therefore not enforced.
+    """
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, schema: Dict[str, Any], array_path: Optional[List[str]] = None):
+        self.schema = schema
+        self.array_path = list(array_path) if array_path is not None else self.find_item_array(schema)
+        if self.array_path is None:
+            raise ValueError('Schema has no item array')
+
+        self.item_schema_path: List[str] = []
+        array_schema = schema
+        for key in self.array_path:
+            self.item_schema_path += ['properties', key]
+            array_schema = array_schema['properties'][key]
+        self.item_schema_path.append('items')
+
+        self.item_schema = dict(array_schema.get('items', {}))
+        if '$defs' in schema:
+            # Recursive refs point at the root's $defs, so the item schema needs them too
+            self.item_schema['$defs'] = schema['$defs']
+        self.item_schema_digest = FastValidator.schema_digest(self.item_schema)
+        self.item_validator = FastValidator.for_schema(self.item_schema)
+        self.envelope_validator = FastValidator.for_schema(self._without_items(schema, self.array_path))
+
+    @staticmethod
+    def find_item_array(schema: Dict[str, Any]) -> Optional[List[str]]:
+        """Return the property path of the first array of objects, breadth first"""
+        queue = deque([([], schema)])
+        while queue:
+            path, node = queue.popleft()
+            for key, prop in (node.get('properties') or {}).items():
+                if not isinstance(prop, dict):
+                    continue
+                if prop.get('type') == 'array' and isinstance(prop.get('items'), dict) \
+                        and prop['items'].get('type') == 'object':
+                    return path + [key]
+                if 'properties' in prop:
+                    queue.append((path + [key], prop))
+        return None
+
+    @staticmethod
+    def _without_items(schema, array_path):
+        if not array_path:
+            return {k: v for k, v in schema.items() if k != 'items'}
+        key = array_path[0]
+        properties = dict(schema['properties'])
+        properties[key] = ArrayValidator._without_items(properties[key], array_path[1:])
+        return {**schema, 'properties': properties}
+
+    def prefix_error(self, error, index):
+        """Rewrite an item error's paths so they are relative to the whole document"""
+        error.path.extendleft(reversed(self.array_path + [index]))
+        error.schema_path.extendleft(reversed(self.item_schema_path))
+        return error
+
+    def item_errors(self, index, item):
+        for error in self.item_validator.iter_errors(item):
+            yield self.prefix_error(error, index)
+
+    def split(self, sample):
+        """Return (envelope, items): the document with the item array emptied, and the items"""
+        node = sample
+        for key in self.array_path[:-1]:
+            node = node.get(key) if isinstance(node, dict) else None
+        items = node.get(self.array_path[-1]) if isinstance(node, dict) else None
+        if not isinstance(items, list):
+            return sample, []
+        envelope = dict(sample)
+        target = envelope
+        for key in self.array_path[:-1]:
+            target[key] = dict(target[key])
+            target = target[key]
+        target[self.array_path[-1]] = []
+        return envelope, items
+
+    @staticmethod
+    def shape_of(value):
+        """Hashable description of a value's structure: keys and JSON types, ignoring values"""
+        if isinstance(value, dict):
+            return tuple(sorted((key, ArrayValidator.shape_of(item)) for key, item in value.items()))
+        if isinstance(value, list):
+            return ('array', frozenset(ArrayValidator.shape_of(item) for item in value))
+        return type(value).__name__
+
+    def validate_sample(self, sample, sample_size=None, seed=None):
+        """Validate the envelope, a seeded random sample of items and every item of a new shape"""
+        sample_size = constant.SCHEMA_SAMPLE_SIZE if sample_size is None else sample_size
+        seed = constant.SCHEMA_SAMPLE_SEED if seed is None else seed
+        envelope, items = self.split(sample)
+        errors = list(self.envelope_validator.iter_errors(envelope))
+
+        selected = set(random.Random(seed).sample(range(len(items)), min(sample_size, len(items))))
+        seen_shapes = set()
+        for index, item in enumerate(items):
+            shape = hash(self.shape_of(item))
+            if shape not in seen_shapes:
+                seen_shapes.add(shape)
+                selected.add(index)
+        for index in sorted(selected):
+            errors.extend(self.item_errors(index, items[index]))
+        return errors, ValidationReport('sample', len(items), len(selected), len(errors))
+
+    @classmethod
+    def pool(cls) -> ProcessPoolExecutor:
+        """Return the process pool shared by every parallel validation"""
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ProcessPoolExecutor(max_workers=constant.SCHEMA_VALIDATION_WORKERS or os.cpu_count())
+                atexit.register(cls.close_pool)
+            return cls._pool
+
+    @classmethod
+    def close_pool(cls):
+        """Shut down the process pool; the next parallel validation starts a new one"""
+        with cls._pool_lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def validate_parallel(self, sample, chunk_size=None):
+        """Validate every item, sharding the item array across the process pool"""
+        chunk_size = chunk_size or constant.SCHEMA_VALIDATION_CHUNK_SIZE
+        envelope, items = self.split(sample)
+        errors = list(self.envelope_validator.iter_errors(envelope))
+
+        futures = [
+            self.pool().submit(_validate_chunk, self.item_schema_digest, self.item_schema, start,
+                               items[start:start + chunk_size])
+            for start in range(0, len(items), chunk_size)
+        ]
+        for future in futures:
+            for index, path, schema_path, message in future.result():
+                error = ValidationError(message, path=path, schema_path=schema_path)
+                errors.append(self.prefix_error(error, index))
+        return errors, ValidationReport('parallel', len(items), len(items), len(errors))
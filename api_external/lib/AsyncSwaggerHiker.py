@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import constant
+from api_path import *
+from api_external.lib.AsyncHttpRequestInit import AsyncHttpRequestInit
+
+
+class AsyncSwaggerHiker(object):
+    """asyncio counterpart of SwaggerHiker"""
+
+    def __init__(self):
+        self.backend_host = constant.BACKEND_HOST
+        self.http_session = AsyncHttpRequestInit(self.backend_host, route=True)
+
+    async def swagger_get_auth(self, token_type, token_action='access', credential=None):
+        if token_type == TokenType.USER_TOKEN:
+            credential = credential or {
+                'user_name': constant.TEST_USER_NAME_ACCOUNT,
+                'password': constant.TEST_USER_ACCOUNT
+            }
+            await self.http_session.user_auth_header(token_type, credential, token_action)
+        else:
+            if credential is None:
+                raise ValueError('Machine token endpoints need a machine credential, see Machine.machine_credential')
+            await self.http_session.machine_auth_header(credential, token_action)
+
+    async def swagger_search(self, path, method, header=None, **kwargs):
+        if header:
+            self.http_session.add_headers(header)
+
+        if "data" in kwargs:
+            kwargs["data"] = json.dumps(kwargs["data"])
+
+        resp = await self.http_session.request(
+            method, path, **kwargs
+        )
+        return resp
@@ -1,6 +1,7 @@
 import random
 import string
 from api_external.lib.SwaggerHiker import SwaggerHiker
+from api_external.lib.AsyncSwaggerHiker import AsyncSwaggerHiker
 
 
 class StringUtils:
@@ -20,18 +21,41 @@ class StringUtils:
         return ''.join(random.choice(chars) for _ in range(length))
 
 
+class StatusCodeError(AssertionError):
+    """Raised by call_api_and_assert_status_code when the response has an unexpected status"""
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
 class APIUtils:
     def __init__(self):
         pass
     
     @staticmethod
-    def call_api_and_assert_status_code(path_info, method, code, header=None, **kwargs):
+    def call_api_and_assert_status_code(path_info, method, code, header=None, credential=None, **kwargs):
         connection = SwaggerHiker()
-        connection.swagger_get_auth(path_info.token_type, 'access')
+        connection.swagger_get_auth(path_info.token_type, 'access', credential)
         resp = connection.swagger_search(path_info.full_path, method.value, header, **kwargs)
-        assert resp.status_code == code.value, \
-            f"Expected status code {code.value}, got {resp.status_code} instead.\n" \
-            f"Response: {resp.json()}"
+        if resp.status_code != code.value:
+            raise StatusCodeError(f"Expected status code {code.value}, got {resp.status_code} instead.\n"
+                                  f"Response: {resp.json()}", resp.status_code)
+        
+        return resp
+
+
+class AsyncAPIUtils:
+    def __init__(self):
+        pass
+    
+    @staticmethod
+    async def call_api_and_assert_status_code(path_info, method, code, header=None, credential=None, **kwargs):
+        connection = AsyncSwaggerHiker()
+        await connection.swagger_get_auth(path_info.token_type, 'access', credential)
+        resp = await connection.swagger_search(path_info.full_path, method.value, header, **kwargs)
+        if resp.status_code != code.value:
+            raise StatusCodeError(f"Expected status code {code.value}, got {resp.status_code} instead.\n"
+                                  f"Response: {resp.json()}", resp.status_code)
         
         return resp
 
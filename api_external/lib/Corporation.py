@@ -6,7 +6,7 @@ import api_external.lib.User as User
 
 from api_path import ApiPath, ApiPathInfo, Method, ResponseCode, Country
 from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import StringUtils, APIUtils
+from api_external.lib.CommonUtils import StringUtils, APIUtils, AsyncAPIUtils
 
 
 class Corporation(APIEndpointBase):
@@ -15,6 +15,8 @@ class Corporation(APIEndpointBase):
     LIST_API_PATH = ApiPath.CORP_LIST
     DETAIL_API_PATH = ApiPath.CORP_DETAIL
     OLD_LIST_API_PATH = ApiPath.USER_LIST_BY_TYPE
+    RESOURCE_ID_FIELD = 'user_name'
+    RESOURCE_ID_ATTR = '_corp_name'
     
     def __init__(self):
         super().__init__()
@@ -101,6 +103,16 @@ class Corporation(APIEndpointBase):
             data=self.update_payload
         )
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update corporation API request through the asyncio client"""
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._corp_name),
+            Method.PUT,
+            ResponseCode.OK,
+            None,
+            data=self.update_payload
+        )
+    
     def delete(self) -> bool:
         """Delete (deactivate) a corporation through the API"""
         response = APIUtils.call_api_and_assert_status_code(
@@ -113,13 +125,9 @@ class Corporation(APIEndpointBase):
         return bool(response)
     
     @classmethod
-    def read_list(cls) -> Dict[str, Any]:
-        """Read/retrieve list of corporations from the API"""
-        return APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(cls.OLD_LIST_API_PATH, {'type': 'Headquarter'}),
-            Method.GET,
-            ResponseCode.OK,
-        )
+    def _list_path_info(cls) -> ApiPathInfo:
+        """Corporations are listed through the legacy user-by-type endpoint"""
+        return ApiPathInfo(cls.OLD_LIST_API_PATH, {'type': 'Headquarter'})
     
     @classmethod
     def generate_detail_path_info(cls, user_name: str) -> ApiPathInfo:
@@ -129,11 +137,9 @@ class Corporation(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random corporation username from the list"""
-        response = cls.read_list()
-        corporations = response.json()['data']
-        if not corporations:
+        random_corp = cls.random_item()
+        if not random_corp:
             return ""
-        random_corp = random.choice(corporations)
         return random_corp['user_name']
     
     @property
@@ -141,6 +147,7 @@ class Corporation(APIEndpointBase):
         """Get the corporation's unique identifier"""
         return self._corp_name
     
+    @classmethod
     def _prepare_get_list_parameters(cls) -> dict | list:
         return []
     
@@ -149,8 +156,12 @@ class Corporation(APIEndpointBase):
         return []
     
     @classmethod
-    def read_detail(cls, resource_id) -> Any:
-        return User.read_detail(resource_id)
+    def read_detail(cls, resource_id, projection=None) -> Any:
+        return User.read_detail(resource_id, projection)
+    
+    @classmethod
+    async def aread_detail(cls, resource_id, projection=None) -> Any:
+        return await User.aread_detail(resource_id, projection)
     
     def delete(self) -> bool:
         """Deactivate (soft delete) a user"""
@@ -161,4 +172,15 @@ class Corporation(APIEndpointBase):
             None,
             data={'status': 'inactive'}
         )
+        return bool(response)
+    
+    async def _aexecute_delete_request(self) -> bool:
+        """Deactivate (soft delete) a corporation through the asyncio client"""
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.__class__.generate_detail_path_info(self._corp_name),
+            Method.PUT,
+            ResponseCode.OK,
+            None,
+            data={'status': 'inactive'}
+        )
         return bool(response)
\ No newline at end of file
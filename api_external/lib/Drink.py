@@ -2,8 +2,9 @@ import copy
 import random
 from typing import Dict, Any, List
 from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import StringUtils, APIUtils
+from api_external.lib.CommonUtils import StringUtils, APIUtils, AsyncAPIUtils
 from api_external.lib.Flavor import Flavor
+from api_external.lib.ReferenceData import ReferenceData
 from api_path import *
 
 
@@ -21,29 +22,23 @@ class Drink(APIEndpointBase):
     """Handles drink-related API operations"""
     
     LIST_API_PATH = ApiPath.DRINK_LIST
+    LIST_ITEMS_KEY = 'drinks'
+    LIST_PAGINATED = True
+    RESOURCE_ID_FIELD = 'sku'
+    RESOURCE_ID_ATTR = '_drink_sku'
     DETAIL_API_PATH = ApiPath.DRINK_DETAIL
     
     def __init__(self):
         super().__init__()
         self._drink_sku: str = ''
     
-    def _get_drink_category(self) -> List[str]:
-        """Get available drink category IDs"""
-        response = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(ApiPath.DRINK_CATEGORY),
-            Method.GET,
-            ResponseCode.OK
-        )
-        return response
-    
     def _get_drink_category_ids(self) -> List[str]:
         """Get available drink category IDs"""
-        response = self._get_drink_category()
-        return [category['_id'] for category in response.json()['data']]
+        return [category['_id'] for category in ReferenceData.drink_categories()]
     
     def _gen_drink_formula(self):
         # Get random flavors and calculate volumes
-        flavors = random.choices(Flavor.read_list().json()['data']['flavors'], k=3)
+        flavors = random.choices(Flavor.catalog(), k=3)
         default_volume = 0
         ratios = []
         for flavor in flavors:
@@ -152,6 +147,15 @@ class Drink(APIEndpointBase):
             data=self.update_payload
         )
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update drink API request through the asyncio client"""
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._drink_sku),
+            Method.PUT,
+            ResponseCode.OK,
+            data=self.update_payload
+        )
+    
     def delete(self) -> bool:
         """Delete a drink through the API"""
         path_info = ApiPathInfo(ApiPath.DRINK_DELETE, {'sku': self._drink_sku})
@@ -162,30 +166,26 @@ class Drink(APIEndpointBase):
         )
         return bool(response)
     
+    async def _aexecute_delete_request(self) -> bool:
+        """Delete a drink through the asyncio client"""
+        path_info = ApiPathInfo(ApiPath.DRINK_DELETE, {'sku': self._drink_sku})
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            path_info,
+            Method.DELETE,
+            ResponseCode.OK
+        )
+        return bool(response)
+    
     @classmethod
     def _prepare_get_list_parameters(cls) -> List[tuple]:
         """Prepare parameters for listing drinks"""
-        total = cls._get_item_amount()
         params = cls._prepare_get_detail_parameters()
         
         params.extend([
-            ('amount', total),
             ('status', 'active')
         ])
         return params
     
-    @classmethod
-    def _get_item_amount(cls) -> int:
-        """Get total number of drinks"""
-        response = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(cls.LIST_API_PATH),
-            Method.GET,
-            ResponseCode.OK,
-            None,
-            params={'amount': 1}
-        )
-        return response.json()['data']['total']
-    
     @classmethod
     def generate_detail_path_info(cls, sku: str) -> ApiPathInfo:
         """Generate the detail endpoint path with SKU"""
@@ -194,11 +194,9 @@ class Drink(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random drink SKU from the list"""
-        response = cls.read_list()
-        drinks = response.json()['data']['drinks']
-        if not drinks:
+        random_drink = cls.random_item()
+        if not random_drink:
             return None
-        random_drink = random.choice(drinks)
         return random_drink['sku']
     
     @property
@@ -206,14 +204,8 @@ class Drink(APIEndpointBase):
         """Get the drink's unique identifier"""
         return self._drink_sku
     
-    def create(self) -> Any:
-        resp = super().create()
-        if resp:
-            self.info_data['drink_category'] = {'_id': self.info_data.pop('drink_category_id')}
-        return resp
-    
-    def update(self) -> Any:
-        resp = super().update()
-        if resp:
-            self.info_data['drink_category'] = {'_id': self.info_data.pop('drink_category_id')}
-        return resp
\ No newline at end of file
+    def _after_create(self, resp) -> None:
+        self.info_data['drink_category'] = {'_id': self.info_data.pop('drink_category_id')}
+    
+    def _after_update(self, resp) -> None:
+        self.info_data['drink_category'] = {'_id': self.info_data.pop('drink_category_id')}
\ No newline at end of file
@@ -0,0 +1,167 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import constant
+from api_path import ApiPath, ApiPathInfo, Method, ResponseCode
+from api_external.lib.JSONSchemaLibrary import SchemaCache
+from api_external.lib.SchemaFaker import SchemaFaker
+
+
+# Method of every device endpoint the simulator drives
+DRINKBOT_METHODS = {
+    ApiPath.DRINKBOT_ONLINE: Method.POST,
+    ApiPath.DRINKBOT_STATUS: Method.PATCH,
+    ApiPath.DRINKBOT_CONSUMPTION_LOGS: Method.POST,
+    ApiPath.DRINKBOT_CLEANING_LOGS: Method.POST,
+    ApiPath.DRINKBOT_TUBE_EVENTS: Method.POST,
+    ApiPath.DRINKBOT_PROFILE: Method.GET,
+}
+
+# Relative call frequency: mostly dispense logs and status reports, occasional profile reloads
+DEFAULT_MIX = {
+    ApiPath.DRINKBOT_ONLINE: 1,
+    ApiPath.DRINKBOT_STATUS: 3,
+    ApiPath.DRINKBOT_CONSUMPTION_LOGS: 4,
+    ApiPath.DRINKBOT_CLEANING_LOGS: 1,
+    ApiPath.DRINKBOT_TUBE_EVENTS: 1,
+    ApiPath.DRINKBOT_PROFILE: 2,
+}
+
+
+@dataclass
+class EndpointStats:
+    """Calls made to one endpoint during a simulation.
+
+    Attributes:
+        latencies: Seconds each call took, failed calls included
+        errors: Number of calls that raised or did not return 200
+        last_error: Message of the most recent failure
+    """
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    last_error: str = ''
+
+    @staticmethod
+    def percentile(sorted_values, fraction) -> float:
+        """Nearest-rank percentile of an already sorted list"""
+        if not sorted_values:
+            return 0.0
+        rank = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+        return sorted_values[rank]
+
+    def summary(self, elapsed) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'rate': count / elapsed if elapsed else 0.0,
+            'error_rate': self.errors / count if count else 0.0,
+            'p50_ms': self.percentile(latencies, 0.50) * 1000,
+            'p90_ms': self.percentile(latencies, 0.90) * 1000,
+            'p99_ms': self.percentile(latencies, 0.99) * 1000,
+        }
+
+
+class VirtualDrinkBot:
+    """One simulated DrinkBot: a provisioned Machine calling the device API on its own heartbeat.
+
+    The heartbeat is jittered per machine and the first call is offset by a random fraction
+    of it, so a fleet started at once does not report in lockstep. Request bodies are
+    generated from the swagger request schema of each endpoint.
+    """
+
+    def __init__(self, machine, heartbeat, mix, seed=None):
+        self.machine = machine
+        self.rng = random.Random(seed)
+        self.heartbeat = heartbeat * self.rng.uniform(0.8, 1.2)
+        self.endpoints = list(mix)
+        self.weights = [mix[api_path] for api_path in self.endpoints]
+        self.faker = SchemaFaker(seed=self.rng.random())
+
+    def payload(self, api_path: ApiPath) -> Optional[dict]:
+        method = DRINKBOT_METHODS[api_path].value.lower()
+        return self.faker.sample(SchemaCache.request_schema(api_path.value.path, method))
+
+    async def call(self, api_path: ApiPath, stats: EndpointStats):
+        kwargs = {}
+        body = self.payload(api_path)
+        if body is not None:
+            kwargs['data'] = body
+        start = time.perf_counter()
+        try:
+            await self.machine.acall_api(ApiPathInfo(api_path), DRINKBOT_METHODS[api_path], ResponseCode.OK, **kwargs)
+        except Exception as error:
+            stats.errors += 1
+            stats.last_error = f'{type(error).__name__}: {error}'.splitlines()[0]
+        finally:
+            stats.latencies.append(time.perf_counter() - start)
+
+    async def run(self, deadline, stats: Dict[ApiPath, EndpointStats], semaphore: asyncio.Semaphore):
+        """Call a randomly chosen endpoint once per heartbeat until the loop clock passes `deadline`"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.rng.uniform(0, self.heartbeat)
+        while next_tick < deadline:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            api_path = self.rng.choices(self.endpoints, self.weights)[0]
+            async with semaphore:
+                await self.call(api_path, stats[api_path])
+            # A call slower than the heartbeat delays the next one rather than overlapping it
+            next_tick = max(next_tick + self.heartbeat, loop.time())
+
+
+class DrinkBotSimulator:
+    """Drives a fleet of provisioned machines through a mix of /drinkbot device endpoints.
+
+    Every machine logs in once before the clock starts (see Machine.get_machine_token),
+    then all of them run on one event loop for `duration` seconds with at most
+    `concurrency` requests in flight. `run` returns, per endpoint, the achieved request
+    rate, error rate and p50/p90/p99 latency.
+    """
+
+    def __init__(self, machines, duration=60, mix=None, heartbeat=None, concurrency=None, seed=None):
+        self.duration = duration
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.concurrency = concurrency or constant.DRINKBOT_CONCURRENCY
+        rng = random.Random(seed)
+        heartbeat = heartbeat or constant.DRINKBOT_HEARTBEAT
+        self.bots = [VirtualDrinkBot(machine, heartbeat, self.mix, rng.random()) for machine in machines]
+        self.stats: Dict[ApiPath, EndpointStats] = {}
+        self.elapsed = 0.0
+
+    async def _login(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def login(bot):
+            async with semaphore:
+                await asyncio.to_thread(bot.machine.get_machine_token)
+
+        await asyncio.gather(*(login(bot) for bot in self.bots))
+
+    async def run(self) -> Dict[str, Dict[str, float]]:
+        """Run the simulation and return the report, keyed by endpoint path"""
+        start = time.perf_counter()
+        await self._login()
+        print(f'Logged in {len(self.bots)} machines in {time.perf_counter() - start:.2f}s')
+
+        self.stats = {api_path: EndpointStats() for api_path in self.mix}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        deadline = asyncio.get_running_loop().time() + self.duration
+        start = time.perf_counter()
+        await asyncio.gather(*(bot.run(deadline, self.stats, semaphore) for bot in self.bots))
+        self.elapsed = time.perf_counter() - start
+        return self.report()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {api_path.value.path: stats.summary(self.elapsed) for api_path, stats in self.stats.items()}
+
+    def print_report(self):
+        print(f'{"endpoint":<28}{"requests":>9}{"req/s":>9}{"errors":>8}{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}')
+        for path, summary in self.report().items():
+            print(f'{path:<28}{summary["requests"]:>9}{summary["rate"]:>9.1f}{summary["error_rate"]:>8.1%}'
+                  f'{summary["p50_ms"]:>9.1f}{summary["p90_ms"]:>9.1f}{summary["p99_ms"]:>9.1f}')
+        for api_path, stats in self.stats.items():
+            if stats.last_error:
+                print(f'{api_path.value.path}: last error {stats.last_error}')
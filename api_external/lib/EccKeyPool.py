@@ -0,0 +1,94 @@
+import queue
+import threading
+from dataclasses import dataclass
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import constant
+
+
+@dataclass
+class EccKeyPair:
+    """SECP256K1 key pair of a machine.
+
+    Attributes:
+        public_pem: SubjectPublicKeyInfo PEM sent to /machine/register
+        private_pem: TraditionalOpenSSL PEM of the private key
+        private_key: Loaded private key, ready to sign without parsing the PEM again
+    """
+    public_pem: str
+    private_pem: bytes
+    private_key: ec.EllipticCurvePrivateKey
+
+
+class EccKeyPool:
+    """Process-wide supply of pre-generated machine key pairs.
+
+    A daemon thread keeps up to `size` key pairs ready in a queue, so `take` normally
+    returns at once; when the pool has run dry the pair is generated inline instead.
+    `pooled` and `inline` count how many pairs were served each way.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, size=constant.ECC_KEY_POOL_SIZE):
+        self.size = int(size)
+        self.pooled = 0
+        self.inline = 0
+        self._keys = queue.Queue(maxsize=max(self.size, 1))
+        self._lock = threading.Lock()
+        self._filler = None
+
+    @classmethod
+    def instance(cls) -> 'EccKeyPool':
+        """Return the process-wide key pool"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def generate() -> EccKeyPair:
+        """Generate and PEM-encode a SECP256K1 key pair"""
+        private_key = ec.generate_private_key(
+            curve=ec.SECP256K1(),
+            backend=default_backend()
+        )
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return EccKeyPair(public_pem.decode('utf-8'), private_pem, private_key)
+
+    def _fill(self):
+        while True:
+            # Blocks while the pool is full
+            self._keys.put(self.generate())
+
+    def start(self):
+        """Start the background generator, if the pool is enabled and it is not running yet"""
+        if self.size <= 0 or self._filler is not None:
+            return
+        with self._lock:
+            if self._filler is None:
+                self._filler = threading.Thread(target=self._fill, name='ecc-key-pool', daemon=True)
+                self._filler.start()
+
+    def take(self) -> EccKeyPair:
+        """Return an unused key pair, from the pool when one is ready"""
+        self.start()
+        try:
+            key_pair = self._keys.get_nowait()
+            self.pooled += 1
+            return key_pair
+        except queue.Empty:
+            self.inline += 1
+            return self.generate()
@@ -0,0 +1,354 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from collections.abc import Mapping, Sequence
+from numbers import Number
+from typing import Dict, List
+
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import ValidationError
+
+import constant
+
+
+class UnsupportedSchema(ValueError):
+    """Raised for a schema FastValidatorCompiler cannot compile; jsonschema validates it instead"""
+
+
+def _unbool(value):
+    # JSON Schema equality keeps true/false apart from 1/0
+    if value is True:
+        return 'true', True
+    if value is False:
+        return 'false', False
+    return value
+
+
+def _equal(one, two):
+    """Equality with JSON Schema semantics, as used by `enum` and `const`"""
+    if one is two:
+        return True
+    if isinstance(one, str) or isinstance(two, str):
+        return one == two
+    if isinstance(one, Sequence) and isinstance(two, Sequence):
+        return len(one) == len(two) and all(_equal(i, j) for i, j in zip(one, two))
+    if isinstance(one, Mapping) and isinstance(two, Mapping):
+        return len(one) == len(two) and all(k in two and _equal(v, two[k]) for k, v in one.items())
+    return _unbool(one) == _unbool(two)
+
+
+def _is_number(value):
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _is_integer(value):
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+class FastValidatorCompiler:
+    """Generates a Python module that validates instances of one schema, in the style of fastjsonschema.
+
+    The generated code evaluates keywords in the same order and with the same semantics as
+    jsonschema's Draft202012Validator and reports (path, schema_path, message) triples that
+    match its errors. Schemas using a validation keyword outside SUPPORTED raise
+    UnsupportedSchema so the caller can fall back to jsonschema.
+    """
+    VERSION = 1
+    SUPPORTED = {
+        'type', 'properties', 'required', 'items', 'enum', 'const', 'additionalProperties',
+        'allOf', 'anyOf', 'oneOf', 'not', '$ref', '$defs', 'pattern', 'minLength', 'maxLength',
+        'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'minItems', 'maxItems',
+    }
+    UNSUPPORTED = {
+        'patternProperties', 'prefixItems', 'contains', 'minContains', 'maxContains', 'uniqueItems',
+        'dependentRequired', 'dependentSchemas', 'propertyNames', 'if', 'then', 'else',
+        'unevaluatedItems', 'unevaluatedProperties', 'multipleOf', 'minProperties', 'maxProperties',
+        '$dynamicRef', '$recursiveRef', 'dependencies',
+    }
+    TYPE_CHECKS = {
+        'string': 'isinstance({0}, str)',
+        'object': 'isinstance({0}, dict)',
+        'array': 'isinstance({0}, list)',
+        'boolean': 'isinstance({0}, bool)',
+        'null': '{0} is None',
+        'number': '_is_number({0})',
+        'integer': '_is_integer({0})',
+    }
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.constants: Dict[str, str] = {}
+        self.functions: List[List[str]] = []
+        self.def_functions: Dict[str, str] = {}
+        self.counter = 0
+
+    def _name(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def _const(self, source):
+        """Declare a module-level constant from its source expression and return its name"""
+        name = self._name('C')
+        self.constants[name] = source
+        return name
+
+    @staticmethod
+    def _path(parts):
+        return f"path + ({', '.join(parts)},)" if parts else 'path'
+
+    @staticmethod
+    def _spath(parts):
+        return f'spath + {tuple(parts)!r}' if parts else 'spath'
+
+    def _error(self, lines, indent, path, spath, message):
+        lines.append(f"{indent}errors.append(({self._path(path)}, {self._spath(spath)}, {message}))")
+
+    def _function(self, schema) -> str:
+        """Compile `schema` into a `(x, path, spath) -> errors` function and return its name"""
+        name = self._name('_f')
+        lines = [f'def {name}(x, path, spath):', '    errors = []']
+        self.functions.append(lines)
+        self._emit(schema, 'x', [], [], lines, '    ')
+        lines.append('    return errors')
+        return name
+
+    def _def_function(self, ref) -> str:
+        if ref in self.def_functions:
+            return self.def_functions[ref]
+        if ref == '#':
+            target = self.schema
+        elif ref.startswith('#/$defs/'):
+            target = self.schema.get('$defs', {})[ref[len('#/$defs/'):]]
+        else:
+            raise UnsupportedSchema(f'Unsupported $ref: {ref}')
+        # Reserve the name first so recursive refs call the function being generated
+        name = self.def_functions[ref] = f'_f{self.counter + 1}'
+        assert self._function(target) == name
+        return name
+
+    def _descend(self, schema, var, path, spath, path_part, spath_part, lines, indent):
+        # Like jsonschema's descend(), a False subschema reports its error without this step's parts
+        if schema is False:
+            path_part, spath_part = [], []
+        self._emit(schema, var, path + path_part, spath + spath_part, lines, indent)
+
+    def _emit(self, schema, var, path, spath, lines, indent):
+        if schema is True:
+            return
+        if schema is False:
+            self._error(lines, indent, path, spath, f"'False schema does not allow ' + repr({var})")
+            return
+        unsupported = self.UNSUPPORTED & set(schema)
+        if unsupported:
+            raise UnsupportedSchema(f'Unsupported keywords: {sorted(unsupported)}')
+
+        for keyword, value in schema.items():
+            if keyword == 'type':
+                types = [value] if isinstance(value, str) else list(value)
+                condition = ' or '.join(self.TYPE_CHECKS[t].format(var) for t in types)
+                reprs = ', '.join(repr(t) for t in types)
+                lines.append(f'{indent}if not ({condition}):')
+                self._error(lines, indent + '    ', path, spath + ['type'], f"repr({var}) + {' is not of type ' + reprs!r}")
+            elif keyword == 'properties':
+                lines.append(f'{indent}if isinstance({var}, dict):')
+                body = indent + '    '
+                lines.append(f'{body}pass')
+                for prop, subschema in value.items():
+                    child = self._name('v')
+                    lines.append(f'{body}if {prop!r} in {var}:')
+                    lines.append(f'{body}    {child} = {var}[{prop!r}]')
+                    self._descend(subschema, child, path, spath + ['properties'], [repr(prop)], [prop],
+                                  lines, body + '    ')
+            elif keyword == 'required':
+                lines.append(f'{indent}if isinstance({var}, dict):')
+                lines.append(f'{indent}    pass')
+                for prop in value:
+                    lines.append(f'{indent}    if {prop!r} not in {var}:')
+                    self._error(lines, indent + '        ', path, spath + ['required'],
+                                repr(f'{prop!r} is a required property'))
+            elif keyword == 'items':
+                if not isinstance(value, (dict, bool)):
+                    raise UnsupportedSchema('Array form of items')
+                if value is True:
+                    continue
+                index, child = self._name('i'), self._name('v')
+                lines.append(f'{indent}if isinstance({var}, list):')
+                if value is False:
+                    lines.append(f'{indent}    if {var}:')
+                    extra = f"({var}[0] if len({var}) == 1 else {var})"
+                    message = (f"'Expected at most 0 items but found ' + str(len({var})) + "
+                               f"' extra: ' + repr({extra})")
+                    self._error(lines, indent + '        ', path, spath + ['items'], message)
+                else:
+                    lines.append(f'{indent}    for {index}, {child} in enumerate({var}):')
+                    lines.append(f'{indent}        pass')
+                    self._descend(value, child, path, spath + ['items'], [index], [], lines, indent + '        ')
+            elif keyword == 'enum':
+                enum = self._const(repr(value))
+                lines.append(f'{indent}if not any(_equal(e, {var}) for e in {enum}):')
+                self._error(lines, indent + '    ', path, spath + ['enum'],
+                            f"repr({var}) + ' is not one of ' + repr({enum})")
+            elif keyword == 'const':
+                const = self._const(repr(value))
+                lines.append(f'{indent}if not _equal({var}, {const}):')
+                self._error(lines, indent + '    ', path, spath + ['const'], repr(f'{value!r} was expected'))
+            elif keyword == 'additionalProperties':
+                if value is True:
+                    continue
+                known = self._const(repr(frozenset(schema.get('properties', {}))))
+                lines.append(f'{indent}if isinstance({var}, dict):')
+                if value is False:
+                    extras = self._name('extras')
+                    lines.append(f'{indent}    {extras} = sorted((k for k in {var} if k not in {known}), key=str)')
+                    lines.append(f'{indent}    if {extras}:')
+                    message = (f"'Additional properties are not allowed (' + ', '.join(repr(k) for k in {extras}) + "
+                               f"(' was' if len({extras}) == 1 else ' were') + ' unexpected)'")
+                    self._error(lines, indent + '        ', path, spath + ['additionalProperties'], message)
+                else:
+                    key, child = self._name('k'), self._name('v')
+                    lines.append(f'{indent}    for {key}, {child} in {var}.items():')
+                    lines.append(f'{indent}        if {key} in {known}:')
+                    lines.append(f'{indent}            continue')
+                    self._descend(value, child, path, spath + ['additionalProperties'], [key], [],
+                                  lines, indent + '        ')
+            elif keyword == 'allOf':
+                for index, subschema in enumerate(value):
+                    self._descend(subschema, var, path, spath + ['allOf'], [], [index], lines, indent)
+            elif keyword in ('anyOf', 'oneOf'):
+                subs = [self._function(subschema) for subschema in value]
+                valid = self._name('valid')
+                calls = ', '.join(
+                    f"not {sub}({var}, {self._path(path)}, {self._spath(spath + [keyword, i])})"
+                    for i, sub in enumerate(subs)
+                )
+                lines.append(f'{indent}{valid} = [{calls}]')
+                lines.append(f'{indent}if not any({valid}):')
+                self._error(lines, indent + '    ', path, spath + [keyword],
+                            f"repr({var}) + ' is not valid under any of the given schemas'")
+                if keyword == 'oneOf':
+                    schemas = self._const(repr(value))
+                    lines.append(f'{indent}elif sum({valid}) > 1:')
+                    lines.append(f'{indent}    first = {valid}.index(True)')
+                    lines.append(f'{indent}    more = [s for i, s in enumerate({schemas}) if {valid}[i] and i > first]')
+                    message = (f"repr({var}) + ' is valid under each of ' + "
+                               f"', '.join(repr(s) for s in more + [{schemas}[first]])")
+                    self._error(lines, indent + '    ', path, spath + ['oneOf'], message)
+            elif keyword == 'not':
+                sub = self._function(value)
+                lines.append(f'{indent}if not {sub}({var}, {self._path(path)}, {self._spath(spath + ["not"])}):')
+                self._error(lines, indent + '    ', path, spath + ['not'],
+                            f"repr({var}) + ' should not be valid under ' + {repr(repr(value))}")
+            elif keyword == '$ref':
+                sub = self._def_function(value)
+                # jsonschema does not record '$ref' in schema paths
+                lines.append(f'{indent}errors.extend({sub}({var}, {self._path(path)}, {self._spath(spath)}))')
+            elif keyword == 'pattern':
+                regex = self._const(f're.compile({value!r})')
+                lines.append(f'{indent}if isinstance({var}, str) and not {regex}.search({var}):')
+                self._error(lines, indent + '    ', path, spath + ['pattern'],
+                            f"repr({var}) + {' does not match ' + repr(value)!r}")
+            elif keyword in ('minLength', 'minItems'):
+                check = 'isinstance({0}, str)' if keyword == 'minLength' else 'isinstance({0}, list)'
+                message = 'should be non-empty' if value == 1 else 'is too short'
+                lines.append(f'{indent}if {check.format(var)} and len({var}) < {value!r}:')
+                self._error(lines, indent + '    ', path, spath + [keyword], f"repr({var}) + {' ' + message!r}")
+            elif keyword in ('maxLength', 'maxItems'):
+                check = 'isinstance({0}, str)' if keyword == 'maxLength' else 'isinstance({0}, list)'
+                message = 'is expected to be empty' if value == 0 else 'is too long'
+                lines.append(f'{indent}if {check.format(var)} and len({var}) > {value!r}:')
+                self._error(lines, indent + '    ', path, spath + [keyword], f"repr({var}) + {' ' + message!r}")
+            elif keyword in ('minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum'):
+                operator, message = {
+                    'minimum': ('<', f' is less than the minimum of {value!r}'),
+                    'maximum': ('>', f' is greater than the maximum of {value!r}'),
+                    'exclusiveMinimum': ('<=', f' is less than or equal to the minimum of {value!r}'),
+                    'exclusiveMaximum': ('>=', f' is greater than or equal to the maximum of {value!r}'),
+                }[keyword]
+                lines.append(f'{indent}if _is_number({var}) and {var} {operator} {value!r}:')
+                self._error(lines, indent + '    ', path, spath + [keyword], f"repr({var}) + {message!r}")
+
+    def compile_source(self) -> str:
+        """Return the source of a module whose `validate(instance)` returns a list of error triples"""
+        entry = self._function(self.schema)
+        header = [
+            f'# Generated by FastValidatorCompiler v{self.VERSION}; do not edit.',
+            'import re',
+            'from api_external.lib.FastValidator import _equal, _is_number, _is_integer',
+            '',
+        ]
+        header += [f'{name} = {source}' for name, source in self.constants.items()]
+        header.append('')
+        body = ['\n'.join(lines) for lines in self.functions]
+        footer = [
+            '',
+            'def validate(instance):',
+            f'    return {entry}(instance, (), ())',
+        ]
+        return '\n'.join(header + body + footer) + '\n'
+
+
+class FastValidator:
+    """Validator backed by code generated from its schema, cached on disk by schema hash.
+
+    Exposes `iter_errors` and `is_valid` like a jsonschema validator, so JSONSchemaLibrary
+    can use either backend interchangeably.
+    """
+    _modules = {}
+    _lock = threading.Lock()
+
+    def __init__(self, schema):
+        digest = self.schema_digest(schema)
+        with self._lock:
+            module = self._modules.get(digest)
+            if module is None:
+                module = self._modules[digest] = self._load_module(schema, digest)
+        self._module = module
+        self._validate = module.validate
+
+    @staticmethod
+    def schema_digest(schema) -> str:
+        canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'), default=repr)
+        return hashlib.sha256(f'{FastValidatorCompiler.VERSION}:{canonical}'.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def _load_module(schema, digest):
+        cache_dir = constant.SCHEMA_CODEGEN_CACHE_DIR
+        module_path = os.path.join(cache_dir, f'fastval_{digest}.py')
+        if not os.path.isfile(module_path):
+            source = FastValidatorCompiler(schema).compile_source()
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f'{module_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as module_file:
+                module_file.write(source)
+            os.replace(tmp_path, module_path)
+        spec = importlib.util.spec_from_file_location(f'fastval_{digest}', module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    @classmethod
+    def for_schema(cls, schema, backend=None):
+        """Return a validator for `schema` from the configured backend (SCHEMA_VALIDATOR_BACKEND)
+
+        The codegen backend falls back to jsonschema for schemas it cannot compile.
+        """
+        backend = backend or constant.SCHEMA_VALIDATOR_BACKEND
+        if backend == 'codegen':
+            try:
+                return cls(schema)
+            except UnsupportedSchema:
+                pass
+        elif backend != 'jsonschema':
+            raise ValueError(f'Unknown schema validator backend: {backend}')
+        return Draft202012Validator(schema)
+
+    def iter_errors(self, instance):
+        for path, schema_path, message in self._validate(instance):
+            yield ValidationError(message, path=path, schema_path=schema_path)
+
+    def is_valid(self, instance) -> bool:
+        return not self._validate(instance)
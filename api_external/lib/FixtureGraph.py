@@ -0,0 +1,184 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import constant
+from api_external.lib.Corporation import Corporation
+from api_external.lib.Drink import Drink
+from api_external.lib.Flavor import Flavor
+from api_external.lib.Location import Location
+from api_external.lib.Machine import Machine
+from api_external.lib.Menu import Menu
+from api_external.lib.ResourcePool import ResourcePool
+from api_external.lib.TeardownQueue import TeardownQueue
+from api_external.lib.User import User
+
+
+@dataclass(frozen=True)
+class ResourceSpec:
+    """How to build one test resource.
+
+    Attributes:
+        cls: APIEndpointBase subclass to create
+        depends_on: Names of resources this one uses when they are built alongside it
+        prepare: Called as prepare(obj, deps) before `create()` when every dependency is built alongside
+        deleted_after: Names of resources a test may attach to this one; when built alongside,
+            they are deleted before it even though it does not need them to be created
+    """
+    cls: type
+    depends_on: Tuple[str, ...] = ()
+    prepare: Optional[Callable[[Any, Dict[str, Any]], None]] = None
+    deleted_after: Tuple[str, ...] = ()
+
+
+def _own_location_by_corporation(location, deps):
+    location.set_user_name(deps['corporation'].resource_id)
+
+
+# Resources by fixture name. Dependencies are soft: a location is owned by the corporation
+# only when a test asks for both, otherwise it keeps the default TEST_HQ_USER_NAME owner.
+# Tests assign menus to machines and install machines to locations, so teardown removes
+# the menu, then the machine, then the location, then the corporation.
+RESOURCE_SPECS: Dict[str, ResourceSpec] = {
+    'corporation': ResourceSpec(Corporation, deleted_after=('location',)),
+    'location': ResourceSpec(Location, ('corporation',), _own_location_by_corporation, deleted_after=('machine',)),
+    'machine': ResourceSpec(Machine, deleted_after=('menu',)),
+    'menu': ResourceSpec(Menu),
+    'user': ResourceSpec(User),
+    'flavor': ResourceSpec(Flavor),
+    'drink': ResourceSpec(Drink),
+}
+
+
+class FixtureGraph:
+    """Creates the resources a test needs concurrently, in dependency order, and tears them down in reverse.
+
+    A resource is created as soon as every dependency it has among the requested ones
+    exists, so independent resources are built side by side and the set-up takes as long
+    as the longest dependency chain. Teardown deletes a resource once everything that
+    depends on it, or is declared in its `deleted_after`, is gone, again in parallel. If a create fails, the resources already
+    built are torn down before the error is raised.
+
+    With `pooled`, resources that need no preparation are leased from the worker's
+    ResourcePool and released back to it instead of being created and deleted. With
+    `deferred`, teardown hands the deletes to the TeardownQueue in the same order and
+    returns at once; their failures are reported when the session finishes.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, ResourceSpec]] = None, concurrency=None, pooled=None,
+                 deferred=None):
+        self.specs = specs or RESOURCE_SPECS
+        self.concurrency = concurrency or constant.FIXTURE_CONCURRENCY
+        self.pooled = constant.RESOURCE_POOL_SIZE > 0 if pooled is None else pooled
+        self.deferred = constant.TEARDOWN_DEFERRED if deferred is None else deferred
+        self.resources: Dict[str, Any] = {}
+        self._names: List[str] = []
+        self._leased: Dict[str, ResourcePool] = {}
+
+    def __getitem__(self, name):
+        return self.resources[name]
+
+    def _dependencies(self, name) -> List[str]:
+        return [dep for dep in self.specs[name].depends_on if dep in self._names]
+
+    def _deleted_first(self, name, built) -> List[str]:
+        """Built resources that have to be deleted before `name`"""
+        return [other for other in built
+                if name in self._dependencies(other) or other in self.specs[name].deleted_after]
+
+    def _create(self, name):
+        spec = self.specs[name]
+        deps = {dep: self.resources[dep] for dep in self._dependencies(name)}
+        prepared = spec.prepare is not None and len(deps) == len(spec.depends_on)
+        if self.pooled and not prepared:
+            pool = ResourcePool.for_class(spec.cls)
+            obj = pool.lease()
+            self._leased[name] = pool
+            return obj
+        obj = spec.cls()
+        if prepared:
+            spec.prepare(obj, deps)
+        if not obj.create():
+            raise RuntimeError(f'Creating the {name} fixture returned nothing')
+        return obj
+
+    def _run(self, names, blockers, action, unblock_on_failure=False) -> Dict[str, BaseException]:
+        """
+        Run `action(name)` for every name once its blockers are done; return the failures by name.
+        A failed name keeps blocking the names waiting on it unless `unblock_on_failure` is set.
+        """
+        pending = {name: set(blockers[name]) for name in names}
+        failures, running = {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as executor:
+            while pending or running:
+                for name in [name for name, waiting in pending.items() if not waiting]:
+                    del pending[name]
+                    running[executor.submit(action, name)] = name
+                if not running:
+                    # Only names blocked by failed ones are left
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        failures[name] = future.exception()
+                        if not unblock_on_failure:
+                            continue
+                    for waiting in pending.values():
+                        waiting.discard(name)
+        return failures
+
+    def build(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Create the named resources; returns them by name"""
+        self._names = [name for name in dict.fromkeys(names) if name in self.specs]
+        start = time.perf_counter()
+
+        def create(name):
+            self.resources[name] = self._create(name)
+
+        failures = self._run(self._names, {name: self._dependencies(name) for name in self._names}, create)
+        if failures:
+            self.teardown()
+            name, error = next(iter(failures.items()))
+            raise RuntimeError(f'Could not create the {name} fixture') from error
+        print(f'Built fixtures {", ".join(self._names)} in {time.perf_counter() - start:.2f}s')
+        return self.resources
+
+    def _dispose(self, name) -> Callable[[], Any]:
+        """Take a built resource out of the graph; returns the call that releases or deletes it"""
+        obj = self.resources.pop(name)
+        pool = self._leased.pop(name, None)
+        if pool is not None:
+            return lambda: pool.release(obj)
+        return obj.delete
+
+    def _defer_teardown(self, built, dependents):
+        teardown_queue = TeardownQueue.instance()
+        futures = {}
+        # Submit dependents before what they depend on, so every job only waits on earlier ones
+        while len(futures) < len(built):
+            for name in built:
+                if name not in futures and all(other in futures for other in dependents[name]):
+                    futures[name] = teardown_queue.submit(f'{name} fixture', self._dispose(name),
+                                                          [futures[other] for other in dependents[name]])
+
+    def teardown(self):
+        """
+        Delete every built resource after the ones depending on it; raises the first delete error.
+        Deferred teardown only queues the deletes (see TeardownQueue).
+        """
+        built = [name for name in self._names if name in self.resources]
+        dependents = {name: self._deleted_first(name, built) for name in built}
+        if self.deferred:
+            self._defer_teardown(built, dependents)
+            return
+
+        def delete(name):
+            self._dispose(name)()
+
+        # A failed delete should not keep its dependencies on the backend as well
+        failures = self._run(built, dependents, delete, unblock_on_failure=True)
+        if failures:
+            name, error = next(iter(failures.items()))
+            raise RuntimeError(f'Could not delete the {name} fixture') from error
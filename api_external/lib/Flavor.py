@@ -5,14 +5,21 @@ from typing import Dict, Any, List, Tuple, Optional
 
 from api_path import ApiPath, ApiPathInfo, Method, ResponseCode
 from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import StringUtils, APIUtils
+from api_external.lib.CommonUtils import StringUtils, APIUtils, AsyncAPIUtils
+from api_external.lib.ReferenceData import ReferenceData
 
 
 class Flavor(APIEndpointBase):
     """Handles flavor-related API operations"""
     
     LIST_API_PATH = ApiPath.FLAVOR_LIST
+    LIST_ITEMS_KEY = 'flavors'
+    LIST_PAGINATED = True
+    RESOURCE_ID_FIELD = 'full_sku'
+    RESOURCE_ID_ATTR = '_flavor_sku'
     DETAIL_API_PATH = ApiPath.FLAVOR_DETAIL
+    # Names of the flavors the tests create, before and after an update
+    TEST_NAME_PREFIXES = ('Testing-', 'TestEdit_')
     
     def __init__(self):
         super().__init__()
@@ -20,26 +27,28 @@ class Flavor(APIEndpointBase):
     
     def _get_flavor_types(self) -> List[Tuple[str, str]]:
         """Get available flavor types excluding 'FIL'"""
-        resp = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(ApiPath.FLAVOR_CLASS_TYPE),
-            Method.GET,
-            ResponseCode.OK
-        )
         flavor_types = [
             (item['key'], item['value'])
-            for item in resp.json()['data']
+            for item in ReferenceData.flavor_types()
             if item['key'] != 'FIL'
         ]
         return flavor_types
     
     def _get_flavor_vendors(self) -> List[Dict[str, str]]:
         """Get available flavor vendors"""
-        response = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(ApiPath.FLAVOR_VENDORS),
-            Method.GET,
-            ResponseCode.OK
-        )
-        return response.json()['data']
+        return ReferenceData.flavor_vendors()
+    
+    @classmethod
+    def catalog(cls) -> List[Dict[str, Any]]:
+        """
+        Every active flavor except the ones tests create, cached in ReferenceData.
+        Test flavors come and go with other workers and runs, which would leave a shared or
+        persisted catalog pointing at deleted flavors.
+        """
+        return ReferenceData.get('flavor_catalog', lambda: [
+            flavor for flavor in cls.iter_list()
+            if not str(flavor.get('name') or '').startswith(cls.TEST_NAME_PREFIXES)
+        ])
     
     def _prepare_create_payload(self) -> bool:
         """Prepare payload for creating a new flavor"""
@@ -56,7 +65,7 @@ class Flavor(APIEndpointBase):
     def _update_create_payload_with_random_data(self) -> None:
         """Update create payload with randomized data"""
         sku = StringUtils.random_string(4, 'UPPER')
-        name = f'Testing-{sku}'
+        name = f'{self.TEST_NAME_PREFIXES[0]}{sku}'
         
         type_item = random.choice(self._get_flavor_types())
         vendor_item = random.choice(self._get_flavor_vendors())
@@ -79,7 +88,7 @@ class Flavor(APIEndpointBase):
         if not self.update_payload:
             return False
         
-        self.update_payload['name'] = f"TestEdit_{self.info_data['name']}"
+        self.update_payload['name'] = f"{self.TEST_NAME_PREFIXES[1]}{self.info_data['name']}"
         return True
     
     def _set_resource_id(self, response: Dict[str, Any]) -> None:
@@ -96,11 +105,12 @@ class Flavor(APIEndpointBase):
         )
         return resp
     
-    def create(self) -> Any:
-        resp = super().create()
-        if resp:
-            self.info_data.pop('sku')
-        return resp
+    def _after_create(self, resp) -> None:
+        self.info_data.pop('sku')
+        ReferenceData.invalidate('flavor_catalog')
+    
+    def _after_update(self, resp) -> None:
+        ReferenceData.invalidate('flavor_catalog')
     
     def _execute_update_request(self) -> Dict[str, Any]:
         """Execute the update flavor API request"""
@@ -113,6 +123,17 @@ class Flavor(APIEndpointBase):
         )
         return resp
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update flavor API request through the asyncio client"""
+        path_info = self.__class__.generate_detail_path_info(self._flavor_sku)
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            path_info,
+            Method.PUT,
+            ResponseCode.OK,
+            data=self.update_payload
+        )
+        return resp
+    
     def delete(self) -> bool:
         """Delete a flavor through the API"""
         response = APIUtils.call_api_and_assert_status_code(
@@ -120,14 +141,23 @@ class Flavor(APIEndpointBase):
             Method.DELETE,
             ResponseCode.OK
         )
+        ReferenceData.invalidate('flavor_catalog')
+        return bool(response)
+    
+    async def _aexecute_delete_request(self) -> bool:
+        """Delete a flavor through the asyncio client"""
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._flavor_sku),
+            Method.DELETE,
+            ResponseCode.OK
+        )
+        ReferenceData.invalidate('flavor_catalog')
         return bool(response)
     
     @classmethod
     def _prepare_get_list_parameters(cls) -> List[tuple]:
         """Prepare parameters for listing flavors"""
-        total = cls._get_item_amount()
         return [
-            ('amount', total),
             ('status', 'active')
         ]
     
@@ -139,11 +169,9 @@ class Flavor(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random flavor SKU from the list"""
-        response = cls.read_list()
-        flavors = response.json()['data']['flavors']
-        if not flavors:
+        random_flavor = cls.random_item()
+        if not random_flavor:
             return None
-        random_flavor = random.choice(flavors)
         return random_flavor['full_sku']
     
     @property
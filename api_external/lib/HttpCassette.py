@@ -0,0 +1,361 @@
+import atexit
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import constant
+from api_path import ApiPath
+
+
+@dataclass
+class Exchange:
+    """One recorded HTTP request and the response it got.
+
+    Attributes:
+        method: Upper-case HTTP method
+        path: Normalized request path, without host or query
+        query: Sorted (name, value) query parameters
+        body: Request body, canonical JSON when it parses as JSON
+        status: Response status code
+        headers: Response headers worth replaying (content type, ETag, ...)
+        content: Response body as sent
+    """
+    method: str
+    path: str
+    query: List[Tuple[str, str]]
+    body: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b''
+
+    @property
+    def key(self) -> str:
+        return HttpCassette.exact_key(self.method, self.path, self.query, self.body)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'method': self.method, 'path': self.path, 'query': self.query, 'body': self.body,
+            'status': self.status, 'headers': self.headers,
+            'content': base64.b64encode(self.content).decode('ascii'),
+        }
+
+    @classmethod
+    def from_json(cls, data) -> 'Exchange':
+        return cls(data['method'], data['path'], [tuple(pair) for pair in data['query']], data['body'],
+                   data['status'], data['headers'], base64.b64decode(data['content']))
+
+
+class HttpCassette:
+    """Records backend exchanges to a file and serves them back without a network.
+
+    HTTP_CASSETTE_MODE=record sends every request as usual and keeps the exchange; the
+    cassette is written, gzip-compressed and with its lookup index, when the process
+    exits (one file per xdist worker). HTTP_CASSETTE_MODE=replay loads the cassette
+    (and its per-worker siblings) into memory and answers every request from it.
+
+    Replay looks a request up by method, normalized path, sorted query and a hash of
+    the canonical body first. Requests whose payload is random (StringUtils names,
+    timestamps) miss that index and are matched on their signature instead: the path
+    template from ApiPath, the query parameter names and the shape of the body. Such a
+    match teaches the cassette which recorded value stands for which live one in each
+    field; later requests are translated back to the recorded values before the lookup
+    and response fields of the same name forward to the live ones, so a resource created
+    under a fresh random name reads back under that name. Exchanges sharing a key are served in recorded order, the last one
+    repeating once they run out.
+
+    Credentials never reach the file: the REDACTED_FIELDS of request bodies and JSON
+    responses are replaced by a placeholder when recording, and of live requests before
+    they are looked up. Replayed tokens are not JWTs, so TokenManager gives them its
+    default lifetime.
+    """
+    VERSION = 1
+    # Response headers kept in the cassette
+    HEADERS = ('content-type', 'etag', 'last-modified')
+    # JSON fields, at any depth, recorded as REDACTED instead of their value
+    REDACTED_FIELDS = frozenset({'password', 'accessToken', 'refreshToken'})
+    REDACTED = '<redacted>'
+    _active: Optional['HttpCassette'] = None
+    _active_lock = threading.Lock()
+    _templates: Optional[List[Tuple[re.Pattern, str]]] = None
+
+    def __init__(self, mode, path):
+        self.mode = mode
+        self.path = path
+        self.exchanges: List[Exchange] = []
+        self._index: Dict[str, List[int]] = {}
+        self._signatures: Dict[str, List[int]] = {}
+        self._cursors: Dict[str, int] = {}
+        # (field name, type, recorded value) -> live value, learned from signature matches
+        self._aliases: Dict[Tuple[str, str, Any], Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def active(cls) -> Optional['HttpCassette']:
+        """The cassette HTTP_CASSETTE_MODE asks for, None when recording and replay are off"""
+        if not constant.HTTP_CASSETTE_MODE:
+            return None
+        if cls._active is None:
+            with cls._active_lock:
+                if cls._active is None:
+                    cassette = cls(constant.HTTP_CASSETTE_MODE, constant.HTTP_CASSETTE_PATH)
+                    if cassette.mode == 'replay':
+                        cassette.load()
+                    elif cassette.mode == 'record':
+                        atexit.register(cassette.save)
+                    else:
+                        raise ValueError(f'Unknown HTTP_CASSETTE_MODE {cassette.mode!r}, expected record or replay')
+                    cls._active = cassette
+        return cls._active
+
+    # ------------------------------------------------------------------------
+    # request normalization
+
+    @staticmethod
+    def normalize(url_or_path, params=None, data=None, json_body=None) -> Tuple[str, List[Tuple[str, str]], str]:
+        """(path, sorted query, canonical body) of a request as HttpRequestInit.request receives it"""
+        parts = urlsplit(url_or_path)
+        path = re.sub(r'/{2,}', '/', parts.path).rstrip('/') or '/'
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if isinstance(params, dict):
+            params = [(name, item) for name, value in params.items()
+                      for item in (value if isinstance(value, (list, tuple)) else [value])]
+        query += [(str(name), str(value)) for name, value in params or [] if value is not None]
+        body = data if json_body is None else json.dumps(json_body)
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        body = body or ''
+        try:
+            body = json.dumps(HttpCassette.redact(json.loads(body)), sort_keys=True, separators=(',', ':'))
+        except ValueError:
+            pass
+        return path, sorted(query), body
+
+    @classmethod
+    def redact(cls, value) -> Any:
+        """`value` with every REDACTED_FIELDS entry replaced by REDACTED"""
+        if isinstance(value, dict):
+            return {name: cls.REDACTED if name in cls.REDACTED_FIELDS else cls.redact(item)
+                    for name, item in value.items()}
+        if isinstance(value, list):
+            return [cls.redact(item) for item in value]
+        return value
+
+    @classmethod
+    def redact_content(cls, content: bytes) -> bytes:
+        """A response body with its REDACTED_FIELDS replaced, when it is JSON that has any"""
+        if not content or not any(name.encode('utf-8') in content for name in cls.REDACTED_FIELDS):
+            return content
+        try:
+            return json.dumps(cls.redact(json.loads(content))).encode('utf-8')
+        except ValueError:
+            return content
+
+    @staticmethod
+    def exact_key(method, path, query, body) -> str:
+        digest = hashlib.sha256(body.encode('utf-8')).hexdigest()[:16] if body else '-'
+        return f'{method} {path}?{urlencode(query)} {digest}'
+
+    @classmethod
+    def _path_templates(cls) -> List[Tuple[re.Pattern, str]]:
+        if cls._templates is None:
+            templates = {api_path.value.path for api_path in ApiPath}
+            # Most literal characters first, so /user/type/{type} wins over /user/{user_name}
+            ordered = sorted(templates, key=lambda template: -len(re.sub(r'\{[^}]+\}', '', template)))
+            cls._templates = [(re.compile('^' + re.sub(r'\\\{[^}]+\\\}', '[^/]+', re.escape(template)) + '$'),
+                               template) for template in ordered]
+        return cls._templates
+
+    @classmethod
+    def path_template(cls, path) -> str:
+        """The ApiPath template `path` was built from; digit-bearing segments masked otherwise"""
+        for pattern, template in cls._path_templates():
+            if pattern.match(path):
+                return template
+        return '/'.join('*' if re.search(r'\d', segment) else segment for segment in path.split('/'))
+
+    @classmethod
+    def _shape(cls, value) -> Any:
+        if isinstance(value, dict):
+            return {name: cls._shape(item) for name, item in sorted(value.items())}
+        if isinstance(value, list):
+            return [cls._shape(value[0])] if value else []
+        return type(value).__name__
+
+    @classmethod
+    def signature(cls, method, path, query, body) -> str:
+        """What a request looks like regardless of its random names, ids and timestamps"""
+        try:
+            shape = cls._shape(json.loads(body)) if body else None
+        except ValueError:
+            shape = 'text'
+        return json.dumps([method, cls.path_template(path), sorted({name for name, _ in query}), shape],
+                          sort_keys=True)
+
+    # ------------------------------------------------------------------------
+    # recording
+
+    def record(self, method, url, params, data, json_body, status, headers, content):
+        path, query, body = self.normalize(url, params, data, json_body)
+        kept = {name: value for name, value in headers.items() if name.lower() in self.HEADERS}
+        with self._lock:
+            self._add(Exchange(method.upper(), path, query, body, status, kept, self.redact_content(content or b'')))
+
+    def _add(self, exchange):
+        position = len(self.exchanges)
+        self.exchanges.append(exchange)
+        self._index.setdefault(exchange.key, []).append(position)
+        self._signatures.setdefault(
+            self.signature(exchange.method, exchange.path, exchange.query, exchange.body), []).append(position)
+
+    def _split_path(self) -> Tuple[str, str]:
+        """(path up to the first dot of the file name, the rest including the dot)"""
+        directory, name = os.path.split(self.path)
+        stem, dot, ext = name.partition('.')
+        return os.path.join(directory, stem), dot + ext
+
+    def file_path(self) -> str:
+        """Where this process records to: one cassette per xdist worker"""
+        worker = os.getenv('PYTEST_XDIST_WORKER')
+        if not worker:
+            return self.path
+        root, ext = self._split_path()
+        return f'{root}-{worker}{ext}'
+
+    def save(self):
+        """Write the recorded exchanges and their index, compressed, replacing the cassette"""
+        with self._lock:
+            document = {
+                'version': self.VERSION,
+                'exchanges': [exchange.to_json() for exchange in self.exchanges],
+                'index': self._index,
+            }
+        path = self.file_path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as cassette:
+            json.dump(document, cassette)
+        os.replace(tmp_path, path)
+        print(f'Recorded {len(self.exchanges)} HTTP exchanges to {path}')
+
+    # ------------------------------------------------------------------------
+    # replay
+
+    def load(self):
+        """Read the cassette and the cassettes recorded by xdist workers next to it"""
+        root, ext = self._split_path()
+        siblings = sorted(glob.glob(f'{glob.escape(root)}-gw*{glob.escape(ext)}'))
+        paths = [path for path in [self.path] + siblings if os.path.isfile(path)]
+        if not paths:
+            raise FileNotFoundError(f'No HTTP cassette at {self.path}; record one with HTTP_CASSETTE_MODE=record')
+        for path in paths:
+            with gzip.open(path, 'rt', encoding='utf-8') as cassette:
+                document = json.load(cassette)
+            if document.get('version') != self.VERSION:
+                raise ValueError(f'{path} is a version {document.get("version")} cassette, expected {self.VERSION}')
+            offset = len(self.exchanges)
+            self.exchanges.extend(Exchange.from_json(data) for data in document['exchanges'])
+            for key, positions in document['index'].items():
+                self._index.setdefault(key, []).extend(offset + position for position in positions)
+            for position in range(offset, len(self.exchanges)):
+                exchange = self.exchanges[position]
+                self._signatures.setdefault(
+                    self.signature(exchange.method, exchange.path, exchange.query, exchange.body), []).append(position)
+
+    def _next(self, table, key) -> Optional[Exchange]:
+        positions = table.get(key)
+        if not positions:
+            return None
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        return self.exchanges[positions[min(cursor, len(positions) - 1)]]
+
+    @staticmethod
+    def _alias_key(name, value) -> Tuple[str, str, Any]:
+        # The type keeps True and 1 apart
+        return name, type(value).__name__, value
+
+    def _translate(self, value, aliases, name='') -> Any:
+        """`value` with every field found in `aliases` under its field name replaced"""
+        if isinstance(value, dict):
+            return {key: self._translate(item, aliases, key) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._translate(item, aliases, name) for item in value]
+        if not isinstance(value, (str, int, float)):
+            return value
+        return aliases.get(self._alias_key(name, value), value)
+
+    def _learn(self, recorded, live, name=''):
+        """
+        Pair up the fields in which a signature-matched request differs from the recorded one.
+        A field that is equal again drops its pairing, so an old one does not leak into later responses.
+        """
+        if isinstance(recorded, dict) and isinstance(live, dict):
+            for key in recorded.keys() & live.keys():
+                self._learn(recorded[key], live[key], key)
+        elif isinstance(recorded, list) and isinstance(live, list) and len(recorded) == len(live):
+            for recorded_item, live_item in zip(recorded, live):
+                self._learn(recorded_item, live_item, name)
+        elif type(recorded) is type(live) and isinstance(recorded, (str, int, float)):
+            if recorded == live:
+                self._aliases.pop(self._alias_key(name, recorded), None)
+            else:
+                self._aliases[self._alias_key(name, recorded)] = live
+
+    @classmethod
+    def _path_fields(cls, path) -> Dict[str, str]:
+        """The path's variable segments by ApiPath template parameter name, e.g. {'full_code': 'L1'}"""
+        template = cls.path_template(path)
+        return {part[1:-1]: segment for part, segment in zip(template.split('/'), path.split('/'))
+                if part.startswith('{') and part.endswith('}')}
+
+    @staticmethod
+    def _json_or_text(body):
+        try:
+            return json.loads(body) if body else body
+        except ValueError:
+            return body
+
+    def replay(self, method, url, params=None, data=None, json_body=None) -> Exchange:
+        """The recorded exchange answering this request, its content translated to live values"""
+        method = method.upper()
+        path, query, body = self.normalize(url, params, data, json_body)
+        with self._lock:
+            reverse = {self._alias_key(name, live): recorded
+                       for (name, _, recorded), live in self._aliases.items()}
+            path_fields = self._path_fields(path)
+            recorded_fields = self._translate(path_fields, reverse)
+            recorded_path = path
+            for name, segment in path_fields.items():
+                recorded_path = recorded_path.replace(f'/{segment}', f'/{recorded_fields[name]}', 1)
+            recorded_query = sorted((name, str(self._translate({name: value}, reverse)[name])) for name, value in query)
+            live_body = self._json_or_text(body)
+            recorded_body = self._translate(live_body, reverse)
+            if not isinstance(recorded_body, str):
+                recorded_body = json.dumps(recorded_body, sort_keys=True, separators=(',', ':'))
+            exchange = self._next(self._index, self.exact_key(method, recorded_path, recorded_query, recorded_body))
+            if exchange is None:
+                exchange = self._next(self._signatures, self.signature(method, path, query, body))
+                if exchange is None:
+                    raise RuntimeError(f'No recorded response for {method} {path} in {self.path}')
+                self._learn(self._path_fields(exchange.path), path_fields)
+                self._learn(dict(exchange.query), dict(query))
+                self._learn(self._json_or_text(exchange.body), live_body)
+            aliases = dict(self._aliases)
+        if not aliases or not exchange.content:
+            return exchange
+        try:
+            content = json.dumps(self._translate(json.loads(exchange.content), aliases)).encode('utf-8')
+        except ValueError:
+            return exchange
+        return Exchange(exchange.method, exchange.path, exchange.query, exchange.body, exchange.status,
+                        exchange.headers, content)
@@ -1,9 +1,15 @@
+import io
 import json
 
 import requests
 import logging
 import urllib3
-from api_path import ResponseCode
+from urllib.parse import urlsplit
+import constant
+from api_path import ResponseCode, TokenType
+from api_external.lib.HttpCassette import HttpCassette
+from api_external.lib.HttpTransport import HttpTransport
+from api_external.lib.TokenManager import TokenManager
 
 
 # urllib3.disable_warnings()
@@ -11,18 +17,28 @@ from api_path import ResponseCode
 
 class HttpRequestInit:
     
-    def __init__(self, host='', basepath=''):
+    def __init__(self, host='', basepath='', route=False):
         self.HOST = host + basepath
         self.TOKEN = None
         self.REFRESH_TOKEN = None
-        self.SESSION = requests.Session()
-        self.SESSION.headers.update({
+        # The pooled session is shared by every instance talking to this host,
+        # so per-instance headers live in HEADERS and are sent with each request.
+        self.SESSION = HttpTransport.session(self._origin(self.HOST))
+        self.HEADERS = {
             'content-type': 'application/json',
             'accept': 'application/json',
-        })
+        }
+        # Send each request to the host whose swagger document owns its path (see SwaggerIndex)
+        self.ROUTE = route and constant.SWAGGER_ROUTING_ENABLED
+    
+    @staticmethod
+    def _origin(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
     
     def set_host(self, url):
         self.HOST = url[:]
+        self.SESSION = HttpTransport.session(self._origin(self.HOST))
     
     def get_curl(self, req):
         method = req.method
@@ -38,29 +54,74 @@ class HttpRequestInit:
         
         return command.format(method=method, headers=headers, data=data, uri=uri)
     
+    def route(self, path):
+        """Return the base URL for `path`: its owning host when routing is on, HOST otherwise"""
+        if not self.ROUTE:
+            return self.HOST
+        # Imported here because SwaggerIndex fetches the swagger documents through this class
+        from api_external.lib.SwaggerIndex import SwaggerIndex
+        return SwaggerIndex.host_for(path) or self.HOST
+    
+    @staticmethod
+    def _replayed_response(exchange, method, url, kwargs) -> requests.Response:
+        """A requests.Response carrying a cassette exchange, as if it had come off the wire"""
+        resp = requests.Response()
+        resp.status_code = exchange.status
+        resp.headers.update(exchange.headers)
+        resp.url = url
+        HttpRequestInit._buffer_body(resp, exchange.content)
+        resp.request = requests.Request(method, url, headers=kwargs.get('headers'), params=kwargs.get('params'),
+                                        data=kwargs.get('data'), json=kwargs.get('json')).prepare()
+        return resp
+    
+    @staticmethod
+    def _buffer_body(resp, content):
+        """
+        Hold `content` as the body of `resp`, readable both as `resp.content` and, for
+        `stream=True` callers such as verify_resp_stream, from `resp.raw`
+        """
+        resp._content = content
+        resp._content_consumed = True
+        resp.raw = io.BytesIO(content)
+    
     def request(self, method, path='', **kwargs):
-        url = self.HOST + path
-        resp = self.SESSION.request(method, url, **kwargs)
+        cassette = HttpCassette.active()
+        host = self.HOST if cassette and cassette.mode == 'replay' else self.route(path)
+        url = host + path
+        kwargs['headers'] = {**self.HEADERS, **(kwargs.get('headers') or {})}
+        if cassette and cassette.mode == 'replay':
+            exchange = cassette.replay(method, path, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+            resp = self._replayed_response(exchange, method, url, kwargs)
+        else:
+            session = self.SESSION if host == self.HOST else HttpTransport.session(self._origin(host))
+            resp = session.request(method, url, **kwargs)
+            if cassette:
+                # Reading the body drains the stream of a stream=True response, so serve it again from memory
+                if kwargs.get('stream'):
+                    self._buffer_body(resp, resp.content)
+                cassette.record(method, path, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'),
+                                resp.status_code, resp.headers, resp.content)
+        if resp.status_code == ResponseCode.UNAUTHORIZED.value:
+            # A revoked token is not served again until it would have expired
+            TokenManager.instance().discard(TokenManager.bearer_token(kwargs['headers']))
         # logging.info(self.get_curl(resp.request))
         print('=' * 60)
         print(f'Request: {self.get_curl(resp.request)}')
-        if resp.status_code != ResponseCode.NOT_FOUND.value:
+        # A streamed body is left unread for the caller to consume incrementally
+        if resp.status_code != ResponseCode.NOT_FOUND.value and not kwargs.get('stream'):
             print(f'Response: {resp.json()}')
         return resp
     
     def add_headers(self, others):
-        self.SESSION.headers.update(others)
+        self.HEADERS.update(others)
     
-    def machine_auth_header(self):
-        pass
+    def machine_auth_header(self, credential, token_action='access'):
+        """Authorize as a machine; `credential` is Machine.machine_credential()"""
+        return self.user_auth_header(TokenType.MACHINE_TOKEN, credential, token_action)
     
-    def user_auth_header(self, token_type, credential):
-        resp = self.request('POST', '/login', data=json.dumps(credential))
-        if resp.status_code != 200:
-            print(resp.status_code)
-            print(resp.json())
+    def user_auth_header(self, token_type, credential, token_action='access'):
+        token = TokenManager.instance().get_token(self, token_type, credential, token_action)
+        if not token:
             return None
-        if token_type == 'refresh':
-            token = resp.json()['data']['refreshToken']
-        token = resp.json()['data']['accessToken']
-        self.SESSION.headers.update({'Authorization': 'Bearer ' + token})
\ No newline at end of file
+        self.HEADERS.update({'Authorization': 'Bearer ' + token})
+        return token
\ No newline at end of file
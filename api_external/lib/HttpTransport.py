@@ -0,0 +1,68 @@
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import constant
+
+
+class HttpTransport:
+    """Process-wide registry of pooled `requests.Session` objects, one per host.
+
+    Every HttpRequestInit talking to the same host shares the session returned by
+    `session(host)`, so TCP/TLS connections are kept alive and reused across calls
+    instead of being re-established for each request. Sessions are treated as
+    read-only after creation: per-caller headers such as Authorization must be passed
+    with each request rather than stored on the shared session.
+    """
+    _sessions: Dict[str, requests.Session] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def build_adapter(pool_connections=None, pool_maxsize=None, max_retries=None, pool_block=None) -> HTTPAdapter:
+        """Build a connection-pooling adapter from the HTTP_* settings in constant.py"""
+        retries = Retry(
+            total=constant.HTTP_MAX_RETRIES if max_retries is None else max_retries,
+            backoff_factor=constant.HTTP_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            # Only retry methods whose repeat is harmless: a lost response must not duplicate a
+            # create, and a DELETE that went through behind a failing proxy would 404 on the retry
+            allowed_methods=frozenset({'GET', 'PUT', 'HEAD', 'OPTIONS'}),
+            raise_on_status=False,
+        )
+        return HTTPAdapter(
+            pool_connections=constant.HTTP_POOL_CONNECTIONS if pool_connections is None else pool_connections,
+            pool_maxsize=constant.HTTP_POOL_MAXSIZE if pool_maxsize is None else pool_maxsize,
+            max_retries=retries,
+            pool_block=constant.HTTP_POOL_BLOCK if pool_block is None else pool_block,
+        )
+
+    @classmethod
+    def build_session(cls, **adapter_kwargs) -> requests.Session:
+        session = requests.Session()
+        adapter = cls.build_adapter(**adapter_kwargs)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+
+    @classmethod
+    def session(cls, host: str) -> requests.Session:
+        """Return the long-lived session for `host`, creating it on first use"""
+        session = cls._sessions.get(host)
+        if session is None:
+            with cls._lock:
+                session = cls._sessions.get(host)
+                if session is None:
+                    session = cls._sessions[host] = cls.build_session()
+        return session
+
+    @classmethod
+    def close_all(cls):
+        """Close every pooled session, e.g. at the end of a test session"""
+        with cls._lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
@@ -1,23 +1,237 @@
 # from robot.api import logger
+import io
 import json
-import jsonref
-from jsonschema import Draft202012Validator
+import threading
+from collections import OrderedDict
 import os
-from importlib import resources
-from pathlib import Path
+from typing import Optional
 import constant
-from api_external.lib.SwaggerHiker import SwaggerHiker
+from api_external.lib.SchemaFetcher import SchemaFetcher
+from api_external.lib.SchemaArtifact import SchemaArtifact
+from api_external.lib.FastValidator import FastValidator
+from api_external.lib.SchemaResolver import SchemaResolver
+from api_external.lib.ArrayValidator import ArrayValidator, ValidationReport, VALIDATION_MODES
+from api_external.lib.StreamingValidator import StreamingValidator
 from api_path import *
 
 
+class SchemaCache:
+    """Process-wide cache of the swagger document and the schemas derived from it.
+    
+    The document is parsed once per file version (keyed by mtime and size, so a freshly
+    downloaded swagger.json is picked up), each operation schema is resolved by a
+    SchemaResolver, which only follows the refs reachable from that operation, and
+    transformed once. Compiled validators (jsonschema, or generated code with
+    SCHEMA_VALIDATOR_BACKEND=codegen, see FastValidator) are kept in a bounded LRU. Cached schemas are shared between callers and must be treated as
+    read-only.
+    
+    When SCHEMA_ARTIFACT_ENABLED is set, operation schemas, request body schemas and request
+    fields are read from the precompiled SchemaArtifact instead of parsing the whole document.
+    Derived entries are keyed by the source they came from ('document' or 'artifact'), so a
+    process using both keeps both; only a source loaded from an older swagger.json is dropped.
+    """
+    _lock = threading.RLock()
+    _document = None
+    _document_stamp = None
+    _resolver = None
+    _artifact = None
+    _artifact_stamp = None
+    _operation_schemas = {}
+    _request_fields = {}
+    _request_schemas = {}
+    _validators = OrderedDict()
+    _array_validators = {}
+    
+    @staticmethod
+    def _file_stamp(path):
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+    
+    @staticmethod
+    def _source():
+        """Where schemas are read from right now: 'artifact' or 'document'"""
+        return 'artifact' if constant.SCHEMA_ARTIFACT_ENABLED else 'document'
+    
+    @classmethod
+    def _drop_derived(cls, source=None):
+        """Forget the schemas and validators derived from `source`, or from both sources"""
+        for cache in (cls._operation_schemas, cls._request_fields, cls._request_schemas,
+                      cls._validators, cls._array_validators):
+            for key in [key for key in cache if source is None or key[0] == source]:
+                del cache[key]
+    
+    @classmethod
+    def _drop_document(cls):
+        cls._document = None
+        cls._document_stamp = None
+        cls._resolver = None
+        cls._drop_derived('document')
+    
+    @classmethod
+    def _drop_artifact(cls):
+        if cls._artifact is not None:
+            cls._artifact.close()
+        cls._artifact = None
+        cls._artifact_stamp = None
+        cls._drop_derived('artifact')
+    
+    @classmethod
+    def _drop_stale(cls, stamp):
+        """Drop the sources loaded from an older swagger.json than `stamp`, and what they derived"""
+        if cls._document_stamp is not None and cls._document_stamp != stamp:
+            cls._drop_document()
+        if cls._artifact_stamp is not None and cls._artifact_stamp != stamp:
+            cls._drop_artifact()
+    
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._drop_document()
+            cls._drop_artifact()
+            cls._drop_derived()
+    
+    @classmethod
+    def document(cls):
+        """Return the parsed swagger document, fetching a new version first if it is stale"""
+        with cls._lock:
+            path = SchemaFetcher.ensure_current()
+            stamp = cls._file_stamp(path)
+            cls._drop_stale(stamp)
+            if cls._document is None:
+                with open(path) as schema_fid:
+                    cls._document = json.load(schema_fid)
+                cls._resolver = SchemaResolver(cls._document)
+                cls._document_stamp = stamp
+            return cls._document
+    
+    @classmethod
+    def resolver(cls):
+        """Return the ref resolver of the current swagger document"""
+        with cls._lock:
+            cls.document()
+            return cls._resolver
+    
+    @classmethod
+    def artifact(cls):
+        """Return the precompiled schema artifact, rebuilding it when swagger.json changed"""
+        with cls._lock:
+            path = SchemaFetcher.ensure_current()
+            stamp = cls._file_stamp(path)
+            cls._drop_stale(stamp)
+            if cls._artifact is None:
+                cls._artifact = SchemaArtifact.load(path)
+                cls._artifact_stamp = stamp
+            return cls._artifact
+    
+    @classmethod
+    def _load_operation_schema(cls, path, method, response):
+        if constant.SCHEMA_ARTIFACT_ENABLED:
+            return cls.artifact().operation_schema(path, method, response)
+        schema = cls.resolver().operation_schema(path, method, response)
+        if schema:
+            # Transform nullable properties before validation
+            return JSONSchemaLibrary.transform_nullable_types(schema)
+        return None
+    
+    @classmethod
+    def operation_schema(cls, path, method, response, require=None, projection=None):
+        """Return the transformed response schema of one operation, or None if it is not documented"""
+        key = (cls._source(), path, method, response, require, projection)
+        with cls._lock:
+            if key not in cls._operation_schemas:
+                if projection:
+                    schema = cls.operation_schema(path, method, response)
+                    if schema:
+                        schema = JSONSchemaLibrary.project_schema(schema, projection)
+                else:
+                    schema = cls._load_operation_schema(path, method, response)
+                if schema:
+                    if require == 'ALL':
+                        schema = JSONSchemaLibrary.add_required_fields(schema)
+                cls._operation_schemas[key] = schema or None
+            return cls._operation_schemas[key]
+    
+    @classmethod
+    def validator(cls, path, method, response, require=None, projection=None):
+        """Return a compiled validator for one operation, or None if it is not documented"""
+        key = (cls._source(), path, method, response, require, projection)
+        with cls._lock:
+            validator = cls._validators.get(key)
+            if validator is not None:
+                cls._validators.move_to_end(key)
+                return validator
+        schema = cls.operation_schema(path, method, response, require, projection)
+        if schema is None:
+            return None
+        validator = FastValidator.for_schema(schema)
+        with cls._lock:
+            cls._validators[key] = validator
+            cls._validators.move_to_end(key)
+            while len(cls._validators) > constant.SCHEMA_VALIDATOR_CACHE_SIZE:
+                cls._validators.popitem(last=False)
+        return validator
+    
+    @classmethod
+    def array_validator(cls, path, method, response, require=None, projection=None):
+        """Return an ArrayValidator for one operation, or None if it has no item array to split off"""
+        key = (cls._source(), path, method, response, require, projection)
+        with cls._lock:
+            if key not in cls._array_validators:
+                schema = cls.operation_schema(path, method, response, require, projection)
+                array_validator = None
+                if schema is not None and ArrayValidator.find_item_array(schema) is not None:
+                    array_validator = ArrayValidator(schema)
+                cls._array_validators[key] = array_validator
+            return cls._array_validators[key]
+    
+    @classmethod
+    def request_fields(cls, path, method):
+        """Return the `fields[]` enum of an operation's query parameters"""
+        key = (cls._source(), path, method)
+        with cls._lock:
+            if key not in cls._request_fields:
+                fields = []
+                if constant.SCHEMA_ARTIFACT_ENABLED:
+                    fields = cls.artifact().request_fields(path, method)
+                else:
+                    for param in cls.resolver().resolve(['paths', path, method, 'parameters'], []):
+                        if param['name'] == 'fields':
+                            fields = JSONSchemaLibrary.get_nested_value(param, ['schema', 'items', 'enum'], [])
+                            break
+                cls._request_fields[key] = tuple(fields)
+            return cls._request_fields[key]
+
+
+    @classmethod
+    def request_schema(cls, path, method):
+        """Return the request body schema of one operation, or None if it takes no JSON body"""
+        key = (cls._source(), path, method)
+        with cls._lock:
+            if key not in cls._request_schemas:
+                if constant.SCHEMA_ARTIFACT_ENABLED:
+                    schema = cls.artifact().request_schema(path, method)
+                else:
+                    schema = cls.resolver().request_schema(path, method)
+                cls._request_schemas[key] = schema or None
+            return cls._request_schemas[key]
+
+
 class JSONSchemaLibrary:
-    def __init__(self, api_path, method=Method.GET, response=ResponseCode.OK):
+    def __init__(self, api_path, method=Method.GET, response=ResponseCode.OK, projection=None):
+        """
+        Args:
+            projection: Dotted field paths the response was requested with (`fields[]`);
+                        responses are then validated against the schema pruned to them
+        """
         self.schema_filename = constant.SWAGGER_JSON_PATH
         self.path = api_path.value.path
         self.method = method.value.lower()
         self.response = str(response.value)
+        self.projection = frozenset(projection) if projection else None
+        self.last_report: Optional[ValidationReport] = None
     
-    def get_nested_value(self, dictionary, keys, default=None):
+    @staticmethod
+    def get_nested_value(dictionary, keys, default=None):
         """
         Safely get nested dictionary value using a list of keys.
         
@@ -37,7 +251,8 @@ class JSONSchemaLibrary:
         except (KeyError, TypeError):
             return default
     
-    def transform_nullable_types(self, schema):
+    @staticmethod
+    def transform_nullable_types(schema):
         """
         Recursively transforms schema properties with 'nullable: true' to include 'null' in type array.
         
@@ -72,79 +287,154 @@ class JSONSchemaLibrary:
         for key, value in transformed.items():
             if key == 'properties' and isinstance(value, dict):
                 # Transform each property
-                transformed[key] = {k: self.transform_nullable_types(v) for k, v in value.items()}
+                transformed[key] = {k: JSONSchemaLibrary.transform_nullable_types(v) for k, v in value.items()}
             elif key == 'items' and isinstance(value, dict):
                 # Transform array items
-                transformed[key] = self.transform_nullable_types(value)
+                transformed[key] = JSONSchemaLibrary.transform_nullable_types(value)
             elif isinstance(value, dict):
                 # Transform nested objects
-                transformed[key] = self.transform_nullable_types(value)
+                transformed[key] = JSONSchemaLibrary.transform_nullable_types(value)
             elif isinstance(value, list):
                 # Transform items in arrays
-                transformed[key] = [self.transform_nullable_types(item) if isinstance(item, dict) else item
+                transformed[key] = [JSONSchemaLibrary.transform_nullable_types(item) if isinstance(item, dict) else item
                                     for item in value]
         
         return transformed
     
-    def __load_response_schema(self, full_schema, path, method, response):
-        keys = ['paths', path, method, 'responses', response,
-                'content', 'application/json', 'schema']
-        schema = self.get_nested_value(full_schema, keys)
-        if schema:
-            # Transform nullable properties before validation
-            return self.transform_nullable_types(schema)
-        return None
-    
-    def __load_json_schema(self):
-        """ Loads the given schema file """
-        schema = None
-        if not Path(constant.SCHEMA_FILE_PATH).is_file():
-            SwaggerHiker().swagger_get_schema()
+    @staticmethod
+    def add_required_fields(schema):
+        """
+        Recursively marks every property of every object in the schema as required.
         
-        with resources.open_text("api_external.res.schema", self.schema_filename) as schema_fid:
-            file_uri = Path(os.path.abspath(schema_fid.name)).as_uri()
-            schemas_file = schema_fid.read()
-            schema = jsonref.loads(schemas_file, base_uri=file_uri, jsonschema=True)
-        return schema
-    
-    def __add_required_fields(self, schema):
-        """Recursively adds required fields to all objects in the schema."""
+        Args:
+            schema (dict): The JSON schema to extend, left unmodified
+        
+        Returns:
+            dict: A copy of the schema with `required` set on all object schemas
+        """
         if not isinstance(schema, dict):
-            return
+            return schema
         
+        transformed = dict(schema)
         # If this is an object type schema
-        if schema.get('type') == 'object' and 'properties' in schema:
-            # Make all properties required
-            schema['required'] = list(schema['properties'].keys())
-            
-            # Recursively process all properties
-            for prop in schema['properties'].values():
-                self.__add_required_fields(prop)
+        if transformed.get('type') == 'object' and 'properties' in transformed:
+            # Make all properties required and process them recursively
+            transformed['required'] = list(transformed['properties'].keys())
+            transformed['properties'] = {k: JSONSchemaLibrary.add_required_fields(v)
+                                         for k, v in transformed['properties'].items()}
         
         # If this is an array type schema
-        elif schema.get('type') == 'array' and 'items' in schema:
+        elif transformed.get('type') == 'array' and 'items' in transformed:
             # Process the items schema
-            self.__add_required_fields(schema['items'])
+            transformed['items'] = JSONSchemaLibrary.add_required_fields(transformed['items'])
+        return transformed
     
-    def verify_resp_schema(self, sample, require=None):
-        """Load json schema and extract response schema"""
-        schema = self.__load_json_schema()
-        if not schema:
-            print(f'Schema file not found: {self.schema_filename}')
-            return False
-        resp_schema = self.__load_response_schema(schema, self.path, self.method, self.response)
-        if not resp_schema:
+    @staticmethod
+    def _projection_tree(projection):
+        # {'user': {'country': None}, 'sku': None}; None keeps the whole subtree
+        tree = {}
+        for field_path in sorted(projection, key=lambda field_path: field_path.count('.')):
+            node, keys = tree, field_path.split('.')
+            for key in keys[:-1]:
+                if node.get(key, {}) is None:
+                    break
+                node = node.setdefault(key, {})
+            else:
+                node[keys[-1]] = None
+        return tree
+    
+    @staticmethod
+    def _prune_properties(schema, tree):
+        if not isinstance(schema, dict) or tree is None:
+            return schema
+        pruned = dict(schema)
+        if isinstance(schema.get('properties'), dict):
+            pruned['properties'] = {key: JSONSchemaLibrary._prune_properties(value, tree[key])
+                                    for key, value in schema['properties'].items() if key in tree}
+            if 'required' in schema:
+                pruned['required'] = [key for key in schema['required'] if key in tree]
+        if isinstance(schema.get('items'), dict):
+            pruned['items'] = JSONSchemaLibrary._prune_properties(schema['items'], tree)
+        for keyword in ('allOf', 'anyOf', 'oneOf'):
+            if keyword in schema:
+                pruned[keyword] = [JSONSchemaLibrary._prune_properties(branch, tree) for branch in schema[keyword]]
+        return pruned
+    
+    @staticmethod
+    def project_schema(schema, projection):
+        """
+        Prunes a response schema to the fields of a projection, so that a projected response validates.
+        
+        The resource objects are the items of `data` when it is an array, the items of the list
+        next to `total` for paginated lists, and `data` itself otherwise (detail responses).
+        
+        Args:
+            schema (dict): The JSON schema to prune, left unmodified
+            projection: Dotted field paths, e.g. {'serial_num', 'user.country'}
+        
+        Returns:
+            dict: A copy of the schema whose resource objects only keep the projected properties
+        """
+        data = JSONSchemaLibrary.get_nested_value(schema, ['properties', 'data'])
+        if not isinstance(data, dict):
+            return schema
+        target = data
+        data_properties = data.get('properties') or {}
+        if 'total' in data_properties:
+            list_key = next((key for key, value in data_properties.items()
+                             if isinstance(value, dict) and value.get('type') == 'array'), None)
+            if list_key is not None:
+                target = data_properties[list_key]
+        pruned_target = JSONSchemaLibrary._prune_properties(target, JSONSchemaLibrary._projection_tree(projection))
+        if target is not data:
+            pruned_target = {**data, 'properties': {**data_properties, list_key: pruned_target}}
+        return {**schema, 'properties': {**schema['properties'], 'data': pruned_target}}
+    
+    def verify_resp_schema(self, sample, require=None, mode=None, sample_size=None, seed=None):
+        """
+        Validates the sample JSON against the cached response schema.
+        
+        Args:
+            sample: Response body as a dict or JSON string
+            require: 'ALL' to make every property required
+            mode: 'full' validates everything in-process (default, see SCHEMA_VALIDATION_MODE),
+                  'sample' validates the envelope, `sample_size` items picked with `seed` and every
+                  item of a not yet seen shape, 'parallel' validates every item on a process pool
+        
+        Returns:
+            bool: True if no validation error was found. `last_report` tells which mode ran
+            and how many list items it covered.
+        """
+        mode = mode or constant.SCHEMA_VALIDATION_MODE
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f'Unknown validation mode: {mode}')
+        validator = SchemaCache.validator(self.path, self.method, self.response, require, self.projection)
+        if validator is None:
             print(f"Schema not found for path: {self.path}[{self.method}]({self.response})")
             return False
-        # Add required fields recursively
-        if require == 'ALL':
-            self.__add_required_fields(resp_schema)
         
-        """Validates the sample JSON against the given schema."""
-        validator = Draft202012Validator(resp_schema)
         if isinstance(sample, str):
             sample = json.loads(sample)
-        errors = sorted(validator.iter_errors(sample), key=lambda e: e.path)
+        array_validator = None
+        if mode != 'full':
+            array_validator = SchemaCache.array_validator(self.path, self.method, self.response, require,
+                                                          self.projection)
+        if array_validator is None:
+            errors = list(validator.iter_errors(sample))
+            self.last_report = ValidationReport('full', error_count=len(errors))
+            return self.__report_errors(errors)
+        
+        if mode == 'sample':
+            errors, self.last_report = array_validator.validate_sample(sample, sample_size, seed)
+        else:
+            errors, self.last_report = array_validator.validate_parallel(sample)
+        report = self.last_report
+        print(f'Validated {self.path}[{self.method}]({self.response}) in {report.mode} mode: '
+              f'{report.items_validated}/{report.items_total} items ({report.coverage:.0%})')
+        return self.__report_errors(errors)
+    
+    def __report_errors(self, errors):
+        errors = sorted(errors, key=lambda e: e.path)
         for error in errors:
             print(
                 f'Validation error for schema {self.path}[{self.method}]({self.response}) - {error.schema_path}: {error.message}')
@@ -152,17 +442,76 @@ class JSONSchemaLibrary:
         
         return False if errors else True
     
+    def verify_resp_stream(self, source, require=None, array_path=None, fail_fast=False, max_errors=None):
+        """
+        Validates a response body while it is parsed, without materializing the whole document.
+        
+        Args:
+            source: A streamed requests response (`stream=True`), bytes, or a binary file-like object
+            require: 'ALL' to make every property required, as in verify_resp_schema
+            array_path: Property path of the array to stream, e.g. ['data', 'locations'];
+                        defaults to the first array of objects in the schema
+            fail_fast: Stop parsing at the first validation error
+            max_errors: Stop parsing once this many errors were collected
+                        (defaults to SCHEMA_STREAM_MAX_ERRORS)
+        
+        Returns:
+            bool: True if no validation error was found
+        """
+        schema = SchemaCache.operation_schema(self.path, self.method, self.response, require, self.projection)
+        if schema is None:
+            print(f"Schema not found for path: {self.path}[{self.method}]({self.response})")
+            return False
+        
+        if isinstance(source, (bytes, str)):
+            source = io.BytesIO(source.encode('utf-8') if isinstance(source, str) else source)
+        elif hasattr(source, 'raw'):
+            # Let urllib3 undo any gzip/deflate transfer encoding while we read
+            source.raw.decode_content = True
+            source = source.raw
+        
+        max_errors = 1 if fail_fast else (max_errors or constant.SCHEMA_STREAM_MAX_ERRORS)
+        errors = []
+        for error in StreamingValidator(schema, array_path).iter_errors(source):
+            errors.append(error)
+            if len(errors) >= max_errors:
+                print(f'Stopped validating {self.path}[{self.method}]({self.response}) after {len(errors)} errors')
+                break
+        return self.__report_errors(errors)
+    
     def get_request_fields_schema(self):
-        """Load json schema and extract response schema"""
-        full_schema = self.__load_json_schema()
-        if not full_schema:
-            print(f'Schema file not found: {self.schema_filename}')
-            return []
-        
-        keys = ['paths', self.path, self.method, 'parameters']
-        param_schema = self.get_nested_value(full_schema, keys, [])
-        for param in param_schema:
-            if param['name'] == 'fields':
-                keys = ['schema', 'items', 'enum']
-                return self.get_nested_value(param, keys, [])
-        return []
\ No newline at end of file
+        """Return the `fields[]` enum of the operation's query parameters"""
+        return list(SchemaCache.request_fields(self.path, self.method))
+    
+    def get_projection_fields(self, projection):
+        """
+        Validates a projection against the `fields[]` enum and returns the values to send.
+        
+        A dotted path is accepted when it, or one of its parents, is in the enum; the longest
+        such entry is sent, so {'user.country', 'user.type'} requests both sub-fields.
+        
+        Args:
+            projection: Dotted field paths, e.g. {'serial_num', 'user.country'}
+        
+        Returns:
+            list: `fields[]` values, in enum order
+        
+        Raises:
+            ValueError: If the operation takes no `fields[]` or a path is not in its enum
+        """
+        field_list = self.get_request_fields_schema()
+        if not field_list:
+            raise ValueError(f'{self.path}[{self.method}] does not accept fields[]')
+        allowed = set(field_list)
+        selected, invalid = set(), []
+        for field_path in projection:
+            keys = field_path.split('.')
+            prefixes = ('.'.join(keys[:end]) for end in range(len(keys), 0, -1))
+            match = next((prefix for prefix in prefixes if prefix in allowed), None)
+            if match is None:
+                invalid.append(field_path)
+            else:
+                selected.add(match)
+        if invalid:
+            raise ValueError(f'Fields not in the fields[] enum of {self.path}[{self.method}]: {sorted(invalid)}')
+        return [field for field in field_list if field in selected]
@@ -4,7 +4,7 @@ from importlib import resources
 import json
 from api_external.lib.APIEndpointBase import APIEndpointBase
 from api_external.lib.CommonUtils import StringUtils
-from api_external.lib.CommonUtils import APIUtils
+from api_external.lib.CommonUtils import APIUtils, AsyncAPIUtils
 from api_path import *
 import time
 import constant
@@ -14,6 +14,10 @@ from datetime import datetime, timezone
 
 class Location(APIEndpointBase):
     LIST_API_PATH = ApiPath.LOCATION_LIST
+    LIST_ITEMS_KEY = 'locations'
+    LIST_PAGINATED = True
+    RESOURCE_ID_FIELD = 'full_code'
+    RESOURCE_ID_ATTR = '_location_id'
     DETAIL_API_PATH = ApiPath.LOCATION_DETAIL
     
     def __init__(self):
@@ -123,6 +127,17 @@ class Location(APIEndpointBase):
         )
         return resp
     
+    async def _aexecute_update_request(self):
+        path_info = self.__class__.generate_detail_path_info(self._location_id)
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            path_info,
+            Method.PATCH,
+            ResponseCode.OK,
+            None,
+            data=self.update_payload
+        )
+        return resp
+    
     def delete(self):
         path_info = self.__class__.generate_detail_path_info(self._location_id)
         resp = APIUtils.call_api_and_assert_status_code(
@@ -132,11 +147,19 @@ class Location(APIEndpointBase):
         )
         return resp
     
+    async def _aexecute_delete_request(self):
+        path_info = self.__class__.generate_detail_path_info(self._location_id)
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            path_info,
+            Method.DELETE,
+            ResponseCode.OK,
+        )
+        return resp
+    
     @classmethod
     def _prepare_get_list_parameters(cls):
-        total = cls._get_item_amount()
         params = cls._prepare_get_detail_parameters()
-        params += [('amount', total), ('status', 'active')]
+        params += [('status', 'active')]
         return params
     
     @classmethod
@@ -145,11 +168,9 @@ class Location(APIEndpointBase):
     
     @classmethod
     def get_random_resource_id(cls):
-        location_list_resp = cls.read_list().json()
-        location_list = location_list_resp['data']['locations']
-        if len(location_list) == 0:
+        random_location = cls.random_item()
+        if random_location is None:
             return None
-        random_location = random.choice(location_list)
         return random_location['full_code']
     
     @property
@@ -157,6 +178,9 @@ class Location(APIEndpointBase):
         return self._location_id
         
     def set_user_name(self, user_name):
+        if self._location_id:
+            # The pool would hand the location out again with the test's owner
+            self._mark_unresettable()
         self._user_name = user_name
         
     def get_drink_settings(self, menu_id):
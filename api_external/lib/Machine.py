@@ -1,14 +1,20 @@
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import ec
-import time
+import hashlib
+import os
 import random
+import threading
+import time
 from typing import Dict, Any, List, Optional
 
-from api_path import ApiPath, ApiPathInfo, Method, ResponseCode
-from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import APIUtils
+from api_path import ApiPath, ApiPathInfo, Method, ResponseCode, TokenType
+from api_external.lib.APIEndpointBase import APIEndpointBase, BatchResult
+from api_external.lib.CommonUtils import APIUtils, AsyncAPIUtils
+from api_external.lib.EccKeyPool import EccKeyPool
+from api_external.lib.HttpRequestInit import HttpRequestInit
 from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
+from api_external.lib.TokenManager import TokenManager
 import constant
 
 
@@ -16,7 +22,13 @@ class Machine(APIEndpointBase):
     """Handles machine-related API operations"""
     
     LIST_API_PATH = ApiPath.MACHINE_LIST
+    RESOURCE_ID_FIELD = 'serial_num'
+    RESOURCE_ID_ATTR = '_serial_num'
     DETAIL_API_PATH = ApiPath.MACHINE_DETAIL
+    # Last tick handed out in a machine_id and this process's slot, see _reserve_machine_ids
+    _machine_id_lock = threading.Lock()
+    _last_machine_tick = 0
+    _machine_id_slot: Optional[int] = None
     
     def __init__(self):
         super().__init__()
@@ -24,55 +36,95 @@ class Machine(APIEndpointBase):
         self._machine_id: str = ''
         self._public_key: str = ''
         self._private_key: bytes = b''
+        # Loaded form of _private_key and the PEM it was loaded from
+        self._signing_key: Optional[ec.EllipticCurvePrivateKey] = None
+        self._signing_pem: bytes = b''
+    
+    def _load_signing_key(self) -> ec.EllipticCurvePrivateKey:
+        """Return the loaded private key, parsing `_private_key` only when it changed"""
+        if self._signing_key is None or self._signing_pem != self._private_key:
+            self._signing_key = serialization.load_pem_private_key(
+                data=self._private_key,
+                password=None,
+                backend=default_backend()
+            )
+            self._signing_pem = self._private_key
+        return self._signing_key
     
     def _sign_ecdsa(self, msg: str = '') -> str:
         """Sign the message with the ECDSA private key"""
-        sk = serialization.load_pem_private_key(
-            data=self._private_key,
-            password=None,
-            backend=default_backend()
-        )
-        signature = sk.sign(
+        signature = self._load_signing_key().sign(
             msg.encode('utf-8'),
             ec.ECDSA(hashes.SHA256())
         ).hex()
         return signature
     
     def _generate_ecc_keypair(self) -> tuple[str, bytes]:
-        """Generate the ECC private key / public key pair"""
-        pk = ec.generate_private_key(
-            curve=ec.SECP256K1(),
-            backend=default_backend()
-        )
-        private_key = pk.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.TraditionalOpenSSL,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        public_key = pk.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        return public_key.decode("utf-8"), private_key
+        """Take an ECC public key / private key pair from the shared pre-generated pool"""
+        key_pair = EccKeyPool.instance().take()
+        self._signing_key, self._signing_pem = key_pair.private_key, key_pair.private_pem
+        return key_pair.public_pem, key_pair.private_pem
+    
+    @staticmethod
+    def _worker_index() -> int:
+        """Index of this pytest-xdist worker (gw3 is 3), 0 outside xdist"""
+        worker = os.getenv('PYTEST_XDIST_WORKER', '')
+        return int(worker[2:]) if worker[2:].isdigit() else 0
+    
+    @classmethod
+    def _process_slot(cls) -> int:
+        """
+        Two-digit slot of this process's machine ids. The xdist workers of a run take consecutive
+        slots from an offset derived from the run's uid; any other process draws a random one.
+        """
+        run_uid = os.getenv('PYTEST_XDIST_TESTRUNUID')
+        if run_uid:
+            offset = int(hashlib.sha1(run_uid.encode('utf-8')).hexdigest(), 16)
+        else:
+            offset = random.SystemRandom().randrange(100)
+        return (offset + cls._worker_index()) % 100
+    
+    @classmethod
+    def _reserve_machine_ids(cls, n: int) -> List[str]:
+        """
+        Return `n` machine ids that no other call in this process or another xdist worker hands out.
+        Ids keep the ten digits of the documented import example (9900000001): a 9, a
+        centisecond counter that never repeats within the process (seven digits, so it wraps
+        every 27.8 hours) and the two-digit `_process_slot`, so separate test runs against the
+        same backend only collide when they share a slot and a centisecond.
+        """
+        with cls._machine_id_lock:
+            if cls._machine_id_slot is None:
+                cls._machine_id_slot = cls._process_slot()
+            first = max(int(time.time() * 100), cls._last_machine_tick + 1)
+            cls._last_machine_tick = first + n - 1
+            slot = cls._machine_id_slot
+        return [f'9{tick % 10 ** 7:07d}{slot:02d}' for tick in range(first, first + n)]
+    
+    def _assign_machine_id(self, machine_id: str) -> None:
+        self._machine_id = machine_id
+        self._serial_num = f'db0xqatesting{self._machine_id}'
+    
+    def _import_row(self) -> Dict[str, str]:
+        return {
+            'serial_num': self._serial_num,
+            'machine_id': self._machine_id,
+            'hardware_version': '4.5A'
+        }
     
     def _prepare_import_payload(self) -> bool:
         """Prepare payload for creating a new machine"""
-        self._machine_id = str(int(time.time()))
-        self._serial_num = f'db0xqatesting{self._machine_id}'
+        self._assign_machine_id(self._reserve_machine_ids(1)[0])
         
         machine_import_data = {
-            'csv': [{
-                'serial_num': self._serial_num,
-                'machine_id': self._machine_id,
-                'hardware_version': '4.5A'
-            }]
+            'csv': [self._import_row()]
         }
         # self.info_data.update(self.create_payload['csv'][0])
         return machine_import_data
     
     def _prepare_register_payload(self):
         # register key to machine
-        self.public_key, self.private_key = self._generate_ecc_keypair()
+        self._public_key, self._private_key = self._generate_ecc_keypair()
         machine_register_data = {
             'serial_num': self._serial_num,
             'public_key': self._public_key
@@ -88,16 +140,24 @@ class Machine(APIEndpointBase):
     
     def _execute_create_request(self) -> Dict[str, Any]:
         """Execute the create machine API request"""
-        # Import machine
-        machine_import_data = self.create_payload['machine_import_data']
-        resp = APIUtils.call_api_and_assert_status_code(
+        # Import machine; journaled right away so a failed register does not leak it
+        self._execute_import_request(self.create_payload['machine_import_data'])
+        self._journal_create()
+        return self._execute_register_and_edit_requests()
+    
+    @staticmethod
+    def _execute_import_request(machine_import_data) -> Any:
+        """Import the machines listed in the factory CSV rows of `machine_import_data`"""
+        return APIUtils.call_api_and_assert_status_code(
             ApiPathInfo(ApiPath.MACHINE_IMPORT),
             Method.POST,
             ResponseCode.OK,
             None,
             data=machine_import_data
         )
-        
+    
+    def _execute_register_and_edit_requests(self) -> Any:
+        """Register the public key of an imported machine and name it"""
         machine_register_data = self.create_payload['machine_register_data']
         resp = APIUtils.call_api_and_assert_status_code(
             ApiPathInfo(ApiPath.MACHINE_REGISTER),
@@ -108,7 +168,96 @@ class Machine(APIEndpointBase):
         )
         
         # Set machine name
-        self.create_payload = {
+        self.create_payload = self._prepare_edit_payload()
+        resp = APIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_EDIT),
+            Method.PATCH,
+            ResponseCode.OK,
+            None,
+            data=self.create_payload
+        )
+        return resp
+    
+    def _finish_provisioning(self) -> Any:
+        """Register and name a machine already imported by create_many, then finish it like create()"""
+        self.create_payload = {'machine_register_data': self._prepare_register_payload()}
+        resp = self._execute_register_and_edit_requests()
+        self._finish_create(resp)
+        return resp
+    
+    @classmethod
+    def create_many(cls, n, concurrency=None) -> BatchResult:
+        """
+        Provision `n` machines: import them with one factory CSV request per
+        MACHINE_IMPORT_BATCH_SIZE rows, then register keys and name them concurrently.
+        Machines of a failed import chunk are recorded as failed along with their error.
+        Args:
+            n: Number of machines to provision
+            concurrency: Register/edit requests in flight at once (defaults to BULK_CONCURRENCY)
+        Returns: BatchResult whose `succeeded` holds ready Machine objects
+        """
+        start = time.perf_counter()
+        # Let the key pool generate ahead while the import request is in flight
+        EccKeyPool.instance().start()
+        machines = [cls() for _ in range(n)]
+        for machine, machine_id in zip(machines, cls._reserve_machine_ids(n)):
+            machine._assign_machine_id(machine_id)
+        
+        imported, failed = [], []
+        batch_size = max(1, constant.MACHINE_IMPORT_BATCH_SIZE)
+        for offset in range(0, n, batch_size):
+            chunk = machines[offset:offset + batch_size]
+            try:
+                cls._execute_import_request({'csv': [machine._import_row() for machine in chunk]})
+                for machine in chunk:
+                    machine._journal_create()
+                imported.extend(chunk)
+            except Exception as error:
+                print(f'Machine import of {len(chunk)} rows failed: {error}')
+                failed.extend((machine, error) for machine in chunk)
+        
+        result = cls._run_batch('Machine register', imported, lambda machine: machine._finish_provisioning(),
+                                concurrency)
+        result.failed = failed + result.failed
+        result.elapsed = time.perf_counter() - start
+        print(result.summary('Machine create'))
+        return result
+    
+    @classmethod
+    def provision(cls, n, concurrency=None) -> List['Machine']:
+        """Return `n` ready machines, see create_many; machines that failed are left out"""
+        return cls.create_many(n, concurrency).succeeded
+    
+    async def _aexecute_create_request(self) -> Any:
+        """Execute the import / register / edit sequence through the asyncio client"""
+        await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_IMPORT),
+            Method.POST,
+            ResponseCode.OK,
+            None,
+            data=self.create_payload['machine_import_data']
+        )
+        self._journal_create()
+        await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_REGISTER),
+            Method.POST,
+            ResponseCode.OK,
+            None,
+            data=self.create_payload['machine_register_data']
+        )
+        self.create_payload = self._prepare_edit_payload()
+        resp = await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_EDIT),
+            Method.PATCH,
+            ResponseCode.OK,
+            None,
+            data=self.create_payload
+        )
+        return resp
+    
+    def _prepare_edit_payload(self) -> Dict[str, Any]:
+        """Name the freshly registered machine and enable its optional features"""
+        return {
             'name': f'qatesting-{self._machine_id}',
             'serial_num': self._serial_num,
             'machine_id': self._machine_id,
@@ -119,14 +268,6 @@ class Machine(APIEndpointBase):
             "is_reverse_pump_enabled": True,
             "is_adaptive_dispense_enabled": True
         }
-        resp = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(ApiPath.MACHINE_EDIT),
-            Method.PATCH,
-            ResponseCode.OK,
-            None,
-            data=self.create_payload
-        )
-        return resp
     
     # needs to add fields
     def _prepare_update_payload(self) -> bool:
@@ -148,6 +289,16 @@ class Machine(APIEndpointBase):
             data=self.update_payload
         )
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update machine API request through the asyncio client"""
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_EDIT),
+            Method.PATCH,
+            ResponseCode.OK,
+            None,
+            data=self.update_payload
+        )
+    
     def _set_resource_id(self, response: Dict[str, Any]) -> None:
         """Store the machine serial number from response"""
         # self._serial_num = self.create_payload['csv'][0]['serial_num']
@@ -184,6 +335,31 @@ class Machine(APIEndpointBase):
         )
         return bool(response)
     
+    async def _aexecute_delete_request(self) -> bool:
+        """Return the machine to Botrista if needed, then delete it, through the asyncio client"""
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._serial_num),
+            Method.GET,
+            ResponseCode.OK
+        )
+        if response.json()['data']['user_name'] != constant.BOTRISTA_USERNAME:
+            await AsyncAPIUtils.call_api_and_assert_status_code(
+                ApiPathInfo(ApiPath.MACHINE_TRANSFER),
+                Method.POST,
+                ResponseCode.OK,
+                None,
+                data={
+                    'action': 'Return',
+                    'serial_num': self._serial_num
+                }
+            )
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(ApiPath.MACHINE_DELETE, {'serial_num': self._serial_num}),
+            Method.DELETE,
+            ResponseCode.OK
+        )
+        return bool(response)
+    
     @classmethod
     def _prepare_get_list_parameters(cls) -> List[tuple]:
         """Prepare parameters for listing machines"""
@@ -200,11 +376,9 @@ class Machine(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random machine serial number from the list"""
-        response = cls.read_list()
-        machines = response.json()['data']
-        if not machines:
+        random_machine = cls.random_item()
+        if not random_machine:
             return ""
-        random_machine = random.choice(machines)
         return random_machine['serial_num']
     
     @property
@@ -212,25 +386,38 @@ class Machine(APIEndpointBase):
         """Get the machine's unique identifier"""
         return self._serial_num
     
+    def machine_credential(self) -> Dict[str, Any]:
+        """Credential TokenManager logs this machine in with, signing `serial_num-timestamp`"""
+        return {'serial_num': self._serial_num, 'sign': self._sign_ecdsa}
+    
     def get_machine_token(self):
-        timestamp = int(time.time() * 1000)
-        msg = f'{self._serial_num}-{timestamp}'
-        signature = self._sign_ecdsa(self._private_key, msg=msg)
-        payload = {
-            "serial_num": self._serial_num,
-            "verify": f"{self._serial_num}-{timestamp}",
-            "signature": signature
-        }
-        resp = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(ApiPath.MACHINE_LOGIN),
-            Method.POST,
-            ResponseCode.OK,
-            None,
-            data=payload
-        ).json()
-        return {'access_token': resp['data']['accessToken'], 'refresh_token': resp['data']['refreshToken']}
+        """Return the machine's cached token pair, logging in or refreshing when it is about to expire"""
+        record = TokenManager.instance().get_record(
+            HttpRequestInit(constant.BACKEND_HOST),
+            TokenType.MACHINE_TOKEN,
+            self.machine_credential()
+        )
+        assert record is not None, f'Machine login failed for {self._serial_num}'
+        return {'access_token': record.access_token, 'refresh_token': record.refresh_token}
+    
+    def call_api(self, path_info, method, code, **kwargs):
+        """Call an endpoint as this machine, e.g. `ApiPathInfo(ApiPath.DRINKBOT_PROFILE)`"""
+        if method != Method.GET:
+            self._mark_unresettable()
+        return APIUtils.call_api_and_assert_status_code(
+            path_info, method, code, None, credential=self.machine_credential(), **kwargs
+        )
+    
+    async def acall_api(self, path_info, method, code, **kwargs):
+        """Call an endpoint as this machine through the asyncio client"""
+        if method != Method.GET:
+            self._mark_unresettable()
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            path_info, method, code, None, credential=self.machine_credential(), **kwargs
+        )
     
     def install_to_location(self, location):
+        self._mark_unresettable()
         resp = APIUtils.call_api_and_assert_status_code(
             ApiPathInfo(ApiPath.MACHINE_TRANSFER),
             Method.POST,
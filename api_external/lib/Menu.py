@@ -4,7 +4,7 @@ import random
 from typing import Dict, Any, List, Optional
 
 from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import StringUtils, APIUtils
+from api_external.lib.CommonUtils import StringUtils, APIUtils, AsyncAPIUtils
 from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
 from api_path import *
 
@@ -21,6 +21,10 @@ class Menu(APIEndpointBase):
     """Handles menu-related API operations"""
     
     LIST_API_PATH = ApiPath.MENU_LIST
+    LIST_ITEMS_KEY = 'menus'
+    LIST_PAGINATED = True
+    RESOURCE_ID_FIELD = '_id'
+    RESOURCE_ID_ATTR = '_menu_id'
     DETAIL_API_PATH = ApiPath.MENU_DETAIL
     
     def __init__(self):
@@ -116,6 +120,16 @@ class Menu(APIEndpointBase):
             data=self.update_payload
         )
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update menu API request through the asyncio client"""
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._menu_id),
+            Method.PUT,
+            ResponseCode.OK,
+            None,
+            data=self.update_payload
+        )
+    
     def delete(self) -> Any:
         """Delete a menu through the API"""
         response = APIUtils.call_api_and_assert_status_code(
@@ -125,30 +139,26 @@ class Menu(APIEndpointBase):
         )
         return response
     
+    async def _aexecute_delete_request(self) -> Any:
+        """Delete a menu through the asyncio client"""
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            self.generate_detail_path_info(self._menu_id),
+            Method.DELETE,
+            ResponseCode.OK
+        )
+        return response
+    
     @classmethod
     def _prepare_get_list_parameters(cls) -> List[tuple]:
         """Prepare parameters for listing menus"""
-        total = cls._get_total_items()
         field_list = JSONSchemaLibrary(cls.LIST_API_PATH).get_request_fields_schema()
         
         params = [('fields[]', f) for f in field_list]
         params.extend([
-            ('amount', total),
             ('status', 'active')
         ])
         return params
     
-    @classmethod
-    def _get_total_items(cls) -> int:
-        """Get total number of menus"""
-        response = APIUtils.call_api_and_assert_status_code(
-            ApiPathInfo(cls.LIST_API_PATH),
-            Method.GET,
-            ResponseCode.OK,
-            params={'amount': 1}
-        )
-        return response.json()['data']['total']  # Adjust based on actual response structure
-    
     @classmethod
     def generate_detail_path_info(cls, menu_id: str) -> ApiPathInfo:
         """Generate the detail endpoint path with menu ID"""
@@ -157,11 +167,9 @@ class Menu(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random menu ID from the list"""
-        response = cls.read_list()
-        menus = response.json()['data']['menus']  # Adjust based on actual response structure
-        if not menus:
+        random_menu = cls.random_item()
+        if not random_menu:
             return ""
-        random_menu = random.choice(menus)
         return random_menu['_id']  # Adjust field name if needed
     
     @property
@@ -169,19 +177,14 @@ class Menu(APIEndpointBase):
         """Get the menu's unique identifier"""
         return self._menu_id
     
-    def create(self) -> Any:
-        resp = super().create()
-        if resp:
-            self.info_data['drinks'] = self._drink_create_payload
-        return resp
+    def _after_create(self, resp) -> None:
+        self.info_data['drinks'] = self._drink_create_payload
     
-    def update(self) -> Any:
-        resp = super().update()
-        if resp:
-            self.info_data['drinks'] = self._drink_update_payload
-        return resp
+    def _after_update(self, resp) -> None:
+        self.info_data['drinks'] = self._drink_update_payload
         
     def assign_to_machines(self, machines: List[Any]) -> Any:
+        self._mark_unresettable()
         batch_payload = {
             'menu_id': self._menu_id,
             'serial_num': machines
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import constant
+from api_path import ApiPath, ApiPathInfo, Method, ResponseCode
+from api_external.lib.CommonUtils import APIUtils
+
+
+class ReferenceData:
+    """Process-wide, thread-safe TTL cache for rarely-changing lookup data.
+
+    Entries are keyed by (BACKEND_HOST, name) and kept for REFERENCE_DATA_TTL seconds, or
+    until `invalidate` drops them. Concurrent misses of the same key are single-flighted
+    behind a per-key lock, so a burst of threads creating drinks downloads the flavor catalog
+    once. When REFERENCE_DATA_CACHE_PATH is set the entries are also written there (expiry
+    in wall-clock time) and reused by the next run while they are still fresh.
+
+    `hits` and `misses` count lookups per name.
+    """
+    _lock = threading.Lock()
+    _key_locks: Dict[tuple, threading.Lock] = {}
+    _entries: Dict[tuple, tuple] = {}
+    _loaded_path: Optional[str] = None
+    hits: Dict[str, int] = {}
+    misses: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(name) -> tuple:
+        return constant.BACKEND_HOST, name
+
+    @classmethod
+    def _load_persisted(cls):
+        """Read REFERENCE_DATA_CACHE_PATH once per process, called with `_lock` held"""
+        path = constant.REFERENCE_DATA_CACHE_PATH
+        if not path or cls._loaded_path == path:
+            return
+        cls._loaded_path = path
+        try:
+            with open(path) as cache_file:
+                records = json.load(cache_file)
+        except (FileNotFoundError, ValueError):
+            return
+        now = time.time()
+        for record in records:
+            if record['expires_at'] > now:
+                cls._entries.setdefault((record['host'], record['name']), (record['value'], record['expires_at']))
+
+    @classmethod
+    def _persist(cls):
+        """Write the fresh entries to REFERENCE_DATA_CACHE_PATH, called with `_lock` held"""
+        path = constant.REFERENCE_DATA_CACHE_PATH
+        if not path:
+            return
+        now = time.time()
+        records = [{'host': host, 'name': name, 'value': value, 'expires_at': expires_at}
+                   for (host, name), (value, expires_at) in cls._entries.items() if expires_at > now]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as tmp_file:
+            json.dump(records, tmp_file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def _lookup(cls, key) -> tuple:
+        with cls._lock:
+            cls._load_persisted()
+            entry = cls._entries.get(key)
+        if entry is not None and entry[1] > time.time():
+            return True, entry[0]
+        return False, None
+
+    @classmethod
+    def get(cls, name: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value of `name`, calling `loader` when it is missing or expired.
+        Args:
+            name: Cache key, unique per lookup (and per parameters, if any)
+            loader: Returns the JSON-serializable value to cache
+            ttl: Seconds the value stays fresh (defaults to REFERENCE_DATA_TTL)
+        """
+        key = cls._key(name)
+        found, value = cls._lookup(key)
+        if not found:
+            with cls._lock:
+                key_lock = cls._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another thread may have loaded it while we waited for the lock
+                found, value = cls._lookup(key)
+                if not found:
+                    value = loader()
+                    expires_at = time.time() + (constant.REFERENCE_DATA_TTL if ttl is None else ttl)
+                    with cls._lock:
+                        cls._entries[key] = (value, expires_at)
+                        cls.misses[name] = cls.misses.get(name, 0) + 1
+                        cls._persist()
+                    return value
+        with cls._lock:
+            cls.hits[name] = cls.hits.get(name, 0) + 1
+        return value
+
+    @classmethod
+    def invalidate(cls, name: Optional[str] = None):
+        """Drop one entry of the current backend, or every entry when `name` is None"""
+        with cls._lock:
+            cls._load_persisted()
+            if name is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(cls._key(name), None)
+            cls._persist()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counts per name"""
+        with cls._lock:
+            names = sorted(set(cls.hits) | set(cls.misses))
+            return {name: {'hits': cls.hits.get(name, 0), 'misses': cls.misses.get(name, 0)} for name in names}
+
+    @staticmethod
+    def _get_data(path_info: ApiPathInfo, params=None) -> Any:
+        resp = APIUtils.call_api_and_assert_status_code(path_info, Method.GET, ResponseCode.OK, params=params)
+        return resp.json()['data']
+
+    @classmethod
+    def flavor_types(cls) -> List[Dict[str, str]]:
+        """Flavor class types from /ref/flavor_class_type"""
+        return cls.get('flavor_class_type', lambda: cls._get_data(ApiPathInfo(ApiPath.FLAVOR_CLASS_TYPE)))
+
+    @classmethod
+    def flavor_vendors(cls) -> List[Dict[str, str]]:
+        """Flavor vendors from /flavor-vendors"""
+        return cls.get('flavor_vendors', lambda: cls._get_data(ApiPathInfo(ApiPath.FLAVOR_VENDORS)))
+
+    @classmethod
+    def drink_categories(cls) -> List[Dict[str, Any]]:
+        """Drink categories from /drink-categories"""
+        return cls.get('drink_categories', lambda: cls._get_data(ApiPathInfo(ApiPath.DRINK_CATEGORY)))
+
+    @classmethod
+    def ref(cls, ref_type: str) -> Any:
+        """Reference values of one type from /ref/{type}"""
+        return cls.get(f'ref/{ref_type}', lambda: cls._get_data(ApiPathInfo(ApiPath.REF_TYPE, {'type': ref_type})))
+
+    @classmethod
+    def i18n(cls, params: Optional[List[tuple]] = None) -> Any:
+        """Translations from /i18n, cached per query"""
+        name = 'i18n' if not params else f'i18n?{json.dumps(sorted(params))}'
+        return cls.get(name, lambda: cls._get_data(ApiPathInfo(ApiPath.I18N), params))
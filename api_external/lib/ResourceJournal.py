@@ -0,0 +1,149 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import constant
+
+
+class ResourceJournal:
+    """Append-only record of the resources this machine created and deleted.
+
+    APIEndpointBase.create appends a `create` line for every resource and each class's
+    `delete` a `delete` line, so resources left behind by a killed run can be found and
+    cleaned up afterwards (see ResourceReaper). Lines are written straight to the file
+    with O_APPEND, which keeps them when the process dies and lets pytest-xdist workers
+    share one journal; fsync is batched every RESOURCE_JOURNAL_FSYNC_BATCH lines or
+    RESOURCE_JOURNAL_FSYNC_INTERVAL seconds, and once more at exit.
+    An empty RESOURCE_JOURNAL_PATH disables the journal.
+    """
+    _lock = threading.Lock()
+    _fd: Optional[int] = None
+    _fd_path: str = ''
+    _unsynced = 0
+    _last_sync = 0.0
+
+    @staticmethod
+    def path() -> str:
+        return constant.RESOURCE_JOURNAL_PATH
+
+    @classmethod
+    def _open(cls, path) -> int:
+        if cls._fd is None or cls._fd_path != path:
+            cls._close()
+            cls._fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            cls._fd_path = path
+            size = os.fstat(cls._fd).st_size
+            if size and os.pread(cls._fd, 1, size - 1) != b'\n':
+                # End the line a crashed writer left torn, so it does not swallow the next one
+                os.write(cls._fd, b'\n')
+            cls._last_sync = time.monotonic()
+        return cls._fd
+
+    @classmethod
+    def _close(cls):
+        """Sync and close the journal file; the caller holds the lock"""
+        if cls._fd is not None:
+            cls._sync_locked()
+            os.close(cls._fd)
+            cls._fd = None
+
+    @classmethod
+    def record(cls, op: str, obj: Any):
+        """Append a `create` or `delete` line for `obj`"""
+        path = cls.path()
+        if not path:
+            return
+        line = json.dumps({
+            'op': op,
+            'type': type(obj).__name__,
+            'id': obj.resource_id,
+            'host': constant.BACKEND_HOST,
+            'pid': os.getpid(),
+            'ts': round(time.time(), 3),
+        }) + '\n'
+        with cls._lock:
+            # One write per line: O_APPEND keeps concurrent writers from interleaving
+            os.write(cls._open(path), line.encode('utf-8'))
+            cls._unsynced += 1
+            if (cls._unsynced >= constant.RESOURCE_JOURNAL_FSYNC_BATCH or
+                    time.monotonic() - cls._last_sync >= constant.RESOURCE_JOURNAL_FSYNC_INTERVAL):
+                cls._sync_locked()
+
+    @classmethod
+    def _sync_locked(cls):
+        if cls._fd is not None and cls._unsynced:
+            os.fsync(cls._fd)
+        cls._unsynced = 0
+        cls._last_sync = time.monotonic()
+
+    @classmethod
+    def sync(cls):
+        """Flush the journal to disk"""
+        with cls._lock:
+            cls._sync_locked()
+
+    @staticmethod
+    def recording_deletes(delete):
+        """Wrap a class's `delete` to journal the resources it deleted"""
+        @functools.wraps(delete)
+        def wrapper(obj, *args, **kwargs):
+            resp = delete(obj, *args, **kwargs)
+            if resp:
+                ResourceJournal.record('delete', obj)
+            return resp
+        return wrapper
+
+    @classmethod
+    def read(cls, path=None) -> List[Dict[str, Any]]:
+        """Every complete line of the journal; a line torn by a crash is skipped"""
+        path = path or cls.path()
+        if not path or not os.path.exists(path):
+            return []
+        records = []
+        with open(path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    @staticmethod
+    def alive(records) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """Create records without a later delete, keyed by (host, type, id)"""
+        created = {}
+        for record in records:
+            key = (record.get('host'), record.get('type'), record.get('id'))
+            if record.get('op') == 'create':
+                created[key] = record
+            elif record.get('op') == 'delete':
+                created.pop(key, None)
+        return created
+
+    @classmethod
+    def compact(cls, path=None):
+        """
+        Rewrite the journal with only the resources still alive.
+        Lines another process appends while the journal is rewritten are lost, so this
+        is meant for when no test run is using the journal, e.g. after ResourceReaper.
+        """
+        path = path or cls.path()
+        if not path:
+            return
+        with cls._lock:
+            if cls._fd_path == path:
+                cls._close()
+            records = cls.alive(cls.read(path)).values()
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as journal:
+                journal.writelines(json.dumps(record) + '\n' for record in records)
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(tmp_path, path)
+
+
+atexit.register(ResourceJournal.sync)
@@ -0,0 +1,149 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import constant
+
+
+class ResourcePool:
+    """Warm, session-long supply of created resources of one APIEndpointBase subclass.
+
+    Up to `size` instances are created ahead on a small background executor. A test
+    leases one instead of creating it and releases it afterwards: a released resource is
+    reset to its create-time state through its update path (see APIEndpointBase.reset)
+    and handed out again, and only deleted when it cannot be reset. Every lease and
+    discard schedules a refill. When the pool is empty, `lease` waits up to
+    `lease_timeout` seconds for a refill, then creates the resource inline.
+
+    Pools are per process and keyed by xdist worker, so parallel workers never share
+    an instance; `close_all` deletes the idle instances at the end of the session.
+    """
+    _pools: Dict[Tuple[str, type], 'ResourcePool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, cls, size=None, namespace=None, lease_timeout=None):
+        self.cls = cls
+        self.size = constant.RESOURCE_POOL_SIZE if size is None else int(size)
+        self.namespace = namespace or self.worker_namespace()
+        self.lease_timeout = constant.RESOURCE_POOL_LEASE_TIMEOUT if lease_timeout is None else lease_timeout
+        self.leased = 0
+        self.inline = 0
+        self.reused = 0
+        self.discarded = 0
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max(1, constant.RESOURCE_POOL_CONCURRENCY),
+                                            thread_name_prefix=f'pool-{cls.__name__}')
+
+    @staticmethod
+    def worker_namespace() -> str:
+        """xdist worker id (gw0, gw1, ...), or 'main' outside pytest-xdist"""
+        return os.getenv('PYTEST_XDIST_WORKER', 'main')
+
+    @classmethod
+    def for_class(cls, resource_cls, size=None) -> 'ResourcePool':
+        """Return this worker's pool for `resource_cls`, started on first use"""
+        key = (cls.worker_namespace(), resource_cls)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls._pools[key] = cls(resource_cls, size, key[0])
+                pool.refill()
+        return pool
+
+    @classmethod
+    def close_all(cls):
+        """Close every pool of this worker, deleting their idle resources"""
+        with cls._pools_lock:
+            pools = [pool for (namespace, _), pool in cls._pools.items() if namespace == cls.worker_namespace()]
+            for pool in pools:
+                del cls._pools[(pool.namespace, pool.cls)]
+        for pool in pools:
+            pool.close()
+
+    def _create(self) -> Optional[Any]:
+        obj = self.cls()
+        obj.mark_pooled()
+        try:
+            if obj.create():
+                return obj
+        except Exception as error:
+            print(f'{self.cls.__name__} pool create failed: {error}')
+        return None
+
+    def _fill_one(self):
+        try:
+            obj = None if self._closed else self._create()
+            if obj is not None:
+                self._idle.put(obj)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def refill(self):
+        """Schedule creates until idle and in-flight instances make up `size`"""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - self._idle.qsize() - self._pending
+            self._pending += max(0, missing)
+        for _ in range(missing):
+            self._executor.submit(self._fill_one)
+
+    def _take_idle(self) -> Optional[Any]:
+        """An idle resource, waiting for in-flight refills up to lease_timeout; None if none comes"""
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                pending = self._pending
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                return None
+            try:
+                # Wake up now and then in case the refills fail and nothing is coming
+                return self._idle.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                pass
+
+    def lease(self) -> Any:
+        """Return a created resource for the caller's exclusive use until `release`"""
+        self.leased += 1
+        obj = self._take_idle()
+        if obj is None:
+            self.inline += 1
+            obj = self._create()
+            if obj is None:
+                raise RuntimeError(f'Could not create a {self.cls.__name__} for the pool')
+        self.refill()
+        return obj
+
+    def release(self, obj):
+        """Reset a leased resource and put it back, or delete it when it cannot be reset"""
+        if not self._closed and obj.reset():
+            self.reused += 1
+            self._idle.put(obj)
+            return
+        self.discarded += 1
+        obj.delete()
+        self.refill()
+
+    def close(self):
+        """Stop refilling and delete the idle resources"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        print(f'{self.cls.__name__} pool [{self.namespace}]: {self.leased} leased, {self.inline} created inline, '
+              f'{self.reused} reused, {self.discarded} discarded')
+        self.cls.delete_many(idle)
@@ -0,0 +1,190 @@
+"""Delete test resources left on the backend by killed or crashed runs.
+
+Replays the resource journal (see ResourceJournal) and, with --scan, also looks for
+test-named resources in the list endpoints. The scan only runs against a QA backend
+(see REAPER_SCAN_ENV) unless --force is given, and only takes resources older than
+REAPER_SCAN_MIN_AGE hours that no running process has journaled:
+
+    python -m api_external.lib.ResourceReaper
+    python -m api_external.lib.ResourceReaper --scan --dry-run
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import constant
+from api_external.lib.APIEndpointBase import APIEndpointBase, BatchResult
+from api_external.lib.CommonUtils import StatusCodeError
+from api_external.lib.Corporation import Corporation
+from api_external.lib.Drink import Drink
+from api_external.lib.Flavor import Flavor
+from api_external.lib.Location import Location
+from api_external.lib.Machine import Machine
+from api_external.lib.Menu import Menu
+from api_external.lib.ResourceJournal import ResourceJournal
+from api_external.lib.User import User
+
+
+# Classes deleted together, level by level: menus and drinks before the machines and
+# flavors they use, machines before the locations they are installed at, locations
+# before the corporations owning them
+DELETE_ORDER: List[List[type]] = [
+    [Menu, Drink],
+    [Machine],
+    [Location, Flavor, User],
+    [Corporation],
+]
+
+# List item name field, name prefixes and creation time field of the resources the tests
+# create, for --scan. Locations and drinks have no recognisable names and machines no
+# creation time, so they are only found through the journal (or a --min-age 0 scan).
+TEST_NAME_PREFIXES = {
+    Corporation: ('user_name', ('test_',), 'register_date'),
+    User: ('user_name', ('test_',), 'register_date'),
+    Machine: ('name', ('qatesting-',), None),
+    Menu: ('name', ('QATest_Menu_',), 'date_created'),
+    Flavor: ('name', Flavor.TEST_NAME_PREFIXES, 'date_created'),
+}
+
+
+class ResourceReaper:
+    """Finds orphaned test resources and deletes them concurrently in dependency order.
+
+    Journal entries written by a process that is still running are left alone unless
+    `include_live` is set, so reaping next to a test run does not pull its fixtures away.
+    A resource that is already gone (404) counts as deleted.
+    """
+
+    def __init__(self, concurrency=None, include_live=False, min_age=None):
+        self.concurrency = concurrency or constant.BULK_CONCURRENCY
+        self.include_live = include_live
+        self.min_age = constant.REAPER_SCAN_MIN_AGE if min_age is None else min_age
+        self.orphans: Dict[type, Set[str]] = {cls: set() for level in DELETE_ORDER for cls in level}
+
+    @staticmethod
+    def _process_alive(pid) -> bool:
+        if not pid or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def from_journal(self, path=None) -> int:
+        """Collect the journaled resources of this backend that were never deleted; returns how many"""
+        by_name = {cls.__name__: cls for cls in self.orphans}
+        found = 0
+        for (host, type_name, resource_id), record in ResourceJournal.alive(ResourceJournal.read(path)).items():
+            if host != constant.BACKEND_HOST or type_name not in by_name or not resource_id:
+                continue
+            if not self.include_live and self._process_alive(record.get('pid')):
+                continue
+            self.orphans[by_name[type_name]].add(resource_id)
+            found += 1
+        return found
+
+    @staticmethod
+    def is_scan_host(host) -> bool:
+        """Whether `host` is a REAPER_SCAN_ENV backend, e.g. api.qa.botrista.io"""
+        return constant.REAPER_SCAN_ENV in (urlparse(host).hostname or '').split('.')
+
+    @staticmethod
+    def _created_at(item, field) -> Optional[float]:
+        """Epoch seconds of the item's ISO creation time, None when it has none"""
+        try:
+            return datetime.fromisoformat(str(item[field]).replace('Z', '+00:00')).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _old_enough(self, item, field) -> bool:
+        if not self.min_age:
+            return True
+        created_at = self._created_at(item, field) if field else None
+        return created_at is not None and time.time() - created_at >= self.min_age * 3600
+
+    def _live_ids(self, path=None) -> Set[tuple]:
+        """(type, id) of the journaled resources created by processes still running"""
+        return {(type_name, resource_id)
+                for (_, type_name, resource_id), record in ResourceJournal.alive(ResourceJournal.read(path)).items()
+                if self._process_alive(record.get('pid'))}
+
+    def from_lists(self, path=None) -> int:
+        """
+        Collect the test-named resources in the list endpoints that are older than `min_age`
+        hours and not journaled by a running process; returns how many
+        """
+        live = set() if self.include_live else self._live_ids(path)
+        found = 0
+        for cls, (field, prefixes, created_field) in TEST_NAME_PREFIXES.items():
+            for item in cls.iter_list():
+                resource_id = item.get(cls.RESOURCE_ID_FIELD)
+                if (not resource_id or not str(item.get(field) or '').startswith(prefixes) or
+                        (cls.__name__, resource_id) in live or not self._old_enough(item, created_field)):
+                    continue
+                self.orphans[cls].add(resource_id)
+                found += 1
+        return found
+
+    @staticmethod
+    def _delete(obj) -> bool:
+        try:
+            return bool(obj.delete())
+        except StatusCodeError as error:
+            if error.status_code != 404:
+                raise
+            ResourceJournal.record('delete', obj)
+            return True
+
+    def reap(self) -> List[BatchResult]:
+        """Delete every collected orphan, one DELETE_ORDER level after the other"""
+        results = []
+        for level in DELETE_ORDER:
+            objs = [cls.from_resource_id(resource_id) for cls in level for resource_id in sorted(self.orphans[cls])]
+            if objs:
+                names = '/'.join(cls.__name__ for cls in level)
+                results.append(APIEndpointBase._run_batch(f'Reap {names}', objs, self._delete, self.concurrency))
+        ResourceJournal.sync()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--journal', default=None, help='journal file (defaults to RESOURCE_JOURNAL_PATH)')
+    parser.add_argument('--scan', action='store_true', help='also find test-named resources in the list endpoints')
+    parser.add_argument('--include-live', action='store_true', help='also reap resources of running processes')
+    parser.add_argument('--min-age', type=float, default=None,
+                        help='hours a scanned resource must exist first (defaults to REAPER_SCAN_MIN_AGE)')
+    parser.add_argument('--force', action='store_true', help=f'scan even when BACKEND_HOST is not a '
+                                                             f'{constant.REAPER_SCAN_ENV} backend')
+    parser.add_argument('--concurrency', type=int, default=None, help='deletes in flight at once')
+    parser.add_argument('--dry-run', action='store_true', help='only list what would be deleted')
+    args = parser.parse_args()
+    if args.journal:
+        constant.RESOURCE_JOURNAL_PATH = args.journal
+
+    if args.scan and not args.force and not ResourceReaper.is_scan_host(constant.BACKEND_HOST):
+        parser.error(f'--scan deletes by name and {constant.BACKEND_HOST} is not a {constant.REAPER_SCAN_ENV} '
+                     f'backend; pass --force to scan it anyway')
+
+    reaper = ResourceReaper(args.concurrency, args.include_live, args.min_age)
+    print(f'{reaper.from_journal()} orphans in the journal')
+    if args.scan:
+        print(f'{reaper.from_lists()} test-named resources in the list endpoints')
+    for cls, resource_ids in reaper.orphans.items():
+        if resource_ids:
+            print(f'{cls.__name__}: {len(resource_ids)}')
+    if args.dry_run:
+        return
+    failed = sum(len(result.failed) for result in reaper.reap())
+    ResourceJournal.compact()
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Precompiled, mmap-able form of swagger.json.
+
+Build (normally done automatically on first use):
+
+    python -m api_external.lib.SchemaArtifact
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import constant
+
+
+class SchemaArtifact:
+    """Binary artifact holding every response schema of swagger.json, ready to validate.
+
+    Layout: a fixed header (magic, sha256 of the source document, index length), a JSON
+    index, then one compact JSON blob per schema. The index maps "METHOD path status"
+    to the response schema blob's (offset, length), "METHOD path" to the request body
+    schema blob and, under `fields`, to the `fields[]` enum of its query parameters. Refs are already resolved and nullable
+    types transformed, so a lookup only deserializes the one blob it needs.
+    """
+    MAGIC = b'CBSCHEM2'
+    HEADER = struct.Struct('<8s32sI')
+
+    def __init__(self, artifact_path=None):
+        self.artifact_path = artifact_path or constant.SCHEMA_ARTIFACT_PATH
+        with open(self.artifact_path, 'rb') as artifact_file:
+            self._mmap = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source_digest, index_length = self.HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC:
+            self._mmap.close()
+            raise ValueError(f'Not a schema artifact: {self.artifact_path}')
+        index_start = self.HEADER.size
+        index = json.loads(self._mmap[index_start:index_start + index_length])
+        self._blob_start = index_start + index_length
+        self._schemas = index['schemas']
+        self._requests = index['requests']
+        self._fields = index['fields']
+
+    @staticmethod
+    def _schema_key(path, method, status):
+        return f'{method.upper()} {path} {status}'
+
+    @staticmethod
+    def _fields_key(path, method):
+        return f'{method.upper()} {path}'
+
+    @staticmethod
+    def source_digest_of(source_path) -> bytes:
+        with open(source_path, 'rb') as source_file:
+            return hashlib.sha256(source_file.read()).digest()
+
+    @classmethod
+    def build(cls, source_path=None, artifact_path=None) -> str:
+        """Compile `source_path` into `artifact_path` and return the artifact path"""
+        # Imported here because JSONSchemaLibrary itself loads artifacts through this module
+        from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
+        from api_external.lib.SchemaResolver import SchemaResolver
+
+        source_path = source_path or constant.SCHEMA_FILE_PATH
+        artifact_path = artifact_path or constant.SCHEMA_ARTIFACT_PATH
+        with open(source_path, 'rb') as source_file:
+            source = source_file.read()
+        document = json.loads(source)
+        resolver = SchemaResolver(document)
+
+        schemas, requests, fields, blobs, offset = {}, {}, {}, [], 0
+        for path, operations in document.get('paths', {}).items():
+            for method, operation in operations.items():
+                if method == 'parameters' or not isinstance(operation, dict):
+                    continue
+                for param in resolver.resolve(['paths', path, method, 'parameters'], []):
+                    if param.get('name') == 'fields':
+                        enum = JSONSchemaLibrary.get_nested_value(param, ['schema', 'items', 'enum'], [])
+                        fields[cls._fields_key(path, method)] = list(enum)
+                        break
+                request_schema = resolver.request_schema(path, method)
+                if request_schema:
+                    blob = json.dumps(request_schema, separators=(',', ':')).encode('utf-8')
+                    requests[cls._fields_key(path, method)] = [offset, len(blob)]
+                    blobs.append(blob)
+                    offset += len(blob)
+                for status in operation.get('responses', {}):
+                    schema = resolver.operation_schema(path, method, status)
+                    if not schema:
+                        continue
+                    schema = JSONSchemaLibrary.transform_nullable_types(schema)
+                    blob = json.dumps(schema, separators=(',', ':')).encode('utf-8')
+                    schemas[cls._schema_key(path, method, status)] = [offset, len(blob)]
+                    blobs.append(blob)
+                    offset += len(blob)
+
+        index = json.dumps({'schemas': schemas, 'requests': requests, 'fields': fields},
+                           separators=(',', ':')).encode('utf-8')
+        header = cls.HEADER.pack(cls.MAGIC, hashlib.sha256(source).digest(), len(index))
+        # Write next to the target and rename so readers never see a partial artifact
+        tmp_path = f'{artifact_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as artifact_file:
+            artifact_file.write(header)
+            artifact_file.write(index)
+            for blob in blobs:
+                artifact_file.write(blob)
+        os.replace(tmp_path, artifact_path)
+        return artifact_path
+
+    @classmethod
+    def load(cls, source_path=None, artifact_path=None) -> 'SchemaArtifact':
+        """Open the artifact, rebuilding it first if it is missing or was built from another source"""
+        source_path = source_path or constant.SCHEMA_FILE_PATH
+        artifact_path = artifact_path or constant.SCHEMA_ARTIFACT_PATH
+        source_digest = cls.source_digest_of(source_path)
+        if Path(artifact_path).is_file():
+            try:
+                artifact = cls(artifact_path)
+                if artifact.source_digest == source_digest:
+                    return artifact
+                artifact.close()
+            except (ValueError, struct.error):
+                pass
+        cls.build(source_path, artifact_path)
+        return cls(artifact_path)
+
+    def _read_blob(self, location):
+        if location is None:
+            return None
+        offset, length = location
+        start = self._blob_start + offset
+        return json.loads(self._mmap[start:start + length])
+
+    def operation_schema(self, path, method, status):
+        """Return the transformed response schema of one operation, or None if it is not documented"""
+        return self._read_blob(self._schemas.get(self._schema_key(path, method, status)))
+
+    def request_schema(self, path, method):
+        """Return the request body schema of one operation, or None if it takes no JSON body"""
+        return self._read_blob(self._requests.get(self._fields_key(path, method)))
+
+    def request_fields(self, path, method):
+        """Return the `fields[]` enum of an operation's query parameters"""
+        return self._fields.get(self._fields_key(path, method), [])
+
+    def close(self):
+        self._mmap.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile swagger.json into a schema artifact')
+    parser.add_argument('--source', default=constant.SCHEMA_FILE_PATH)
+    parser.add_argument('--output', default=constant.SCHEMA_ARTIFACT_PATH)
+    args = parser.parse_args()
+    print(f'Schema artifact written to {SchemaArtifact.build(args.source, args.output)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import copy
+import random
+import re
+import string
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+class SchemaFaker:
+    """Builds request payloads that satisfy a resolved JSON schema, e.g. SchemaCache.request_schema.
+
+    Documented examples are preferred, since they are what the backend expects to see;
+    otherwise values are drawn at random within the schema's enum, bounds and formats.
+    Required properties are always filled in, optional ones with probability
+    `optional_ratio`. Numbers named like a timestamp or a date get the current epoch
+    milliseconds, so generated log entries are recent.
+    """
+    MAX_DEPTH = 8
+    MAX_ITEMS = 3
+    TYPES = {'string': str, 'integer': int, 'number': (int, float), 'boolean': bool, 'object': dict, 'array': list}
+
+    def __init__(self, seed=None, optional_ratio=0.5):
+        self.rng = random.Random(seed)
+        self.optional_ratio = optional_ratio
+        self._defs: Dict[str, Any] = {}
+
+    def sample(self, schema: Optional[Dict[str, Any]]) -> Any:
+        """Return a value valid against `schema`, or None for a missing schema"""
+        if not schema:
+            return None
+        self._defs = schema.get('$defs', {})
+        return self._sample(schema, '', 0)
+
+    @staticmethod
+    def _is_time_name(name) -> bool:
+        return 'timestamp' in name or name.endswith('_date') or name.endswith('_at')
+
+    def _sample(self, schema, name, depth):
+        if not isinstance(schema, dict):
+            return None
+        if '$ref' in schema:
+            return self._sample(self._defs.get(schema['$ref'].rsplit('/', 1)[-1], {}), name, depth + 1)
+        if 'const' in schema:
+            return copy.deepcopy(schema['const'])
+        if 'enum' in schema:
+            return copy.deepcopy(self.rng.choice(schema['enum']))
+        for keyword in ('oneOf', 'anyOf'):
+            if schema.get(keyword):
+                return self._sample(self.rng.choice(schema[keyword]), name, depth + 1)
+        if schema.get('allOf'):
+            merged = {}
+            for part in schema['allOf']:
+                merged.setdefault('properties', {}).update(part.get('properties', {}))
+                merged.setdefault('required', []).extend(part.get('required', []))
+            return self._sample({'type': 'object', **merged}, name, depth + 1)
+
+        schema_type = schema.get('type')
+        if isinstance(schema_type, list):
+            schema_type = next((item for item in schema_type if item != 'null'), 'null')
+        if schema_type is None:
+            schema_type = 'object' if 'properties' in schema else 'array' if 'items' in schema else None
+        if schema_type in ('number', 'integer') and self._is_time_name(name):
+            return int(time.time() * 1000)
+        if 'example' in schema and self._example_fits(schema, schema_type):
+            return copy.deepcopy(schema['example'])
+
+        if schema_type == 'object':
+            return self._sample_object(schema, depth)
+        if schema_type == 'array':
+            return self._sample_array(schema, name, depth)
+        if schema_type == 'string':
+            return self._sample_string(schema)
+        if schema_type == 'integer':
+            return self.rng.randint(int(schema.get('minimum', 0)), int(schema.get('maximum', 1000)))
+        if schema_type == 'number':
+            return round(self.rng.uniform(schema.get('minimum', 0), schema.get('maximum', 1000)), 2)
+        if schema_type == 'boolean':
+            return self.rng.random() < 0.5
+        return None
+
+    def _example_fits(self, schema, schema_type) -> bool:
+        """Some documented examples contradict their own schema; those are not reused"""
+        example = schema['example']
+        expected = self.TYPES.get(schema_type)
+        if expected is not None and (not isinstance(example, expected) or
+                                     (schema_type != 'boolean' and isinstance(example, bool))):
+            return False
+        return not (isinstance(example, str) and 'pattern' in schema and not re.search(schema['pattern'], example))
+
+    def _sample_object(self, schema, depth):
+        required = set(schema.get('required', []))
+        value = {}
+        for prop, prop_schema in schema.get('properties', {}).items():
+            if prop in required or (depth < self.MAX_DEPTH and self.rng.random() < self.optional_ratio):
+                value[prop] = self._sample(prop_schema, prop, depth + 1)
+        return value
+
+    def _sample_array(self, schema, name, depth):
+        low = schema.get('minItems', 0)
+        high = max(low, min(schema.get('maxItems', self.MAX_ITEMS), self.MAX_ITEMS))
+        count = self.rng.randint(low, high) if depth < self.MAX_DEPTH else low
+        items = schema.get('items', {})
+        if schema.get('uniqueItems') and 'enum' in items:
+            return self.rng.sample(items['enum'], min(count, len(items['enum'])))
+        return [self._sample(items, name, depth + 1) for _ in range(count)]
+
+    def _sample_string(self, schema):
+        string_format = schema.get('format')
+        if string_format == 'date-time':
+            return datetime.now(timezone.utc).isoformat()
+        if string_format == 'date':
+            return datetime.now(timezone.utc).date().isoformat()
+        if string_format == 'email':
+            return f'{self._letters(8)}@example.com'
+        if string_format == 'uuid':
+            return str(uuid.UUID(int=self.rng.getrandbits(128)))
+        low = schema.get('minLength', 1)
+        high = max(low, schema.get('maxLength', 12))
+        length = self.rng.randint(low, min(high, max(low, 12)))
+        if 'pattern' not in schema:
+            return self._letters(length)
+        # Good enough for the simple character-class patterns the swagger document uses
+        for alphabet in (string.ascii_uppercase, string.ascii_lowercase, string.digits,
+                         string.ascii_letters + string.digits):
+            candidate = self._letters(length, alphabet)
+            if re.search(schema['pattern'], candidate):
+                return candidate
+        return self._letters(length)
+
+    def _letters(self, length, alphabet=string.ascii_lowercase + string.digits):
+        return ''.join(self.rng.choices(alphabet, k=length))
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+import constant
+from api_path import ResponseCode
+from api_external.lib.HttpRequestInit import HttpRequestInit
+
+
+class SchemaFetcher:
+    """Tracks the current version of the swagger document served by a host.
+
+    The bundled SCHEMA_FILE_PATH is tracked by git and never written. Every downloaded
+    version is stored once under SCHEMA_STORE_DIR/objects, named by its sha256, and
+    `current_path` points readers at the current one, so they always see a complete
+    document. The digest, ETag and Last-Modified of the current version are kept in
+    SCHEMA_STORE_DIR/meta, one file per source URL, and the last two are sent back as
+    If-None-Match / If-Modified-Since, so an unchanged document costs a 304. Without a meta
+    file the bundled document counts as checked just now, so the first use costs no request.
+
+    Revalidation is opt-in: a document is trusted for SCHEMA_MAX_AGE seconds, and a negative
+    max-age (the default) never revalidates once a version exists. A failed revalidation is
+    recorded as a check too, so the next attempt waits another max-age.
+    Revalidation runs under an exclusive file lock per source URL and re-checks freshness
+    once the lock is held, so parallel workers download a new version at most once while
+    documents of different hosts can still be fetched side by side.
+    """
+    _lock = threading.Lock()
+    _checked = {}
+
+    def __init__(self, host=None, json_path=None, schema_file_path=None, store_dir=None, max_age=None):
+        self.host = host or constant.BACKEND_HOST
+        self.json_path = json_path or constant.SWAGGER_JSON_PATH
+        # Bundled copy of the document, '' when the host has none
+        self.schema_file_path = constant.SCHEMA_FILE_PATH if schema_file_path is None else schema_file_path
+        self.store_dir = store_dir or constant.SCHEMA_STORE_DIR
+        self.max_age = constant.SCHEMA_MAX_AGE if max_age is None else max_age
+        self.url = f'{self.host}/{self.json_path}'
+        url_key = hashlib.sha1(self.url.encode('utf-8')).hexdigest()[:16]
+        self.meta_path = os.path.join(self.store_dir, 'meta', f'{url_key}.json')
+        self.lock_path = os.path.join(self.store_dir, 'meta', f'{url_key}.lock')
+
+    def object_path(self, digest) -> str:
+        return os.path.join(self.store_dir, 'objects', f'{digest}.json')
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as meta_file:
+                return json.load(meta_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, entry):
+        os.makedirs(os.path.dirname(self.meta_path), exist_ok=True)
+        self._atomic_write(self.meta_path, json.dumps({'url': self.url, **entry}, indent=2).encode('utf-8'))
+
+    def _seed_meta(self):
+        """Take the bundled document as the current version, checked just now"""
+        if not Path(self.schema_file_path).is_file():
+            return {}
+        entry = {'digest': self.digest_of(self.schema_file_path), 'checked_at': time.time()}
+        self._write_meta(entry)
+        return entry
+
+    @staticmethod
+    def _atomic_write(path, content):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def digest_of(path):
+        with open(path, 'rb') as schema_file:
+            return hashlib.sha256(schema_file.read()).hexdigest()
+
+    def current_path(self, entry=None) -> str:
+        """Path of the current document: the stored version named by the meta file, else the bundled one"""
+        entry = self._read_meta() if entry is None else entry
+        if entry.get('digest') and Path(self.object_path(entry['digest'])).is_file():
+            return self.object_path(entry['digest'])
+        return self.schema_file_path
+
+    def has_document(self, entry=None) -> bool:
+        return Path(self.current_path(entry)).is_file()
+
+    def is_fresh(self, entry) -> bool:
+        """Whether the version described by `entry` exists and was checked less than max-age ago"""
+        if not entry or not self.has_document(entry):
+            return False
+        return self.max_age < 0 or time.time() - entry.get('checked_at', 0) < self.max_age
+
+    def _download(self, entry):
+        headers = {'accept': 'application/json'}
+        conditional = Path(self.object_path(entry.get('digest', ''))).is_file()
+        if conditional and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if conditional and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        # Streamed so the document is not echoed to the log and a 304 is not parsed as JSON
+        resp = HttpRequestInit(self.host).request('GET', f'/{self.json_path}', headers=headers, stream=True,
+                                                  timeout=constant.SCHEMA_FETCH_TIMEOUT)
+        if resp.status_code == 304 and conditional:
+            print(f'Swagger document {self.url} not modified')
+            return dict(entry, checked_at=time.time())
+        if resp.status_code != ResponseCode.OK.value:
+            raise RuntimeError(f'Failed to fetch {self.url}: HTTP {resp.status_code}')
+
+        content = resp.content
+        json.loads(content)  # never store a truncated or non-JSON document
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self.object_path(digest)
+        if not Path(object_path).is_file():
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self._atomic_write(object_path, content)
+        print(f'Swagger document {self.url} updated to {digest[:12]}')
+        return {
+            'digest': digest,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        }
+
+    def fetch(self, force=False) -> str:
+        """Make sure a current version exists, revalidating when it is older than max-age
+
+        Args:
+            force: Revalidate even if the current version is still fresh
+
+        Returns:
+            The path of the current document, see `current_path`
+        """
+        if not force:
+            entry = self._read_meta()
+            if self.is_fresh(entry):
+                return self.current_path(entry)
+        with self._file_lock():
+            entry = self._read_meta() or self._seed_meta()
+            # Another worker may have revalidated while we waited for the lock
+            if not force and self.is_fresh(entry):
+                return self.current_path(entry)
+            try:
+                entry = self._download(entry)
+            except Exception as error:
+                if not self.has_document(entry):
+                    raise
+                print(f'Keeping the current swagger document, revalidation failed: {error}')
+                entry = dict(entry, checked_at=time.time())
+            self._write_meta(entry)
+            return self.current_path(entry)
+
+    @classmethod
+    def ensure_current(cls) -> str:
+        """Cheap per-process wrapper around `fetch` for BACKEND_HOST, returning the current document's path"""
+        fetcher = cls()
+        if fetcher.max_age < 0:
+            path = fetcher.current_path()
+            if Path(path).is_file():
+                return path
+        with cls._lock:
+            checked_at = cls._checked.get(fetcher.url)
+            if checked_at is not None and time.time() - checked_at < fetcher.max_age:
+                path = fetcher.current_path()
+                if Path(path).is_file():
+                    return path
+            path = fetcher.fetch()
+            cls._checked[fetcher.url] = time.time()
+            return path
@@ -0,0 +1,122 @@
+import re
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import unquote
+
+
+class SchemaResolver:
+    """Resolves the `$ref`s reachable from one node of the swagger document, on demand.
+
+    Only the refs reachable from the requested node are followed, so answering a query for
+    one operation costs time and memory proportional to that operation's schema rather than
+    to the whole document. Resolved ref targets are memoized by JSON pointer and shared
+    across operations; results must therefore be treated as read-only.
+
+    Recursive refs are not expanded: a ref back into a target that is still being resolved
+    becomes `{"$ref": "#/$defs/<name>"}` and the target is attached once under `$defs` of
+    the operation schema that needs it, which is how JSON Schema expresses recursion.
+    Like jsonref, keywords next to a `$ref` are ignored.
+    """
+    DEFS_PREFIX = '#/$defs/'
+
+    def __init__(self, document: Dict[str, Any]):
+        self.document = document
+        self._resolved: Dict[str, Any] = {}
+        self._defs: Dict[str, Any] = {}
+
+    @staticmethod
+    def pointer_to_keys(pointer: str) -> List[str]:
+        if not pointer.startswith('#'):
+            raise ValueError(f'Only local refs are supported: {pointer}')
+        parts = unquote(pointer[1:]).split('/')[1:]
+        return [part.replace('~1', '/').replace('~0', '~') for part in parts]
+
+    @staticmethod
+    def keys_to_pointer(keys) -> str:
+        return '#/' + '/'.join(str(key).replace('~', '~0').replace('/', '~1') for key in keys)
+
+    @staticmethod
+    def def_name(pointer: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', pointer.lstrip('#/'))
+
+    def _lookup(self, keys) -> Any:
+        node = self.document
+        for key in keys:
+            # Follow refs met on the way, e.g. a parameter list that is itself a ref
+            while isinstance(node, dict) and '$ref' in node:
+                node = self._lookup(self.pointer_to_keys(node['$ref']))
+            if isinstance(node, list):
+                key = int(key)
+            node = node[key]
+        return node
+
+    def _resolve_ref(self, pointer: str, stack: List[str]) -> Any:
+        if pointer in self._resolved:
+            return self._resolved[pointer]
+        if pointer in stack:
+            # Recursion: refer to the shared definition instead of expanding again
+            name = self.def_name(pointer)
+            self._defs.setdefault(name, None)
+            return {'$ref': self.DEFS_PREFIX + name}
+        stack.append(pointer)
+        try:
+            resolved = self._resolve(self._lookup(self.pointer_to_keys(pointer)), stack)
+        finally:
+            stack.pop()
+        self._resolved[pointer] = resolved
+        name = self.def_name(pointer)
+        if name in self._defs:
+            self._defs[name] = resolved
+        return resolved
+
+    def _resolve(self, node: Any, stack: List[str]) -> Any:
+        if isinstance(node, dict):
+            if isinstance(node.get('$ref'), str):
+                return self._resolve_ref(node['$ref'], stack)
+            return {key: self._resolve(value, stack) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._resolve(item, stack) for item in node]
+        return node
+
+    def _collect_def_names(self, node: Any, found: Set[str]):
+        if isinstance(node, dict):
+            ref = node.get('$ref')
+            if isinstance(ref, str) and ref.startswith(self.DEFS_PREFIX):
+                name = ref[len(self.DEFS_PREFIX):]
+                if name not in found:
+                    found.add(name)
+                    self._collect_def_names(self._defs[name], found)
+                return
+            for value in node.values():
+                self._collect_def_names(value, found)
+        elif isinstance(node, list):
+            for item in node:
+                self._collect_def_names(item, found)
+
+    def resolve(self, keys, default=None) -> Any:
+        """Return the node at `keys` with every reachable ref resolved, or `default` if it is missing"""
+        try:
+            return self._resolve_ref(self.keys_to_pointer(keys), [])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return default
+
+    def resolve_schema(self, keys) -> Optional[Dict[str, Any]]:
+        """Like `resolve`, but attach the `$defs` needed by recursive refs so the result is self-contained"""
+        schema = self.resolve(keys)
+        if not isinstance(schema, dict):
+            return schema
+        def_names: Set[str] = set()
+        self._collect_def_names(schema, def_names)
+        if def_names:
+            schema = dict(schema)
+            schema['$defs'] = {name: self._defs[name] for name in sorted(def_names)}
+        return schema
+
+    def operation_schema(self, path, method, status) -> Optional[Dict[str, Any]]:
+        """Return the resolved JSON response schema of one operation, or None if it is not documented"""
+        keys = ['paths', path, method, 'responses', status, 'content', 'application/json', 'schema']
+        return self.resolve_schema(keys)
+
+    def request_schema(self, path, method) -> Optional[Dict[str, Any]]:
+        """Return the resolved JSON request body schema of one operation, or None if it takes no JSON body"""
+        keys = ['paths', path, method, 'requestBody', 'content', 'application/json', 'schema']
+        return self.resolve_schema(keys)
@@ -0,0 +1,54 @@
+from typing import Iterator
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+from api_external.lib.ArrayValidator import ArrayValidator
+
+
+class StreamingValidator(ArrayValidator):
+    """Validates a JSON document while it is being parsed, one array item at a time.
+
+    Items of the item array are rebuilt one by one from ijson events, validated against
+    the item schema and dropped, so memory stays bounded by the largest single item however
+    long the list is. The envelope is validated with that array left empty. Error paths
+    are reported as ArrayValidator describes.
+    """
+
+    def __init__(self, schema, array_path=None):
+        if ijson is None:
+            raise ImportError('ijson is required for streaming validation: pip install ijson')
+        super().__init__(schema, array_path)
+        self.item_prefix = '.'.join(self.array_path + ['item'])
+
+    def iter_errors(self, source) -> Iterator:
+        """Yield validation errors of the JSON document read incrementally from `source`
+
+        Args:
+            source: A binary file-like object, e.g. `resp.raw` of a streamed requests response
+        """
+        envelope = ijson.ObjectBuilder()
+        item, index, depth = None, 0, 0
+        for prefix, event, value in ijson.parse(source, use_float=True):
+            if item is not None:
+                item.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                if depth == 0:
+                    yield from self.item_errors(index, item.value)
+                    item, index = None, index + 1
+            elif prefix == self.item_prefix and event not in ('end_array', 'map_key'):
+                # First event of a new array item: a scalar, or the start of an object/array
+                item = ijson.ObjectBuilder()
+                item.event(event, value)
+                depth = 1 if event in ('start_map', 'start_array') else 0
+                if depth == 0:
+                    yield from self.item_errors(index, item.value)
+                    item, index = None, index + 1
+            else:
+                envelope.event(event, value)
+        yield from self.envelope_validator.iter_errors(envelope.value)
@@ -5,6 +5,7 @@ import json
 import constant
 from api_path import *
 from api_external.lib.HttpRequestInit import HttpRequestInit
+from api_external.lib.SchemaFetcher import SchemaFetcher
 
 
 class SwaggerHiker(object):
@@ -14,26 +15,24 @@ class SwaggerHiker(object):
         self.swagger_host_list = constant.SWAGGER_HOST_LIST
         self.json_path = constant.SWAGGER_JSON_PATH
         self.schema_file_path = constant.SCHEMA_FILE_PATH
-        self.http_session = HttpRequestInit(self.backend_host)
+        self.http_session = HttpRequestInit(self.backend_host, route=True)
     
     # ---------------------------------------------------------------------------
     def swagger_get_schema(self):
-        resp = self.http_session.request(
-            'GET',
-            f'/{self.json_path}'
-        )
-        with open(self.schema_file_path, 'w') as schema_file:
-            schema_file.write(resp.text)
+        # Conditional request under a file lock; a new version goes to the store, not the bundled file
+        return SchemaFetcher(self.backend_host, self.json_path, self.schema_file_path).fetch(force=True)
     
-    def swagger_get_auth(self, token_type, token_action='access'):
+    def swagger_get_auth(self, token_type, token_action='access', credential=None):
         if token_type == TokenType.USER_TOKEN:
-            credential = {
+            credential = credential or {
                 'user_name': constant.TEST_USER_NAME_ACCOUNT,
                 'password': constant.TEST_USER_ACCOUNT
             }
-            self.http_session.user_auth_header(token_type, credential)
+            self.http_session.user_auth_header(token_type, credential, token_action)
         else:
-            self.http_session.machine_auth_header()
+            if credential is None:
+                raise ValueError('Machine token endpoints need a machine credential, see Machine.machine_credential')
+            self.http_session.machine_auth_header(credential, token_action)
     
     def swagger_search(self, path, method, header=None, **kwargs):
         if header:
@@ -0,0 +1,128 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import constant
+from api_external.lib.SchemaFetcher import SchemaFetcher
+
+
+class SwaggerIndex:
+    """Path ownership index of the configured hosts, read from their swagger documents.
+
+    The swagger documents only tell which paths each configured host owns; requests are
+    always sent to the configured BACKEND_HOST or SALES_DASHBOARD_HOST, never to the hosts
+    the documents were read from (BACKEND_SWAGGER_HOST, SALES_DASHBOARD_SWAGGER_HOST).
+    The documents are fetched concurrently through SchemaFetcher (only BACKEND_HOST has a
+    bundled copy, SCHEMA_FILE_PATH). When both document a path, BACKEND_HOST owns it.
+
+    `host_for` maps a concrete request path such as `/locations/QLY001` to its owning host,
+    preferring templates with more literal segments, so `/users/me` beats `/users/{id}`.
+    The index is rebuilt when the configured hosts change.
+    """
+    ROUTE_CACHE_SIZE = 4096
+    _lock = threading.RLock()
+    _owners: Optional[Dict[str, str]] = None
+    _owners_key: Optional[tuple] = None
+    _templates: Dict[int, List] = {}
+    _routes = OrderedDict()
+
+    @staticmethod
+    def targets() -> List[Tuple[str, str]]:
+        """(host requests are sent to, host its swagger document is read from), owner of overlaps first"""
+        targets = []
+        for host, document_host in [
+            (constant.BACKEND_HOST, constant.BACKEND_SWAGGER_HOST or constant.BACKEND_HOST),
+            (constant.SALES_DASHBOARD_HOST, constant.SALES_DASHBOARD_SWAGGER_HOST),
+        ]:
+            if host and document_host and host not in dict(targets):
+                targets.append((host, document_host))
+        return targets
+
+    @staticmethod
+    def schema_file_path(host) -> str:
+        """Bundled copy of the host's swagger document, '' if it has none"""
+        return constant.SCHEMA_FILE_PATH if host == constant.BACKEND_HOST else ''
+
+    @classmethod
+    def _fetch_paths(cls, host) -> List[str]:
+        try:
+            schema_path = SchemaFetcher(host, schema_file_path=cls.schema_file_path(host)).fetch()
+        except Exception as error:
+            print(f'Skipping swagger document of {host}: {error}')
+            return []
+        with open(schema_path) as schema_file:
+            return list(json.load(schema_file).get('paths', {}))
+
+    @staticmethod
+    def _template_pattern(template):
+        segments = template.strip('/').split('/')
+        pattern = '/'.join('[^/]+' if re.fullmatch(r'\{[^}]+\}', segment) else re.escape(segment)
+                           for segment in segments)
+        literal_count = sum(1 for segment in segments if not segment.startswith('{'))
+        return len(segments), re.compile(f'/{pattern}/?'), literal_count
+
+    @classmethod
+    def load(cls):
+        """Fetch every configured host's swagger document and build the path-to-host index"""
+        with cls._lock:
+            targets = cls.targets()
+            if cls._owners is not None and cls._owners_key == tuple(targets):
+                return
+            with ThreadPoolExecutor(max_workers=max(len(targets), 1)) as executor:
+                paths_by_host = list(executor.map(cls._fetch_paths, [document for _, document in targets]))
+
+            owners, templates = {}, {}
+            for (host, _), paths in zip(targets, paths_by_host):
+                for template in paths:
+                    if template in owners:
+                        continue
+                    owners[template] = host
+                    segment_count, pattern, literal_count = cls._template_pattern(template)
+                    templates.setdefault(segment_count, []).append((literal_count, pattern, host))
+            for candidates in templates.values():
+                candidates.sort(key=lambda candidate: -candidate[0])
+            cls._owners, cls._owners_key, cls._templates = owners, tuple(targets), templates
+            cls._routes.clear()
+            print(f'Swagger index: {len(owners)} paths over {sum(1 for paths in paths_by_host if paths)} hosts')
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        return cls._owners is not None and cls._owners_key == tuple(cls.targets())
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._owners = None
+            cls._owners_key = None
+            cls._templates = {}
+            cls._routes.clear()
+
+    @classmethod
+    def owner(cls, template) -> Optional[str]:
+        """Return the host owning a path template, e.g. `ApiPath.LOCATION_DETAIL.value.path`"""
+        cls.load()
+        return cls._owners.get(template)
+
+    @classmethod
+    def host_for(cls, path) -> Optional[str]:
+        """Return the host owning a concrete request path, or None if no swagger document has it"""
+        path = path.split('?', 1)[0]
+        with cls._lock:
+            cls.load()
+            if path in cls._routes:
+                cls._routes.move_to_end(path)
+                return cls._routes[path]
+            host = cls._owners.get(path)
+            if host is None:
+                segment_count = len(path.strip('/').split('/'))
+                for _, pattern, candidate in cls._templates.get(segment_count, []):
+                    if pattern.fullmatch(path):
+                        host = candidate
+                        break
+            cls._routes[path] = host
+            while len(cls._routes) > cls.ROUTE_CACHE_SIZE:
+                cls._routes.popitem(last=False)
+            return host
@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+import constant
+
+
+class TeardownQueue:
+    """Process-wide background queue for fixture cleanup.
+
+    Tests hand their deletes to `submit` and move on, so the next test does not wait
+    for cleanup whose result nobody checks right away. A job can wait for other jobs
+    first (a location is deleted after the machines installed at it). Transient
+    failures (connection errors, 429 and 5xx responses) are retried with exponential
+    backoff; a 404 on a retry means an earlier attempt went through. `drain` waits for
+    the queue to empty at the end of the session and returns what is still outstanding.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, workers=None, retries=None, backoff=None):
+        self.workers = workers or constant.TEARDOWN_CONCURRENCY
+        self.retries = constant.TEARDOWN_RETRIES if retries is None else retries
+        self.backoff = constant.TEARDOWN_RETRY_BACKOFF if backoff is None else backoff
+        self.completed = 0
+        self.retried = 0
+        self.failed: List[Tuple[str, BaseException]] = []
+        self._pending: Dict[Future, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix='teardown')
+
+    @classmethod
+    def instance(cls) -> 'TeardownQueue':
+        """Return the process-wide teardown queue"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def started(cls) -> Optional['TeardownQueue']:
+        """Return the process-wide teardown queue if anything created it, without creating one"""
+        return cls._instance
+
+    @staticmethod
+    def status_code(error) -> Optional[int]:
+        """HTTP status of a failed APIUtils.call_api_and_assert_status_code (a StatusCodeError), else None"""
+        return getattr(error, 'status_code', None)
+
+    @classmethod
+    def is_transient(cls, error) -> bool:
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if httpx is not None and isinstance(error, httpx.TransportError):
+            return True
+        status = cls.status_code(error)
+        return status is not None and (status == 429 or status >= 500)
+
+    def submit(self, label: str, call: Callable[[], object], after: Iterable[Future] = ()) -> Future:
+        """
+        Run `call()` in the background once every future in `after` is done.
+        Jobs only ever wait on jobs submitted before them, so the queue cannot deadlock.
+        Args:
+            label: What is being cleaned up, for the session end report
+            call: The cleanup itself, e.g. `obj.delete`
+            after: Futures of jobs that must finish first, whether they succeed or not
+        """
+        future = self._executor.submit(self._run, label, call, list(after))
+        with self._lock:
+            self._pending[future] = label
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.pop(future, None)
+
+    def _run(self, label, call, after):
+        wait(after)
+        for attempt in range(self.retries + 1):
+            try:
+                result = call()
+                self.completed += 1
+                return result
+            except Exception as error:
+                if attempt and self.status_code(error) == 404:
+                    self.completed += 1
+                    return None
+                if attempt == self.retries or not self.is_transient(error):
+                    print(f'Teardown of {label} failed: {error}'.splitlines()[0])
+                    self.failed.append((label, error))
+                    raise
+                self.retried += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    @property
+    def outstanding(self) -> List[str]:
+        with self._lock:
+            return list(self._pending.values())
+
+    def drain(self, timeout=None, report=True) -> List[str]:
+        """
+        Wait up to `timeout` seconds (TEARDOWN_DRAIN_TIMEOUT by default) for every submitted job.
+        Returns: Labels of the jobs still running or queued
+        """
+        with self._lock:
+            futures = list(self._pending)
+        wait(futures, timeout=constant.TEARDOWN_DRAIN_TIMEOUT if timeout is None else timeout)
+        outstanding = self.outstanding
+        if report:
+            print(f'Teardown queue: {self.completed} done, {len(self.failed)} failed, '
+                  f'{self.retried} retries, {len(outstanding)} outstanding')
+        return outstanding
@@ -0,0 +1,203 @@
+import base64
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import constant
+from api_path import TokenType
+
+
+@dataclass
+class TokenRecord:
+    """Cached token pair issued for one credential.
+
+    Attributes:
+        access_token: Bearer token sent with API requests
+        refresh_token: Token exchanged at the refresh endpoint for a new pair
+        access_expires_at: Epoch seconds at which the access token expires
+        refresh_expires_at: Epoch seconds at which the refresh token expires, None if unknown
+    """
+    access_token: str
+    refresh_token: Optional[str]
+    access_expires_at: float
+    refresh_expires_at: Optional[float] = None
+
+    def access_valid(self, margin: float = 0) -> bool:
+        return time.time() + margin < self.access_expires_at
+
+    def refresh_valid(self, margin: float = 0) -> bool:
+        if not self.refresh_token:
+            return False
+        if self.refresh_expires_at is None:
+            return True
+        return time.time() + margin < self.refresh_expires_at
+
+
+class TokenManager:
+    """Process-wide, thread-safe cache of auth tokens.
+
+    Tokens are cached per (host, TokenType, identity), the identity being the user name or,
+    for machine tokens, the serial number. The first caller for a key logs in,
+    later callers reuse the access token until it is within `refresh_margin` seconds of
+    expiry, at which point it is renewed through the refresh endpoint (falling back to a
+    fresh login). Concurrent renewals of the same key are single-flighted behind a per-key lock.
+    A token the backend answers 401 to is dropped (see `discard`), so the next caller logs in again.
+    """
+    LOGIN_PATH = {TokenType.USER_TOKEN: '/login', TokenType.MACHINE_TOKEN: '/machine/login'}
+    REFRESH_PATH = {TokenType.USER_TOKEN: '/refresh', TokenType.MACHINE_TOKEN: '/machine/refresh'}
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, refresh_margin=constant.TOKEN_REFRESH_MARGIN, default_ttl=constant.TOKEN_DEFAULT_TTL):
+        self.refresh_margin = float(refresh_margin)
+        self.default_ttl = float(default_ttl)
+        self.login_count = 0
+        self.refresh_count = 0
+        self._records: Dict[Tuple, TokenRecord] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'TokenManager':
+        """Return the process-wide token manager"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def decode_jwt_expiry(token: str) -> Optional[float]:
+        """Read the `exp` claim of a JWT without verifying its signature"""
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return float(claims['exp'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def cache_key(http_session, token_type: TokenType, credential: dict) -> Tuple:
+        identity = credential.get('user_name') or credential.get('serial_num')
+        return http_session.HOST, token_type, identity
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _build_record(self, data: dict) -> TokenRecord:
+        now = time.time()
+        access_token = data['accessToken']
+        refresh_token = data.get('refreshToken')
+        access_expires_at = self.decode_jwt_expiry(access_token)
+        if access_expires_at is None:
+            expires_in = data.get('accessExpiresIn') or self.default_ttl
+            # Some services report the lifetime in milliseconds
+            access_expires_at = now + (expires_in / 1000 if expires_in > 10 ** 6 else expires_in)
+        refresh_expires_at = self.decode_jwt_expiry(refresh_token) if refresh_token else None
+        return TokenRecord(access_token, refresh_token, access_expires_at, refresh_expires_at)
+
+    @staticmethod
+    def login_payload(token_type: TokenType, credential: dict) -> dict:
+        """Body posted to the login endpoint.
+
+        A machine credential is {'serial_num': ..., 'sign': callable}; the machine signs
+        `serial_num-timestamp` only when it actually has to log in.
+        """
+        if token_type != TokenType.MACHINE_TOKEN:
+            return credential
+        verify = f"{credential['serial_num']}-{int(time.time() * 1000)}"
+        return {'serial_num': credential['serial_num'], 'verify': verify, 'signature': credential['sign'](verify)}
+
+    def _login(self, http_session, token_type, credential) -> Optional[TokenRecord]:
+        payload = self.login_payload(token_type, credential)
+        resp = http_session.request('POST', self.LOGIN_PATH[token_type], data=json.dumps(payload))
+        with self._lock:
+            self.login_count += 1
+        if resp.status_code != 200:
+            # The body may echo the credential, so only the status is logged
+            print(f'{token_type.name} login to {http_session.HOST} failed with status {resp.status_code}')
+            return None
+        return self._build_record(resp.json()['data'])
+
+    def _refresh(self, http_session, token_type, record: TokenRecord) -> Optional[TokenRecord]:
+        refresh_path = self.REFRESH_PATH.get(token_type)
+        if not refresh_path or not record.refresh_valid():
+            return None
+        resp = http_session.request(
+            'POST',
+            refresh_path,
+            headers={'Authorization': 'Bearer ' + record.refresh_token}
+        )
+        with self._lock:
+            self.refresh_count += 1
+        if resp.status_code != 200:
+            return None
+        new_record = self._build_record(resp.json()['data'])
+        if not new_record.refresh_token:
+            new_record.refresh_token = record.refresh_token
+            new_record.refresh_expires_at = record.refresh_expires_at
+        return new_record
+
+    def get_record(self, http_session, token_type: TokenType, credential: dict) -> Optional[TokenRecord]:
+        """Return a token record whose access token is valid for at least `refresh_margin` seconds"""
+        key = self.cache_key(http_session, token_type, credential)
+        record = self._records.get(key)
+        if record and record.access_valid(self.refresh_margin):
+            return record
+
+        with self._key_lock(key):
+            # Another thread may have renewed the token while we were waiting
+            record = self._records.get(key)
+            if record and record.access_valid(self.refresh_margin):
+                return record
+            new_record = self._refresh(http_session, token_type, record) if record else None
+            if new_record is None:
+                new_record = self._login(http_session, token_type, credential)
+            if new_record is None:
+                return None
+            self._records[key] = new_record
+            return new_record
+
+    def cached_token(self, http_session, token_type: TokenType, credential: dict, token_action='access') -> Optional[str]:
+        """Return the token if a record is cached and still fresh, without logging in or blocking"""
+        record = self._records.get(self.cache_key(http_session, token_type, credential))
+        if record is None or not record.access_valid(self.refresh_margin):
+            return None
+        return record.refresh_token if token_action == 'refresh' else record.access_token
+
+    def get_token(self, http_session, token_type: TokenType, credential: dict, token_action='access') -> Optional[str]:
+        """Return the cached access token, or the refresh token when `token_action` is 'refresh'"""
+        record = self.get_record(http_session, token_type, credential)
+        if record is None:
+            return None
+        if token_action == 'refresh':
+            return record.refresh_token
+        return record.access_token
+
+    def discard(self, access_token: Optional[str]):
+        """Drop the cached record holding `access_token`, e.g. after a request with it got 401"""
+        if not access_token:
+            return
+        with self._lock:
+            for key, record in list(self._records.items()):
+                if record.access_token == access_token:
+                    del self._records[key]
+
+    @staticmethod
+    def bearer_token(headers) -> Optional[str]:
+        """The token of an `Authorization: Bearer ...` header, None without one"""
+        authorization = (headers or {}).get('Authorization') or ''
+        return authorization[len('Bearer '):] if authorization.startswith('Bearer ') else None
+
+    def invalidate(self, http_session=None, token_type: TokenType = None, credential: dict = None):
+        """Drop one cached token, or every cached token when called without arguments"""
+        with self._lock:
+            if http_session is None:
+                self._records.clear()
+            else:
+                self._records.pop(self.cache_key(http_session, token_type, credential), None)
@@ -2,7 +2,7 @@ import random
 from typing import Dict, Any, List
 from api_path import *
 from api_external.lib.APIEndpointBase import APIEndpointBase
-from api_external.lib.CommonUtils import StringUtils, APIUtils
+from api_external.lib.CommonUtils import StringUtils, APIUtils, AsyncAPIUtils
 from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
 
 
@@ -22,6 +22,8 @@ class User(APIEndpointBase):
     """Handles user-related API operations"""
     
     LIST_API_PATH = ApiPath.USER_LIST
+    RESOURCE_ID_FIELD = 'user_name'
+    RESOURCE_ID_ATTR = '_username'
     DETAIL_API_PATH = ApiPath.USER_DETAIL
     UPDATE_API_PATH = ApiPath.USER_UPDATE
     
@@ -52,12 +54,9 @@ class User(APIEndpointBase):
         
         return True
         
-    def create(self) -> Any:
-        resp = super().create()
-        if resp:
-            self.info_data.pop('password', None)
-            self.info_data.pop('password_confirmation', None)
-        return resp
+    def _after_create(self, resp) -> None:
+        self.info_data.pop('password', None)
+        self.info_data.pop('password_confirmation', None)
     
     def _prepare_update_payload(self) -> bool:
         """Prepare payload for updating a user"""
@@ -89,6 +88,16 @@ class User(APIEndpointBase):
             data=self.update_payload
         )
     
+    async def _aexecute_update_request(self) -> Dict[str, Any]:
+        """Execute the update user API request through the asyncio client"""
+        return await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(self.UPDATE_API_PATH, {'user_name': self._username}),
+            Method.PUT,
+            ResponseCode.OK,
+            None,
+            data=self.update_payload
+        )
+    
     def delete(self) -> bool:
         """Deactivate (soft delete) a user"""
         response = APIUtils.call_api_and_assert_status_code(
@@ -100,6 +109,17 @@ class User(APIEndpointBase):
         )
         return bool(response)
     
+    async def _aexecute_delete_request(self) -> bool:
+        """Deactivate (soft delete) a user through the asyncio client"""
+        response = await AsyncAPIUtils.call_api_and_assert_status_code(
+            ApiPathInfo(self.UPDATE_API_PATH, {'user_name': self._username}),
+            Method.PUT,
+            ResponseCode.OK,
+            None,
+            data={'status': 'inactive'}
+        )
+        return bool(response)
+    
     @classmethod
     def _prepare_get_list_parameters(cls) -> List[tuple]:
         """Prepare parameters for listing users"""
@@ -116,11 +136,9 @@ class User(APIEndpointBase):
     @classmethod
     def get_random_resource_id(cls) -> str:
         """Get a random username from the list"""
-        response = cls.read_list()
-        users = response.json()['data']
-        if not users:
+        random_user = cls.random_item()
+        if not random_user:
             return ""
-        random_user = random.choice(users)
         return random_user['user_name']
     
     @property
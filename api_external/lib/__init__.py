@@ -1,5 +1,7 @@
 from api_external.lib.HttpRequestInit import HttpRequestInit
 from api_external.lib.SwaggerHiker import SwaggerHiker
+from api_external.lib.AsyncHttpRequestInit import AsyncHttpRequestInit, AsyncHttpTransport
+from api_external.lib.AsyncSwaggerHiker import AsyncSwaggerHiker
 from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
 from api_external.lib.CommonUtils import *
 from api_external.lib.Location import Location
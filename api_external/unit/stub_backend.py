@@ -0,0 +1,90 @@
+import base64
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def fake_jwt(lifetime) -> str:
+    """Unsigned JWT whose `exp` claim is `lifetime` seconds away, as TokenManager reads it"""
+    claims = base64.urlsafe_b64encode(json.dumps({'exp': time.time() + lifetime}).encode()).decode().rstrip('=')
+    return f'stub.{claims}.stub'
+
+
+class StubBackend:
+    """Stateful stand-in for the backend on a local port, for tests that need real HTTP.
+
+    Answers /login and /refresh with fresh tokens and keeps locations in memory behind
+    POST /locations, a paged GET /locations and GET/PATCH/DELETE /locations/{full_code}.
+    Every request is kept in `requests` as (method, path, parsed JSON body).
+    """
+
+    def __init__(self):
+        self.locations = {}
+        self.requests = []
+        self._codes = itertools.count(1)
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def __enter__(self) -> 'StubBackend':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method, path, query, body):
+        """(status, JSON document) answering one request"""
+        self.requests.append((method, path, body))
+        if path in ('/login', '/refresh'):
+            return 200, {'status': True, 'data': {'accessToken': fake_jwt(3600), 'refreshToken': fake_jwt(7200)}}
+        if path == '/locations' and method == 'POST':
+            full_code = f'L{next(self._codes):05d}'
+            self.locations[full_code] = dict(body, full_code=full_code)
+            return 200, {'status': True, 'data': self.locations[full_code]}
+        if path == '/locations' and method == 'GET':
+            page, amount = int(query.get('page', ['1'])[0]), int(query.get('amount', ['30'])[0])
+            items = list(self.locations.values())
+            return 200, {'status': True, 'data': {'total': len(items),
+                                                  'locations': items[(page - 1) * amount:page * amount]}}
+        full_code = path.rpartition('/')[2]
+        if not path.startswith('/locations/') or full_code not in self.locations:
+            return 404, {'status': False, 'message': 'Not found'}
+        if method == 'PATCH':
+            self.locations[full_code].update(body)
+        elif method == 'DELETE':
+            return 200, {'status': True, 'data': self.locations.pop(full_code)}
+        return 200, {'status': True, 'data': self.locations[full_code]}
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                status, document = backend.handle(self.command, parts.path, parse_qs(parts.query),
+                                                  json.loads(raw) if raw else {})
+                content = json.dumps(document).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _respond
+
+        return Handler
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from api_external.lib.FixtureGraph import RESOURCE_SPECS, FixtureGraph, ResourceSpec
+
+
+class Recorder:
+    """Stands in for an APIEndpointBase subclass; logs creates and deletes in order"""
+    events = []
+    lock = threading.Lock()
+    failing = set()
+
+    def __init__(self, name):
+        self.name = name
+
+    def create(self):
+        # Give concurrent creates a chance to overlap
+        time.sleep(0.01)
+        if self.name in self.failing:
+            raise RuntimeError(f'{self.name} failed')
+        with self.lock:
+            self.events.append(('create', self.name))
+        return True
+
+    def delete(self):
+        time.sleep(0.01)
+        with self.lock:
+            self.events.append(('delete', self.name))
+        return True
+
+
+def fake(name):
+    return type(name, (Recorder,), {'__init__': lambda self: Recorder.__init__(self, name)})
+
+
+@pytest.fixture(autouse=True)
+def clean_recorder():
+    Recorder.events, Recorder.failing = [], set()
+    yield
+
+
+def fake_specs():
+    """RESOURCE_SPECS with every class replaced by a Recorder"""
+    return {name: ResourceSpec(fake(name), spec.depends_on, None, spec.deleted_after)
+            for name, spec in RESOURCE_SPECS.items()}
+
+
+def graph(specs=None):
+    return FixtureGraph(specs or fake_specs(), concurrency=4, pooled=False, deferred=False)
+
+
+def position(action, name):
+    return Recorder.events.index((action, name))
+
+
+def test_creates_dependencies_first_and_deletes_them_last():
+    fixtures = graph()
+    fixtures.build(['location', 'corporation', 'user'])
+    assert position('create', 'corporation') < position('create', 'location')
+    fixtures.teardown()
+    assert position('delete', 'location') < position('delete', 'corporation')
+    assert fixtures.resources == {}
+
+
+def test_teardown_follows_deleted_after_even_without_creation_order():
+    fixtures = graph()
+    fixtures.build(['corporation', 'location', 'menu', 'machine'])
+    fixtures.teardown()
+    deletes = [name for action, name in Recorder.events if action == 'delete']
+    assert deletes == ['menu', 'machine', 'location', 'corporation']
+
+
+def test_failed_create_tears_down_what_was_built():
+    specs = fake_specs()
+    Recorder.failing = {'location'}
+    fixtures = graph(specs)
+    with pytest.raises(RuntimeError, match='location fixture'):
+        fixtures.build(['corporation', 'location', 'user'])
+    created = {name for action, name in Recorder.events if action == 'create'}
+    deleted = {name for action, name in Recorder.events if action == 'delete'}
+    assert created == deleted == {'corporation', 'user'}
+    assert fixtures.resources == {}
+
+
+def test_ignores_names_without_a_spec():
+    fixtures = graph()
+    assert set(fixtures.build(['request', 'user', 'user'])) == {'user'}
+    fixtures.teardown()
+    assert Recorder.events == [('create', 'user'), ('delete', 'user')]
@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pytest
+
+import constant
+from api_external.lib.HttpCassette import HttpCassette
+from api_external.lib.HttpRequestInit import HttpRequestInit
+from api_external.unit.stub_backend import StubBackend
+
+
+def signature(method, url, params=None, json_body=None):
+    return HttpCassette.signature(method, *HttpCassette.normalize(url, params, None, json_body))
+
+
+def test_signature_ignores_random_values():
+    assert (signature('POST', '/locations', json_body={'name': 'abcde1700000000', 'vip': True}) ==
+            signature('POST', '/locations', json_body={'name': 'zyxwv1800000000', 'vip': False}))
+    assert signature('GET', '/locations/L00001') == signature('GET', '/locations/L99999')
+
+
+def test_signature_tells_requests_apart():
+    assert signature('GET', '/locations') != signature('GET', '/locations', {'page': 2})
+    assert signature('GET', '/locations/L1') != signature('DELETE', '/locations/L1')
+    assert (signature('POST', '/locations', json_body={'name': 'a'}) !=
+            signature('POST', '/locations', json_body={'name': 'a', 'city': 'b'}))
+
+
+def recorded(*exchanges) -> HttpCassette:
+    """A replay cassette holding (method, path, query or request body, response document) exchanges"""
+    cassette = HttpCassette('replay', 'unused')
+    for method, path, params_or_body, document in exchanges:
+        params, body = (params_or_body, None) if method == 'GET' else (None, params_or_body)
+        cassette.record(method, path, params, None, body, 200, {'Content-Type': 'application/json'},
+                        json.dumps(document).encode('utf-8'))
+    return cassette
+
+
+def test_signature_match_forwards_recorded_values_to_live_ones():
+    cassette = recorded(
+        ('POST', '/locations', {'name': 'recorded'}, {'data': {'full_code': 'L1', 'name': 'recorded'}}),
+        ('GET', '/locations/L1', None, {'data': {'full_code': 'L1', 'name': 'recorded'}}),
+        ('GET', '/locations', [('name', 'recorded')], {'data': {'locations': [{'name': 'recorded'}]}}),
+    )
+    created = json.loads(cassette.replay('POST', '/locations', json_body={'name': 'live'}).content)
+    assert created['data'] == {'full_code': 'L1', 'name': 'live'}
+    read = json.loads(cassette.replay('GET', '/locations/L1').content)
+    assert read['data']['name'] == 'live'
+    # The live value is translated back to the recorded one, so the exact lookup finds it
+    listed = json.loads(cassette.replay('GET', '/locations', {'name': 'live'}).content)
+    assert listed['data']['locations'] == [{'name': 'live'}]
+
+
+def test_unknown_request_is_an_error():
+    with pytest.raises(RuntimeError, match='No recorded response'):
+        recorded().replay('GET', '/locations')
+
+
+@pytest.fixture
+def use_cassette(tmp_path, monkeypatch):
+    """Make HttpRequestInit record to or replay from a cassette under tmp_path"""
+    monkeypatch.setattr(constant, 'SWAGGER_ROUTING_ENABLED', False)
+    monkeypatch.delenv('PYTEST_XDIST_WORKER', raising=False)
+    path = str(tmp_path / 'backend.cassette.json.gz')
+
+    def use(mode):
+        cassette = HttpCassette(mode, path)
+        if mode == 'replay':
+            cassette.load()
+        monkeypatch.setattr(constant, 'HTTP_CASSETTE_MODE', mode)
+        monkeypatch.setattr(HttpCassette, '_active', cassette)
+        return cassette
+    return use
+
+
+def session(host):
+    """What the library does against a backend: log in, create, read back the list as a stream"""
+    http = HttpRequestInit(host)
+    login = http.request('POST', '/login', json={'username': 'qa', 'password': 'secret'}).json()
+    created = http.request('POST', '/locations', json={'name': 'first'}).json()
+    listed = http.request('GET', '/locations', params={'page': 1, 'amount': 30}, stream=True)
+    listed.raw.decode_content = True
+    return login, created, json.load(listed.raw)
+
+
+def test_record_then_replay_without_a_backend(use_cassette):
+    cassette = use_cassette('record')
+    with StubBackend() as backend:
+        login, created, listed = session(backend.url)
+    assert listed['data']['locations'] == [created['data']]
+    cassette.save()
+
+    use_cassette('replay')
+    replayed_login, replayed_created, replayed_listed = session('http://127.0.0.1:9')
+    assert (replayed_created, replayed_listed) == (created, listed)
+    assert replayed_login['data']['accessToken'] == HttpCassette.REDACTED
+
+
+def test_credentials_are_not_recorded(use_cassette):
+    cassette = use_cassette('record')
+    with StubBackend() as backend:
+        login, _, _ = session(backend.url)
+    cassette.save()
+    with gzip.open(cassette.file_path(), 'rt', encoding='utf-8') as file:
+        document = json.load(file)
+    text = json.dumps(document) + ''.join(
+        exchange.content.decode('utf-8') for exchange in map(type(cassette.exchanges[0]).from_json,
+                                                             document['exchanges']))
+    assert 'secret' not in text
+    assert login['data']['accessToken'] not in text
+    assert login['data']['refreshToken'] not in text
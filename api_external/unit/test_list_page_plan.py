@@ -0,0 +1,48 @@
+from collections import deque
+
+import pytest
+
+from api_external.lib.APIEndpointBase import ListPagePlan
+
+
+def body(page, page_size, rows, total):
+    start = (page - 1) * page_size
+    return {'data': {'total': total, 'items': list(range(start, min(start + page_size, rows)))}}
+
+
+def read_all(rows, total, page_size=10, concurrency=3, count_free=False):
+    """Drive a plan the way _iter_list_pages does; returns the items and every page requested"""
+    first = body(1, page_size, rows, total)
+    plan = ListPagePlan(first, 'items', page_size, concurrency, count_free)
+    items, requested, window = list(first['data']['items']), [1], deque()
+    while not plan.finished:
+        for page in plan.pages_to_request(len(window)):
+            assert len(window) < concurrency
+            window.append(page)
+            requested.append(page)
+        page_body = body(window.popleft(), page_size, rows, total)
+        items += page_body['data']['items']
+        plan.received(page_body)
+    return items, requested
+
+
+@pytest.mark.parametrize('rows, total', [(95, 95), (100, 100), (100, 40), (35, 90), (0, 0)])
+def test_reads_every_row_whatever_the_total(rows, total):
+    items, _ = read_all(rows, total)
+    assert items == list(range(rows))
+
+
+def test_prefetches_up_to_the_announced_last_page():
+    _, requested = read_all(95, 95)
+    assert requested == list(range(1, 11))
+
+
+def test_count_free_ignores_total():
+    items, requested = read_all(95, 40, count_free=True)
+    assert items == list(range(95))
+    assert requested[-1] >= 10
+
+
+def test_short_first_page_ends_the_list():
+    plan = ListPagePlan(body(1, 10, 4, 4), 'items', 10, 3)
+    assert plan.finished
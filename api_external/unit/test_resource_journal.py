@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+import constant
+from api_external.lib.ResourceJournal import ResourceJournal
+
+
+class Resource:
+    def __init__(self, resource_id):
+        self.resource_id = resource_id
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    path = str(tmp_path / 'journal.jsonl')
+    monkeypatch.setattr(constant, 'RESOURCE_JOURNAL_PATH', path)
+    yield path
+    with ResourceJournal._lock:
+        ResourceJournal._close()
+
+
+def test_read_skips_a_torn_line(journal):
+    ResourceJournal.record('create', Resource('a'))
+    ResourceJournal.record('create', Resource('b'))
+    ResourceJournal.sync()
+    with open(journal, 'rb+') as file:
+        file.truncate(os.path.getsize(journal) - 5)
+    assert [record['id'] for record in ResourceJournal.read()] == ['a']
+
+
+def test_reopening_ends_a_torn_line_before_appending(journal):
+    with open(journal, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({'op': 'create', 'type': 'Resource', 'id': 'a'}) + '\n{"op": "cre')
+    ResourceJournal.record('create', Resource('b'))
+    ResourceJournal.sync()
+    assert [record['id'] for record in ResourceJournal.read()] == ['a', 'b']
+
+
+def test_alive_drops_deleted_resources(journal):
+    for op, resource_id in [('create', 'a'), ('create', 'b'), ('delete', 'a'), ('create', 'c')]:
+        ResourceJournal.record(op, Resource(resource_id))
+    alive = ResourceJournal.alive(ResourceJournal.read())
+    assert sorted(resource_id for _, _, resource_id in alive) == ['b', 'c']
+
+
+def test_compact_keeps_only_alive_resources_and_appends_after(journal):
+    ResourceJournal.record('create', Resource('a'))
+    ResourceJournal.record('delete', Resource('a'))
+    ResourceJournal.record('create', Resource('b'))
+    ResourceJournal.compact()
+    ResourceJournal.record('create', Resource('c'))
+    ResourceJournal.sync()
+    assert [(record['op'], record['id']) for record in ResourceJournal.read()] == [('create', 'b'), ('create', 'c')]
+
+
+def test_empty_path_disables_the_journal(journal, monkeypatch):
+    monkeypatch.setattr(constant, 'RESOURCE_JOURNAL_PATH', '')
+    ResourceJournal.record('create', Resource('a'))
+    assert ResourceJournal.read() == []
+    assert not os.path.exists(journal)
@@ -0,0 +1,63 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import constant
+from api_external.lib.Flavor import Flavor
+from api_external.lib.Menu import Menu
+from api_external.lib.ResourceJournal import ResourceJournal
+from api_external.lib.ResourceReaper import TEST_NAME_PREFIXES, ResourceReaper
+
+
+def iso(hours_ago):
+    return datetime.fromtimestamp(time.time() - hours_ago * 3600, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+FLAVORS = [
+    {'full_sku': 'old', 'name': 'Testing-1', 'date_created': iso(48)},
+    {'full_sku': 'edited', 'name': 'TestEdit_1', 'date_created': iso(48)},
+    {'full_sku': 'young', 'name': 'Testing-2', 'date_created': iso(1)},
+    {'full_sku': 'undated', 'name': 'Testing-3'},
+    {'full_sku': 'real', 'name': 'Mango', 'date_created': iso(48)},
+    {'full_sku': 'running', 'name': 'Testing-4', 'date_created': iso(48)},
+]
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    """Lists FLAVORS only, with `running` journaled by a live process"""
+    monkeypatch.setattr(constant, 'RESOURCE_JOURNAL_PATH', str(tmp_path / 'journal.jsonl'))
+    for cls in TEST_NAME_PREFIXES:
+        monkeypatch.setattr(cls, 'iter_list', classmethod(lambda cls: iter(FLAVORS if cls is Flavor else [])))
+    running = Flavor.from_resource_id('running')
+    ResourceJournal.record('create', running)
+    ResourceJournal.sync()
+    monkeypatch.setattr(ResourceReaper, '_process_alive', staticmethod(lambda pid: pid == os.getpid()))
+    yield
+    with ResourceJournal._lock:
+        ResourceJournal._close()
+
+
+def test_scan_takes_only_old_test_named_resources_of_finished_runs(scan):
+    reaper = ResourceReaper(min_age=6)
+    assert reaper.from_lists() == 2
+    assert reaper.orphans[Flavor] == {'old', 'edited'}
+    assert reaper.orphans[Menu] == set()
+
+
+def test_scan_without_min_age_still_spares_running_processes(scan):
+    reaper = ResourceReaper(min_age=0)
+    reaper.from_lists()
+    assert reaper.orphans[Flavor] == {'old', 'edited', 'young', 'undated'}
+
+
+@pytest.mark.parametrize('host, allowed', [
+    ('https://api.qa.botrista.io', True),
+    ('https://api-sales-dashboard.qa.botrista.io', True),
+    ('https://api.botrista.io', False),
+    ('https://qa-api.botrista.io', False),
+])
+def test_scan_host(host, allowed):
+    assert ResourceReaper.is_scan_host(host) is allowed
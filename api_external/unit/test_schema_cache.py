@@ -0,0 +1,41 @@
+import pytest
+
+import constant
+from api_external.lib.JSONSchemaLibrary import SchemaCache
+from api_external.lib.SchemaFetcher import SchemaFetcher
+
+LOCATION_LIST = ('/locations', 'get', '200')
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(SchemaFetcher, 'ensure_current', classmethod(lambda cls: constant.SCHEMA_FILE_PATH))
+    SchemaCache.clear()
+    yield SchemaCache
+    SchemaCache.clear()
+
+
+def test_document_and_artifact_lookups_keep_each_other(cache, monkeypatch):
+    monkeypatch.setattr(constant, 'SCHEMA_ARTIFACT_ENABLED', False)
+    from_document = cache.operation_schema(*LOCATION_LIST)
+    document = cache.document()
+    monkeypatch.setattr(constant, 'SCHEMA_ARTIFACT_ENABLED', True)
+    from_artifact = cache.operation_schema(*LOCATION_LIST)
+    artifact = cache.artifact()
+    monkeypatch.setattr(constant, 'SCHEMA_ARTIFACT_ENABLED', False)
+    assert cache.operation_schema(*LOCATION_LIST) is from_document
+    assert cache.document() is document
+    monkeypatch.setattr(constant, 'SCHEMA_ARTIFACT_ENABLED', True)
+    assert cache.operation_schema(*LOCATION_LIST) is from_artifact
+    assert cache.artifact() is artifact
+    assert from_document == from_artifact
+
+
+def test_a_changed_swagger_file_drops_both_sources(cache, monkeypatch):
+    monkeypatch.setattr(constant, 'SCHEMA_ARTIFACT_ENABLED', False)
+    from_document = cache.operation_schema(*LOCATION_LIST)
+    cache.document()
+    stamp = cache._document_stamp
+    monkeypatch.setattr(SchemaCache, '_file_stamp', staticmethod(lambda path: (path, stamp[1] + 1, stamp[2])))
+    cache.document()
+    assert cache.operation_schema(*LOCATION_LIST) is not from_document
@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+
+from api_external.lib import SchemaFetcher as schema_fetcher_module
+from api_external.lib.SchemaFetcher import SchemaFetcher
+
+HOST = 'https://api.qa.example'
+BUNDLED = {'swagger': '2.0', 'paths': {'/locations': {}}}
+FETCHED = {'swagger': '2.0', 'paths': {'/locations': {}, '/machines': {}}}
+
+
+class FakeResponse:
+    def __init__(self, status_code, document=None):
+        self.status_code = status_code
+        self.content = json.dumps(document).encode('utf-8') if document else b''
+        self.headers = {'ETag': '"v2"'}
+
+
+class FakeBackend:
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+
+    def request(self, method, path, **kwargs):
+        self.requests.append(kwargs)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(schema_fetcher_module, 'HttpRequestInit', lambda host: backend)
+    return backend
+
+
+@pytest.fixture
+def bundled(tmp_path):
+    path = tmp_path / 'swagger.json'
+    path.write_text(json.dumps(BUNDLED))
+    return path
+
+
+def fetcher(tmp_path, bundled, max_age=-1):
+    return SchemaFetcher(HOST, schema_file_path=str(bundled), store_dir=str(tmp_path / 'store'), max_age=max_age)
+
+
+def test_first_use_serves_the_bundled_document_without_a_request(tmp_path, bundled, backend):
+    assert fetcher(tmp_path, bundled, max_age=3600).fetch() == str(bundled)
+    assert backend.requests == []
+
+
+def test_a_fetched_version_is_served_from_the_store(tmp_path, bundled, backend):
+    backend.responses.append(FakeResponse(200, FETCHED))
+    path = fetcher(tmp_path, bundled).fetch(force=True)
+    assert path != str(bundled)
+    with open(path) as fetched_file:
+        assert json.load(fetched_file) == FETCHED
+    assert json.loads(bundled.read_text()) == BUNDLED
+    assert fetcher(tmp_path, bundled).fetch() == path
+    assert backend.requests[0]['timeout'] > 0
+
+
+def test_a_failed_revalidation_waits_another_max_age(tmp_path, bundled, backend):
+    stale = fetcher(tmp_path, bundled, max_age=60)
+    stale._write_meta({'digest': stale.digest_of(str(bundled)), 'checked_at': time.time() - 120})
+    backend.responses.append(ConnectionError('backend unreachable'))
+    assert stale.fetch() == str(bundled)
+    assert fetcher(tmp_path, bundled, max_age=60).fetch() == str(bundled)
+    assert len(backend.requests) == 1
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import constant
+from api_external.lib.SchemaResolver import SchemaResolver
+
+jsonref = pytest.importorskip('jsonref')
+
+
+def load_swagger():
+    with open(constant.SCHEMA_FILE_PATH, encoding='utf-8') as schema_file:
+        return json.load(schema_file)
+
+
+def same_schema(resolved, expected, defs, seen=None):
+    """Compare a SchemaResolver result with a jsonref one, following `#/$defs/` refs where jsonref recursed"""
+    seen = set() if seen is None else seen
+    if isinstance(resolved, dict):
+        ref = resolved.get('$ref')
+        if isinstance(ref, str) and ref.startswith(SchemaResolver.DEFS_PREFIX):
+            key = (ref, id(expected))
+            if key in seen:
+                return True
+            seen.add(key)
+            return same_schema(defs[ref[len(SchemaResolver.DEFS_PREFIX):]], expected, defs, seen)
+        resolved = {key: value for key, value in resolved.items() if key != '$defs'}
+        return (isinstance(expected, dict) and set(resolved) == set(expected) and
+                all(same_schema(value, expected[key], defs, seen) for key, value in resolved.items()))
+    if isinstance(resolved, list):
+        return (isinstance(expected, list) and len(resolved) == len(expected) and
+                all(same_schema(item, other, defs, seen) for item, other in zip(resolved, expected)))
+    return resolved == expected
+
+
+def documented_responses(document):
+    for path, operations in document['paths'].items():
+        for method, operation in operations.items():
+            if isinstance(operation, dict):
+                for status in operation.get('responses', {}):
+                    yield path, method, status
+
+
+def test_operation_schemas_match_jsonref():
+    document = load_swagger()
+    expected_document = jsonref.replace_refs(load_swagger())
+    resolver = SchemaResolver(document)
+    compared = 0
+    for path, method, status in documented_responses(document):
+        keys = ['paths', path, method, 'responses', status, 'content', 'application/json', 'schema']
+        expected = expected_document
+        for key in keys:
+            expected = expected.get(key) if isinstance(expected, dict) else None
+        resolved = resolver.operation_schema(path, method, status)
+        assert (resolved is None) == (expected is None), (path, method, status)
+        if resolved is not None:
+            assert same_schema(resolved, expected, resolved.get('$defs', {})), (path, method, status)
+            compared += 1
+    assert compared > 400
+
+
+def test_recursive_ref_becomes_def():
+    document = {
+        'components': {'schemas': {'Node': {
+            'type': 'object',
+            'properties': {'name': {'type': 'string'}, 'children': {
+                'type': 'array', 'items': {'$ref': '#/components/schemas/Node'}}},
+        }}},
+        'paths': {'/tree': {'get': {'responses': {'200': {'content': {'application/json': {
+            'schema': {'$ref': '#/components/schemas/Node'}}}}}}}},
+    }
+    schema = SchemaResolver(document).operation_schema('/tree', 'get', '200')
+    name = SchemaResolver.def_name('#/components/schemas/Node')
+    assert schema['properties']['children']['items'] == {'$ref': SchemaResolver.DEFS_PREFIX + name}
+    assert schema['$defs'][name]['properties']['name'] == {'type': 'string'}
+    expected = jsonref.replace_refs(document)['paths']['/tree']['get']['responses']['200']['content'][
+        'application/json']['schema']
+    assert same_schema(schema, expected, schema['$defs'])
+
+
+def test_missing_operation_is_none():
+    assert SchemaResolver(load_swagger()).operation_schema('/no/such/path', 'get', '200') is None
@@ -0,0 +1,48 @@
+import pytest
+
+import constant
+from api_external.lib.SwaggerIndex import SwaggerIndex
+
+BACKEND = 'https://api.prod.example'
+SALES = 'https://sales.prod.example'
+SALES_DOCUMENT = 'https://sales.qa.example'
+
+
+@pytest.fixture
+def index(monkeypatch):
+    documents = {
+        BACKEND: ['/login', '/locations/{full_code}', '/users/{user_name}', '/shared'],
+        SALES_DOCUMENT: ['/login', '/dashboard/{id}', '/users/me', '/shared'],
+    }
+    monkeypatch.setattr(constant, 'BACKEND_HOST', BACKEND)
+    monkeypatch.setattr(constant, 'BACKEND_SWAGGER_HOST', '')
+    monkeypatch.setattr(constant, 'SALES_DASHBOARD_HOST', SALES)
+    monkeypatch.setattr(constant, 'SALES_DASHBOARD_SWAGGER_HOST', SALES_DOCUMENT)
+    monkeypatch.setattr(SwaggerIndex, '_fetch_paths', classmethod(lambda cls, host: documents[host]))
+    SwaggerIndex.clear()
+    yield SwaggerIndex
+    SwaggerIndex.clear()
+
+
+def test_routes_to_configured_hosts_only(index):
+    assert index.host_for('/dashboard/7') == SALES
+    assert index.host_for('/locations/QLY001?fields[]=name') == BACKEND
+    assert index.host_for('/no/such/path') is None
+    assert SALES_DOCUMENT not in index._owners.values()
+
+
+def test_backend_wins_overlaps(index):
+    assert index.host_for('/login') == BACKEND
+    assert index.host_for('/shared') == BACKEND
+
+
+def test_more_literal_template_wins(index):
+    assert index.host_for('/users/me') == SALES
+    assert index.host_for('/users/bob') == BACKEND
+
+
+def test_rebuilt_when_hosts_change(index, monkeypatch):
+    assert index.host_for('/dashboard/7') == SALES
+    monkeypatch.setattr(constant, 'SALES_DASHBOARD_HOST', BACKEND)
+    assert index.targets() == [(BACKEND, BACKEND)]
+    assert index.host_for('/dashboard/7') is None
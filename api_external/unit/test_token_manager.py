@@ -0,0 +1,132 @@
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_path import TokenType
+from api_external.lib.TokenManager import TokenManager
+
+USER = {'user_name': 'qa', 'password': 'secret'}
+
+
+def fake_jwt(lifetime) -> str:
+    """Unsigned JWT whose `exp` claim is `lifetime` seconds away"""
+    claims = base64.urlsafe_b64encode(json.dumps({'exp': time.time() + lifetime}).encode()).decode().rstrip('=')
+    return f'test.{claims}.test'
+
+
+class FakeResponse:
+    def __init__(self, status_code, document):
+        self.status_code = status_code
+        self._document = document
+
+    def json(self):
+        return self._document
+
+
+class FakeSession:
+    """Stands in for HttpRequestInit: answers /login and /refresh, counting the calls"""
+    HOST = 'http://backend'
+
+    def __init__(self, lifetime=3600, delay=0.0, login_status=200, refresh_token=True):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.login_status = login_status
+        self.refresh_token = refresh_token
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        with self._lock:
+            self.calls.append(path)
+        time.sleep(self.delay)
+        if path == '/login' and self.login_status != 200:
+            return FakeResponse(self.login_status, {'message': 'Unauthorized'})
+        data = {'accessToken': fake_jwt(self.lifetime)}
+        if self.refresh_token:
+            data['refreshToken'] = fake_jwt(self.lifetime * 2)
+        return FakeResponse(200, {'data': data})
+
+
+def test_reads_the_jwt_expiry():
+    assert abs(TokenManager.decode_jwt_expiry(fake_jwt(60)) - (time.time() + 60)) < 2
+    assert TokenManager.decode_jwt_expiry('opaque-token') is None
+
+
+def test_reuses_the_token_until_it_nears_expiry():
+    manager, session = TokenManager(refresh_margin=60), FakeSession()
+    first = manager.get_token(session, TokenType.USER_TOKEN, USER)
+    assert manager.get_token(session, TokenType.USER_TOKEN, USER) == first
+    assert session.calls == ['/login']
+
+
+def test_refreshes_a_token_within_the_margin():
+    manager, session = TokenManager(refresh_margin=60), FakeSession(lifetime=30)
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    refresh_token = manager.get_token(session, TokenType.USER_TOKEN, USER, 'refresh')
+    assert session.calls == ['/login', '/refresh']
+    assert (manager.login_count, manager.refresh_count) == (1, 1)
+    # A refresh response without a new refresh token keeps the previous one
+    session.refresh_token, session.lifetime = False, 3600
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    assert manager.get_token(session, TokenType.USER_TOKEN, USER, 'refresh') == refresh_token
+    assert session.calls == ['/login', '/refresh', '/refresh']
+
+
+def test_logs_in_again_once_the_refresh_token_expired():
+    manager, session = TokenManager(refresh_margin=60), FakeSession(lifetime=-10)
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    assert session.calls == ['/login', '/login']
+
+
+def test_opaque_tokens_use_the_reported_or_default_lifetime():
+    manager = TokenManager(refresh_margin=0, default_ttl=120)
+    record = manager._build_record({'accessToken': 'opaque', 'accessExpiresIn': 3_600_000})
+    assert abs(record.access_expires_at - (time.time() + 3600)) < 2
+    record = manager._build_record({'accessToken': 'opaque'})
+    assert abs(record.access_expires_at - (time.time() + 120)) < 2
+
+
+def test_concurrent_callers_share_one_login():
+    manager, session = TokenManager(refresh_margin=60), FakeSession(delay=0.05)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        tokens = set(executor.map(lambda _: manager.get_token(session, TokenType.USER_TOKEN, USER), range(32)))
+    assert len(tokens) == 1
+    assert session.calls == ['/login']
+
+
+def test_identities_and_hosts_are_cached_apart():
+    manager, session = TokenManager(refresh_margin=60), FakeSession()
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    manager.get_token(session, TokenType.USER_TOKEN, {'user_name': 'other', 'password': 'secret'})
+    other_host = FakeSession()
+    other_host.HOST = 'http://sales-dashboard'
+    manager.get_token(other_host, TokenType.USER_TOKEN, USER)
+    assert manager.login_count == 3
+
+
+def test_failed_login_is_not_cached():
+    manager, session = TokenManager(refresh_margin=60), FakeSession(login_status=401)
+    assert manager.get_token(session, TokenType.USER_TOKEN, USER) is None
+    session.login_status = 200
+    assert manager.get_token(session, TokenType.USER_TOKEN, USER) is not None
+    assert session.calls == ['/login', '/login']
+
+
+def test_failed_login_does_not_log_the_response(capsys):
+    manager, session = TokenManager(refresh_margin=60), FakeSession(login_status=401)
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    output = capsys.readouterr().out
+    assert '401' in output
+    assert 'Unauthorized' not in output
+
+
+def test_discarded_token_is_not_served_again():
+    manager, session = TokenManager(refresh_margin=60), FakeSession()
+    token = manager.get_token(session, TokenType.USER_TOKEN, USER)
+    manager.discard(TokenManager.bearer_token({'Authorization': f'Bearer {token}'}))
+    manager.get_token(session, TokenType.USER_TOKEN, USER)
+    assert session.calls == ['/login', '/login']
+    assert TokenManager.bearer_token({}) is None
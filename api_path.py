@@ -61,9 +61,27 @@ class ApiPath(Enum):
     MACHINE_REGISTER = PathData(path='/machine/register', token_type=TokenType.USER_TOKEN)
     MACHINE_EDIT = PathData(path='/user/machine/edit', token_type=TokenType.USER_TOKEN)
     MACHINE_LOGIN = PathData(path='/machine/login', token_type=TokenType.USER_TOKEN)
+    MACHINE_REFRESH = PathData(path='/machine/refresh', token_type=TokenType.MACHINE_TOKEN)
     MACHINE_TRANSFER = PathData(path='/user/machine/transfer', token_type=TokenType.USER_TOKEN)
     MACHINE_DELETE = PathData(path='/internal/machines/{serial_num}', token_type=TokenType.USER_TOKEN)
     
+    # DrinkBot (device) endpoints, called with machine credentials
+    DRINKBOT_ONLINE = PathData(path='/drinkbot/online', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_STATUS = PathData(path='/drinkbot/status', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_PROFILE = PathData(path='/drinkbot/profile', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_FLAG = PathData(path='/drinkbot/flag', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_HOTPOT = PathData(path='/drinkbot/hotpot', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_OTA = PathData(path='/drinkbot/ota', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_DICTIONARY = PathData(path='/drinkbot/dictionary', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_BLENDER_SETTING = PathData(path='/drinkbot/blender-setting', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_CONSUMPTION_LOGS = PathData(path='/drinkbot/consumption-logs', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_CLEANING_LOGS = PathData(path='/drinkbot/cleaning-logs', token_type=TokenType.MACHINE_TOKEN)
+    DRINKBOT_TUBE_EVENTS = PathData(path='/drinkbot/tube-events', token_type=TokenType.MACHINE_TOKEN)
+    
+    # Reference data endpoints
+    REF_TYPE = PathData(path='/ref/{type}', token_type=TokenType.USER_TOKEN)
+    I18N = PathData(path='/i18n', token_type=TokenType.USER_TOKEN)
+    
     # Flavor endpoints
     FLAVOR_CLASS_TYPE = PathData(path='/ref/flavor_class_type', token_type=TokenType.USER_TOKEN)
     FLAVOR_VENDORS = PathData(path='/flavor-vendors', token_type=TokenType.USER_TOKEN)
@@ -118,6 +136,7 @@ class ResponseCode(Enum):
     CREATED = 201
     NO_CONTENT = 204
     BAD_REQUEST = 400
+    UNAUTHORIZED = 401
     FORBIDDEN = 403
     NOT_FOUND = 404
     INTERNAL_SERVER_ERROR = 500
@@ -0,0 +1,80 @@
+"""Compare a fresh requests.Session per call with the shared HttpTransport pool.
+
+Runs against a local keep-alive stub server, so no backend access is needed:
+
+    python -m benchmark.bench_http_transport --requests 500 --threads 8
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from api_external.lib.HttpTransport import HttpTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+    
+    def setup(self):
+        # Called once per accepted TCP connection, i.e. once per handshake
+        with StubHandler.lock:
+            StubHandler.connections += 1
+        super().setup()
+    
+    def do_GET(self):
+        body = b'{"status": true, "code": 200, "data": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def per_call_session(url):
+    # What APIUtils did before the shared transport: one session per request
+    with requests.Session() as session:
+        return session.get(url).status_code
+
+
+def shared_session(url):
+    return HttpTransport.session(url).get(url).status_code
+
+
+def run(label, func, url, total, threads):
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        codes = list(executor.map(lambda _: func(url), range(total)))
+    elapsed = time.perf_counter() - start
+    assert all(code == 200 for code in codes)
+    print(f'{label:<20} {total / elapsed:>10.1f} req/s {StubHandler.connections:>8} handshakes')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        run('session per call', per_call_session, url, args.requests, args.threads)
+        run('HttpTransport', shared_session, url, args.requests, args.threads)
+    finally:
+        HttpTransport.close_all()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
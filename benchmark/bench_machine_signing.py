@@ -0,0 +1,52 @@
+"""Machine key setup and signing throughput, before and after the key pool and cached signing key.
+
+    python -m benchmark.bench_machine_signing --count 2000
+"""
+import argparse
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from api_external.lib.EccKeyPool import EccKeyPool
+from api_external.lib.Machine import Machine
+
+
+def sign_reloading_pem(private_pem, msg):
+    """What _sign_ecdsa used to do: parse the PEM private key for every signature"""
+    sk = serialization.load_pem_private_key(data=private_pem, password=None, backend=default_backend())
+    return sk.sign(msg.encode('utf-8'), ec.ECDSA(hashes.SHA256())).hex()
+
+
+def rate(count, func):
+    start = time.perf_counter()
+    for index in range(count):
+        func(index)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=2000)
+    args = parser.parse_args()
+
+    machine = Machine()
+    machine._serial_num = 'db0xbenchmark'
+    machine._public_key, machine._private_key = machine._generate_ecc_keypair()
+
+    before = rate(args.count, lambda i: sign_reloading_pem(machine._private_key, f'{machine._serial_num}-{i}'))
+    after = rate(args.count, lambda i: machine._sign_ecdsa(f'{machine._serial_num}-{i}'))
+    print(f'sign       reload PEM {before:>9.0f}/s   cached key {after:>9.0f}/s   x{after / before:.1f}')
+
+    pool = EccKeyPool(size=args.count)
+    pool.start()
+    while pool._keys.qsize() < args.count:
+        time.sleep(0.05)
+    inline = rate(args.count, lambda i: EccKeyPool.generate())
+    pooled = rate(args.count, lambda i: pool.take())
+    print(f'key pair   generate   {inline:>9.0f}/s   warm pool  {pooled:>9.0f}/s   x{pooled / inline:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Validation throughput of the jsonschema and codegen backends on a large list response.
+
+    python -m benchmark.bench_schema_backends --items 5000 --runs 5
+"""
+import argparse
+import statistics
+import time
+
+from api_external.lib.FastValidator import FastValidator
+from api_external.lib.JSONSchemaLibrary import SchemaCache
+from api_path import ApiPath, Method, ResponseCode
+
+
+def location(index):
+    item = {'name': f'Location {index}', 'full_code': f'L{index:05d}', 'user_name': 'bench',
+            'country': 'US', 'vip': True, 'multi_email': ['bench@example.com']}
+    if index % 100 == 0:
+        # Keep some errors in the payload so error reporting is part of the measurement
+        item['vip'] = 'no'
+    return item
+
+
+def measure(validator, payload, runs):
+    samples, error_count = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        error_count = sum(1 for _ in validator.iter_errors(payload))
+        samples.append(time.perf_counter() - start)
+    return samples, error_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    schema = SchemaCache.operation_schema(ApiPath.LOCATION_LIST.value.path, Method.GET.value.lower(),
+                                          str(ResponseCode.OK.value))
+    payload = {'status': True, 'code': 200,
+               'data': {'total': args.items, 'locations': [location(i) for i in range(args.items)]}}
+    for backend in ('jsonschema', 'codegen'):
+        start = time.perf_counter()
+        validator = FastValidator.for_schema(schema, backend)
+        build = time.perf_counter() - start
+        samples, error_count = measure(validator, payload, args.runs)
+        median = statistics.median(samples)
+        print(f'{backend:<12} build {build * 1000:>7.1f} ms  validate median {median * 1000:>8.1f} ms '
+              f'({args.items / median:>9.0f} items/s, {error_count} errors)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Cold-start cost of the first schema validation, with and without the schema artifact.
+
+Each sample runs in a fresh interpreter so nothing is cached in memory:
+
+    python -m benchmark.bench_schema_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from api_external.lib.SchemaArtifact import SchemaArtifact
+
+COLD_START = '''
+import time
+from api_path import ApiPath, Method, ResponseCode
+from api_external.lib.JSONSchemaLibrary import JSONSchemaLibrary
+start = time.perf_counter()
+library = JSONSchemaLibrary(ApiPath.LOCATION_LIST, Method.GET, ResponseCode.OK)
+library.get_request_fields_schema()
+library.verify_resp_schema({'status': True, 'code': 200, 'data': {'total': 0, 'locations': []}})
+print(time.perf_counter() - start)
+'''
+
+
+def cold_start(artifact_enabled, runs):
+    # No swagger revalidation, so the samples time schema loading and not the network
+    env = dict(os.environ, SCHEMA_ARTIFACT_ENABLED='true' if artifact_enabled else 'false', SCHEMA_MAX_AGE='-1')
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', COLD_START], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    # Build up front so the artifact runs measure loading, not the one-off compile
+    SchemaArtifact.load()
+    for label, artifact_enabled in (('SchemaResolver document', False), ('schema artifact', True)):
+        samples = cold_start(artifact_enabled, args.runs)
+        print(f'{label:<24} median {statistics.median(samples) * 1000:>8.1f} ms '
+              f'min {min(samples) * 1000:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
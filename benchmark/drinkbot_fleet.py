@@ -0,0 +1,57 @@
+"""Simulate a DrinkBot fleet reporting in to the backend and print per-endpoint rate, errors and latency.
+
+Provisions the machines (and deletes them afterwards unless --keep is given):
+
+    python -m benchmark.drinkbot_fleet --machines 200 --duration 120 --heartbeat 2
+    python -m benchmark.drinkbot_fleet --machines 50 --mix consumption-logs=5,profile=1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+
+from api_external.lib.DrinkBotSimulator import DEFAULT_MIX, DrinkBotSimulator
+from api_external.lib.Machine import Machine
+
+
+def parse_mix(text):
+    if not text:
+        return DEFAULT_MIX
+    by_name = {api_path.value.path.rsplit('/', 1)[-1]: api_path for api_path in DEFAULT_MIX}
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[by_name[name.strip()]] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--machines', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--heartbeat', type=float, default=None, help='mean seconds between calls per machine')
+    parser.add_argument('--concurrency', type=int, default=None, help='requests in flight at once')
+    parser.add_argument('--mix', default='', help='endpoint weights, e.g. status=3,profile=1')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--keep', action='store_true', help='do not delete the provisioned machines')
+    parser.add_argument('--verbose', action='store_true', help='keep the per-request log')
+    args = parser.parse_args()
+
+    log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with log:
+        machines = Machine.provision(args.machines)
+    print(f'Provisioned {len(machines)} machines')
+    simulator = DrinkBotSimulator(machines, args.duration, parse_mix(args.mix), args.heartbeat,
+                                  args.concurrency, args.seed)
+    try:
+        with log:
+            asyncio.run(simulator.run())
+        simulator.print_report()
+    finally:
+        if not args.keep:
+            with log:
+                Machine.delete_many(machines)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,125 @@
 import pytest
+import constant
 from api_external.lib import *
+from api_external.lib.FixtureGraph import FixtureGraph
+from api_external.lib.ResourcePool import ResourcePool
+from api_external.lib.TeardownQueue import TeardownQueue
 
 
-def fixture_factory(test_cls):
+async def async_fixture_factory(test_cls):
     test_obj = test_cls()
-    test_obj.create()
+    await test_obj.acreate()
     yield test_obj
-    test_obj.delete()
+    if constant.TEARDOWN_DEFERRED:
+        TeardownQueue.instance().submit(f'{test_cls.__name__} fixture', test_obj.delete)
+    else:
+        await test_obj.adelete()
+
+
+# Warm resources shared by the tests of this worker; idle ones are deleted when the session ends.
+# Deferred teardown releases leased resources to the pools, so it is drained before they close.
+@pytest.fixture(scope="session")
+def resource_pools():
+    yield ResourcePool
+    teardown_queue = TeardownQueue.started()
+    if teardown_queue is not None:
+        teardown_queue.drain(report=False)
+    ResourcePool.close_all()
+
+
+# Every resource fixture a test asks for is built by one FixtureGraph, so independent
+# resources are created (and deleted) concurrently and dependent ones in order.
+@pytest.fixture(scope="function")
+def resource_graph(request, resource_pools):
+    graph = FixtureGraph()
+    graph.build(request.fixturenames)
+    yield graph
+    graph.teardown()
     
     
 @pytest.fixture(scope="function")
-def location():
-    yield from fixture_factory(Location)
+def location(resource_graph):
+    return resource_graph['location']
     
     
 @pytest.fixture(scope="function")
-def machine():
-    yield from fixture_factory(Machine)
+def machine(resource_graph):
+    return resource_graph['machine']
 
 
 @pytest.fixture(scope="function")
-def user():
-    yield from fixture_factory(User)
+def user(resource_graph):
+    return resource_graph['user']
     
     
 @pytest.fixture(scope="function")
-def corporation():
-    yield from fixture_factory(Corporation)
+def corporation(resource_graph):
+    return resource_graph['corporation']
     
     
 @pytest.fixture(scope="function")
-def flavor():
-    yield from fixture_factory(Flavor)
+def flavor(resource_graph):
+    return resource_graph['flavor']
     
     
 @pytest.fixture(scope="function")
-def drink():
-    yield from fixture_factory(Drink)
+def drink(resource_graph):
+    return resource_graph['drink']
+
+
+@pytest.fixture(scope="function")
+def menu(resource_graph):
+    return resource_graph['menu']
 
 
+# asyncio fixtures (run by pytest-asyncio, see asyncio_mode in pytest.ini).
+# They depend on async_transport so the loop's httpx clients close after their teardown.
 @pytest.fixture(scope="function")
-def menu():
-    yield from fixture_factory(Menu)
+async def async_transport():
+    yield AsyncHttpTransport
+    await AsyncHttpTransport.aclose_all()
+
+
+@pytest.fixture(scope="function")
+async def alocation(async_transport):
+    async for test_obj in async_fixture_factory(Location):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def amachine(async_transport):
+    async for test_obj in async_fixture_factory(Machine):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def auser(async_transport):
+    async for test_obj in async_fixture_factory(User):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def acorporation(async_transport):
+    async for test_obj in async_fixture_factory(Corporation):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def aflavor(async_transport):
+    async for test_obj in async_fixture_factory(Flavor):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def adrink(async_transport):
+    async for test_obj in async_fixture_factory(Drink):
+        yield test_obj
+
+
+@pytest.fixture(scope="function")
+async def amenu(async_transport):
+    async for test_obj in async_fixture_factory(Menu):
+        yield test_obj
 
 
 def pytest_collection_modifyitems(config, items):
@@ -55,6 +133,20 @@ def pytest_collection_modifyitems(config, items):
         items[:] = selected_items
 
 
+def pytest_sessionfinish(session, exitstatus):
+    """Wait for the deferred fixture teardown; leaked resources fail the run under TEARDOWN_STRICT"""
+    teardown_queue = TeardownQueue.started()
+    if teardown_queue is None:
+        return
+    outstanding = teardown_queue.drain()
+    leaked = outstanding + [label for label, _ in teardown_queue.failed]
+    if not leaked:
+        return
+    print(f'\n{len(leaked)} fixture deletes did not complete: {", ".join(leaked)}')
+    if constant.TEARDOWN_STRICT and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
 def pytest_addoption(parser):
     parser.addoption("--case_id", action="store", help="Run specific test case by case_id")
 
@@ -7,16 +7,85 @@ load_dotenv()
 # test timeout
 TIMEOUT = os.getenv("TIMEOUT", 300)
 
+# auth token cache: renew tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 60))
+# lifetime assumed for tokens whose expiry cannot be decoded
+TOKEN_DEFAULT_TTL = int(os.getenv("TOKEN_DEFAULT_TTL", 300))
+
+# pooled HTTP transport shared by every HttpRequestInit
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 32))
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", 0.3))
+
+# list endpoints are read page by page (see APIEndpointBase.iter_list)
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 100))
+LIST_CONCURRENCY = int(os.getenv("LIST_CONCURRENCY", 4))
+# seconds a list's total is cached for random resource selection
+LIST_TOTAL_TTL = int(os.getenv("LIST_TOTAL_TTL", 300))
+# requests in flight at once for APIEndpointBase.create_many/delete_many
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 8))
+# factory CSV rows sent per /user/machine/import/factory request by Machine.create_many
+MACHINE_IMPORT_BATCH_SIZE = int(os.getenv("MACHINE_IMPORT_BATCH_SIZE", 500))
+# machine key pairs generated ahead in a background thread; 0 generates each one on demand
+ECC_KEY_POOL_SIZE = int(os.getenv("ECC_KEY_POOL_SIZE", 64))
+# resources a FixtureGraph creates or deletes at once
+FIXTURE_CONCURRENCY = int(os.getenv("FIXTURE_CONCURRENCY", 8))
+# warm resources kept per resource class and xdist worker for the test fixtures; 0 creates one per test
+RESOURCE_POOL_SIZE = int(os.getenv("RESOURCE_POOL_SIZE", 2))
+# seconds a lease waits for a background refill before creating the resource itself
+RESOURCE_POOL_LEASE_TIMEOUT = float(os.getenv("RESOURCE_POOL_LEASE_TIMEOUT", 5))
+# resources a pool creates at once while refilling
+RESOURCE_POOL_CONCURRENCY = int(os.getenv("RESOURCE_POOL_CONCURRENCY", 2))
+# fixture teardown runs on a background queue, drained when the session finishes
+TEARDOWN_DEFERRED = os.getenv("TEARDOWN_DEFERRED", "true").lower() == "true"
+TEARDOWN_CONCURRENCY = int(os.getenv("TEARDOWN_CONCURRENCY", 4))
+TEARDOWN_RETRIES = int(os.getenv("TEARDOWN_RETRIES", 3))
+TEARDOWN_RETRY_BACKOFF = float(os.getenv("TEARDOWN_RETRY_BACKOFF", 1.0))
+# seconds the session end waits for queued teardown; leftovers fail the run when TEARDOWN_STRICT is set
+TEARDOWN_DRAIN_TIMEOUT = float(os.getenv("TEARDOWN_DRAIN_TIMEOUT", 300))
+TEARDOWN_STRICT = os.getenv("TEARDOWN_STRICT", "false").lower() == "true"
+# append-only journal of created resources for ResourceReaper; empty disables it
+RESOURCE_JOURNAL_PATH = os.getenv("RESOURCE_JOURNAL_PATH", ".resource-journal.jsonl")
+# journal lines written between fsyncs, and the longest time a line may stay unsynced
+RESOURCE_JOURNAL_FSYNC_BATCH = int(os.getenv("RESOURCE_JOURNAL_FSYNC_BATCH", 32))
+RESOURCE_JOURNAL_FSYNC_INTERVAL = float(os.getenv("RESOURCE_JOURNAL_FSYNC_INTERVAL", 1.0))
+# hours a test-named resource must have existed before ResourceReaper --scan deletes it
+REAPER_SCAN_MIN_AGE = float(os.getenv("REAPER_SCAN_MIN_AGE", 6))
+# host label ResourceReaper --scan requires in BACKEND_HOST unless --force is given
+REAPER_SCAN_ENV = os.getenv("REAPER_SCAN_ENV", "qa")
+# DrinkBot fleet simulator: mean seconds between a virtual machine's calls, and requests in flight at once
+DRINKBOT_HEARTBEAT = float(os.getenv("DRINKBOT_HEARTBEAT", 5))
+DRINKBOT_CONCURRENCY = int(os.getenv("DRINKBOT_CONCURRENCY", 64))
+
+# HTTP cassettes: "record" keeps every backend exchange, "replay" serves them with no network (see HttpCassette)
+HTTP_CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "").lower()
+HTTP_CASSETTE_PATH = os.getenv("HTTP_CASSETTE_PATH", "api_external/res/cassettes/backend.cassette.json.gz")
+
+# seconds lookup data (flavor types, vendors, drink categories, /ref, /i18n) is cached
+REFERENCE_DATA_TTL = int(os.getenv("REFERENCE_DATA_TTL", 600))
+# file the reference data cache is kept in between runs; empty keeps it in memory only
+REFERENCE_DATA_CACHE_PATH = os.getenv("REFERENCE_DATA_CACHE_PATH", "")
+
 # host settings
 BACKEND_HOST = os.getenv("BACKEND_HOST", "https://api.qa.botrista.io")
 BASE_HOST = os.getenv("BASE_HOST", "https://us-stage-orderbws.botrista.io")
 CLOUD_BAR_DOMAIN = os.getenv("CLOUD_BAR_DOMAIN", "https://cloudbar.qa.botrista.io")
 OTA_DOMAIN = os.getenv("OTA_DOMAIN", "https://us-orderbws.botrista.io")
+SALES_DASHBOARD_HOST = os.getenv("SALES_DASHBOARD_HOST", "https://api-sales-dashboard.qa.botrista.io")
 
 # Please put legacy host in the end potision. If legancy migrate to backend, it doesn't matter to end potision
 SWAGGER_ENV = os.getenv("SWAGGER_ENV", "qa")
-SWAGGER_HOST_LIST = os.getenv("SWAGGER_HOST_LIST",
-                              [f"https://api-sales-dashboard.{SWAGGER_ENV}.botrista.io",  f"https://api.{SWAGGER_ENV}.botrista.io"])
+SWAGGER_HOST_LIST = [host.strip() for host in os.getenv(
+    "SWAGGER_HOST_LIST",
+    f"https://api-sales-dashboard.{SWAGGER_ENV}.botrista.io,https://api.{SWAGGER_ENV}.botrista.io").split(",") if host.strip()]
+# send each request to BACKEND_HOST or SALES_DASHBOARD_HOST, whichever one's swagger document defines its path
+# (see SwaggerIndex); the documents are read from these hosts, an empty BACKEND_SWAGGER_HOST meaning BACKEND_HOST
+SWAGGER_ROUTING_ENABLED = os.getenv("SWAGGER_ROUTING_ENABLED", "false").lower() == "true"
+BACKEND_SWAGGER_HOST = os.getenv("BACKEND_SWAGGER_HOST", "")
+SALES_DASHBOARD_SWAGGER_HOST = os.getenv("SALES_DASHBOARD_SWAGGER_HOST",
+                                         f"https://api-sales-dashboard.{SWAGGER_ENV}.botrista.io")
 
 # testing user
 TEST_HQ_USER_LOCATION_PREFIX = os.getenv("TEST_HQ_USER_LOCATION_PREFIX", "QLY")
@@ -52,4 +121,27 @@ BOTRISTA_USERNAME = "botrista_machines"
 
 SWAGGER_JSON_PATH = 'swagger.json'
 CWD = os.path.dirname(os.path.abspath(__file__))
-SCHEMA_FILE_PATH = f'{CWD}/api_external/res/schema/{SWAGGER_JSON_PATH}'
\ No newline at end of file
+SCHEMA_FILE_PATH = f'{CWD}/api_external/res/schema/{SWAGGER_JSON_PATH}'
+# every fetched swagger version is kept here by content hash, with its ETag/Last-Modified
+SCHEMA_STORE_DIR = os.getenv("SCHEMA_STORE_DIR", f'{CWD}/api_external/res/schema/store')
+# seconds before the swagger document is revalidated against the backend; negative (default) never revalidates
+SCHEMA_MAX_AGE = int(os.getenv("SCHEMA_MAX_AGE", -1))
+# seconds to wait for the backend when fetching the swagger document
+SCHEMA_FETCH_TIMEOUT = float(os.getenv("SCHEMA_FETCH_TIMEOUT", 10))
+# precompiled form of the swagger document, rebuilt whenever swagger.json changes
+SCHEMA_ARTIFACT_PATH = os.getenv("SCHEMA_ARTIFACT_PATH", f'{CWD}/api_external/res/schema/swagger.schema.bin')
+SCHEMA_ARTIFACT_ENABLED = os.getenv("SCHEMA_ARTIFACT_ENABLED", "true").lower() == "true"
+# number of compiled response validators kept by JSONSchemaLibrary
+SCHEMA_VALIDATOR_CACHE_SIZE = int(os.getenv("SCHEMA_VALIDATOR_CACHE_SIZE", 128))
+# validator backend: jsonschema, or codegen to validate with code generated from each schema
+SCHEMA_VALIDATOR_BACKEND = os.getenv("SCHEMA_VALIDATOR_BACKEND", "jsonschema")
+SCHEMA_CODEGEN_CACHE_DIR = os.getenv("SCHEMA_CODEGEN_CACHE_DIR", f'{CWD}/api_external/res/schema/codegen')
+# response validation mode: full, sample or parallel (see JSONSchemaLibrary.verify_resp_schema)
+SCHEMA_VALIDATION_MODE = os.getenv("SCHEMA_VALIDATION_MODE", "full")
+SCHEMA_SAMPLE_SIZE = int(os.getenv("SCHEMA_SAMPLE_SIZE", 200))
+SCHEMA_SAMPLE_SEED = int(os.getenv("SCHEMA_SAMPLE_SEED", 0))
+# 0 means one worker per CPU
+SCHEMA_VALIDATION_WORKERS = int(os.getenv("SCHEMA_VALIDATION_WORKERS", 0))
+SCHEMA_VALIDATION_CHUNK_SIZE = int(os.getenv("SCHEMA_VALIDATION_CHUNK_SIZE", 500))
+# streaming validation stops after collecting this many errors
+SCHEMA_STREAM_MAX_ERRORS = int(os.getenv("SCHEMA_STREAM_MAX_ERRORS", 100))
\ No newline at end of file